@@ -1,2 +1,3 @@
 """Define the aiolookin package."""
-from .device import async_get_device  # noqa
+from .device import Device, async_get_device  # noqa
+from .transport import Transport  # noqa
@@ -0,0 +1,98 @@
+"""Define a cache for the capabilities a device reports."""
+import time
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+
+DEFAULT_CACHE_TTL = 300
+
+
+class CapabilityCache:
+    """Define a TTL-based cache for capability lists (commands, actions, sensors).
+
+    A TTL of ``None`` caches entries until they are explicitly invalidated; a TTL
+    of ``0`` disables caching altogether.
+    """
+
+    def __init__(self, *, ttl: Optional[float] = DEFAULT_CACHE_TTL) -> None:
+        """Initialize."""
+        self._entries: Dict[str, Tuple[float, List[str]]] = {}
+        self.hits = 0
+        self.misses = 0
+        self.ttl = ttl
+
+    def __contains__(self, key: str) -> bool:
+        """Return whether a fresh entry exists for a key."""
+        return self._get_fresh(key) is not None
+
+    def _get_fresh(self, key: str) -> Optional[List[str]]:
+        """Return the cached value for a key (if it hasn't expired)."""
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+
+        stored_at, value = entry
+        if self.ttl is not None and time.monotonic() - stored_at >= self.ttl:
+            del self._entries[key]
+            return None
+
+        return value
+
+    async def async_get(
+        self, key: str, async_fetch: Callable[[], Awaitable[List[str]]]
+    ) -> List[str]:
+        """Return the value for a key, fetching (and storing) it on a miss."""
+        value = self._get_fresh(key)
+        if value is not None:
+            self.hits += 1
+            return list(value)
+
+        self.misses += 1
+        value = await async_fetch()
+        if self.ttl != 0:
+            self._entries[key] = (time.monotonic(), list(value))
+        return list(value)
+
+    async def async_contains(
+        self, key: str, item: str, async_fetch: Callable[[], Awaitable[List[str]]]
+    ) -> bool:
+        """Return whether the value for a key contains an item.
+
+        If a cached value doesn't contain the item, it is refetched once (in case
+        the device learned it since the value was cached).
+        """
+        cached = key in self
+        if item in await self.async_get(key, async_fetch):
+            return True
+        if not cached:
+            return False
+
+        self.invalidate(key)
+        return item in await self.async_get(key, async_fetch)
+
+    def export(self) -> Dict[str, List[str]]:
+        """Return a copy of every fresh entry."""
+        entries = {}
+        for key in list(self._entries):
+            value = self._get_fresh(key)
+            if value is not None:
+                entries[key] = list(value)
+        return entries
+
+    def invalidate(self, key: Optional[str] = None) -> None:
+        """Invalidate a single entry (or, if no key is provided, all of them)."""
+        if key is None:
+            self._entries.clear()
+        else:
+            self._entries.pop(key, None)
+
+    def load(self, entries: Dict[str, List[str]]) -> None:
+        """Store entries that were already retrieved (as if they were just fetched)."""
+        if self.ttl == 0:
+            return
+        now = time.monotonic()
+        for key, value in entries.items():
+            self._entries[key] = (now, list(value))
+
+    def reset_stats(self) -> None:
+        """Reset the hit/miss counters."""
+        self.hits = 0
+        self.misses = 0
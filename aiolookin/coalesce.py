@@ -0,0 +1,81 @@
+"""Define single-flight coalescing of identical concurrent requests."""
+import asyncio
+import time
+from typing import Any, Awaitable, Callable, Dict, Hashable, Tuple
+
+DEFAULT_FRESHNESS_WINDOW = 0.0
+
+
+def _consume_result(task: "asyncio.Task[Any]") -> None:
+    """Retrieve a finished task's outcome so that it is never reported as lost."""
+    if not task.cancelled():
+        task.exception()
+
+
+class RequestCoalescer:
+    """Define a coalescer that lets identical concurrent requests share one call.
+
+    While a call for a key is in flight, every other caller for that key awaits
+    the same result. With a non-zero freshness window, callers arriving shortly
+    after a call finished reuse its result as well. Shared results must not be
+    mutated by callers.
+    """
+
+    def __init__(self, *, freshness_window: float = DEFAULT_FRESHNESS_WINDOW) -> None:
+        """Initialize."""
+        self._in_flight: Dict[Hashable, "asyncio.Task[Any]"] = {}
+        self._results: Dict[Hashable, Tuple[float, Any]] = {}
+        self.collapsed = 0
+        self.freshness_window = freshness_window
+        self.requests = 0
+        self.reused = 0
+
+    @property
+    def in_flight(self) -> int:
+        """Return the number of calls currently in flight."""
+        return len(self._in_flight)
+
+    def _store_result(self, key: Hashable, task: "asyncio.Task[Any]") -> None:
+        """Clear a finished call (and remember its result if it succeeded)."""
+        if self._in_flight.get(key) is task:
+            del self._in_flight[key]
+
+        if self.freshness_window and not task.cancelled() and not task.exception():
+            self._results[key] = (time.monotonic(), task.result())
+
+    async def async_run(
+        self, key: Hashable, async_func: Callable[[], Awaitable[Any]]
+    ) -> Any:
+        """Run a call for a key, or share the result of an identical one."""
+        self.requests += 1
+
+        if self.freshness_window:
+            entry = self._results.get(key)
+            if entry is not None:
+                if time.monotonic() - entry[0] < self.freshness_window:
+                    self.reused += 1
+                    return entry[1]
+                del self._results[key]
+
+        task = self._in_flight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(async_func())
+            task.add_done_callback(_consume_result)
+            task.add_done_callback(lambda done: self._store_result(key, done))
+            self._in_flight[key] = task
+        else:
+            self.collapsed += 1
+
+        # Shield the shared call so that one cancelled caller doesn't cancel it for
+        # everyone else:
+        return await asyncio.shield(task)
+
+    def invalidate(self) -> None:
+        """Forget every remembered result."""
+        self._results.clear()
+
+    def reset_stats(self) -> None:
+        """Reset the counters."""
+        self.collapsed = 0
+        self.requests = 0
+        self.reused = 0
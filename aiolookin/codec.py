@@ -0,0 +1,297 @@
+"""Define a local engine to encode and decode IR protocol codes."""
+from functools import lru_cache
+from typing import List, NamedTuple, Optional, Tuple
+
+from .errors import CommandError
+from .ir import IRCapture
+
+DEFAULT_CACHE_SIZE = 4096
+DEFAULT_FREQUENCY = 38000
+
+PROTOCOL_NEC1 = "nec1"
+PROTOCOL_NECX = "necx"
+PROTOCOL_PRONTOHEX = "prontohex"
+PROTOCOL_RAW = "raw"
+PROTOCOL_SAMSUNG36 = "samsung36"
+PROTOCOL_SONY = "sony"
+
+PROTOCOL_FREQUENCY_MAP = {
+    PROTOCOL_NEC1: 38400,
+    PROTOCOL_NECX: 38400,
+    PROTOCOL_SAMSUNG36: 38000,
+    PROTOCOL_SONY: 40000,
+}
+
+# Pronto expresses durations in carrier cycles, measured in units of this many µs:
+PRONTO_CLOCK = 0.241246
+
+SONY_BIT_COUNTS = (12, 15, 20)
+
+# Captured timings are rarely exact, so decoding allows this much relative error:
+DEFAULT_TOLERANCE = 0.3
+
+NEC_UNIT = 564
+NEC_FRAME = 108000
+SAMSUNG36_EXTENSION = 1
+SAMSUNG36_UNIT = 500
+SAMSUNG36_GAP = 118000
+SONY_UNIT = 600
+SONY_FRAME = 45000
+
+
+class IRCode(NamedTuple):
+    """Define a protocol-level IR code.
+
+    For NEC-style protocols, ``address`` holds the (up to) 16-bit device/subdevice
+    pair; for Sony, ``bits`` selects the 12-, 15- or 20-bit variant.
+    """
+
+    protocol: str
+    address: int
+    command: int
+    bits: Optional[int] = None
+
+    @property
+    def signal(self) -> str:
+        """Return the code in the hex layout the IR sensor reports as Signal.
+
+        That layout is a prefix byte (0, or the bit count for Sony), the 16-bit
+        address (subdevice byte first) and the command byte.
+        """
+        prefix = self.bits if self.protocol == PROTOCOL_SONY else 0
+        return f"{prefix or 0:02X}{self.address:04X}{self.command:02X}"
+
+
+def _append_pulse_distance(
+    timings: List[int], value: int, count: int, unit: int
+) -> None:
+    """Append <1,-1|1,-3> pulse-distance-encoded bits (LSB first) to timings."""
+    for bit in range(count):
+        timings.append(unit)
+        timings.append(-3 * unit if value >> bit & 1 else -unit)
+
+
+def _append_gap(timings: List[int], unit: int, frame: int) -> None:
+    """Append a stop pulse and a space that pads the signal to its frame length."""
+    timings.append(unit)
+    timings.append(-max(frame - sum(abs(timing) for timing in timings), unit))
+
+
+def _encode_nec(code: IRCode) -> List[int]:
+    """Encode an NEC1/NECx code."""
+    device = code.address & 0xFF
+    subdevice = code.address >> 8
+    if code.address <= 0xFF:
+        subdevice = (~device & 0xFF) if code.protocol == PROTOCOL_NEC1 else device
+
+    leader = 16 if code.protocol == PROTOCOL_NEC1 else 8
+    timings = [leader * NEC_UNIT, -8 * NEC_UNIT]
+    for value in (device, subdevice, code.command, ~code.command & 0xFF):
+        _append_pulse_distance(timings, value, 8, NEC_UNIT)
+    _append_gap(timings, NEC_UNIT, NEC_FRAME)
+    return timings
+
+
+def _encode_samsung36(code: IRCode) -> List[int]:
+    """Encode a Samsung36 code."""
+    timings = [9 * SAMSUNG36_UNIT, -9 * SAMSUNG36_UNIT]
+    _append_pulse_distance(timings, code.address, 16, SAMSUNG36_UNIT)
+    timings.extend((SAMSUNG36_UNIT, -9 * SAMSUNG36_UNIT))
+    _append_pulse_distance(timings, SAMSUNG36_EXTENSION, 4, SAMSUNG36_UNIT)
+    _append_pulse_distance(timings, code.command, 8, SAMSUNG36_UNIT)
+    _append_pulse_distance(timings, ~code.command & 0xFF, 8, SAMSUNG36_UNIT)
+    timings.extend((SAMSUNG36_UNIT, -SAMSUNG36_GAP))
+    return timings
+
+
+def _encode_sony(code: IRCode) -> List[int]:
+    """Encode a Sony (SIRC) code."""
+    bits = code.bits or (
+        20 if code.address > 0xFF else 15 if code.address > 0x1F else 12
+    )
+    if bits not in SONY_BIT_COUNTS:
+        raise CommandError(f"Invalid Sony bit count: {bits}")
+
+    timings = [4 * SONY_UNIT, -SONY_UNIT]
+    for value, count in ((code.command, 7), (code.address, bits - 7)):
+        for bit in range(count):
+            timings.append(2 * SONY_UNIT if value >> bit & 1 else SONY_UNIT)
+            timings.append(-SONY_UNIT)
+    timings[-1] = -max(
+        SONY_FRAME - sum(abs(timing) for timing in timings[:-1]), SONY_UNIT
+    )
+    return timings
+
+
+ENCODER_MAP = {
+    PROTOCOL_NEC1: _encode_nec,
+    PROTOCOL_NECX: _encode_nec,
+    PROTOCOL_SAMSUNG36: _encode_samsung36,
+    PROTOCOL_SONY: _encode_sony,
+}
+
+
+@lru_cache(maxsize=DEFAULT_CACHE_SIZE)
+def encode_timings(code: IRCode) -> IRCapture:
+    """Encode a protocol code into raw timings (memoized, so don't mutate them)."""
+    try:
+        encoder = ENCODER_MAP[code.protocol]
+    except KeyError:
+        raise CommandError(f"Unsupported IR protocol: {code.protocol}") from None
+    return IRCapture(encoder(code))
+
+
+def timings_to_pronto(capture: IRCapture, frequency: int = DEFAULT_FREQUENCY) -> str:
+    """Convert raw timings into a (learned, non-repeating) ProntoHex string."""
+    frequency_code = round(1000000 / (frequency * PRONTO_CLOCK))
+    period = frequency_code * PRONTO_CLOCK
+
+    timings = list(capture)
+    if len(timings) % 2:
+        # Pronto sequences are made of pulse/space pairs:
+        timings.append(-round(period))
+
+    words = [0, frequency_code, len(timings) // 2, 0]
+    words.extend(max(round(abs(timing) / period), 1) for timing in timings)
+    return " ".join(f"{word:04X}" for word in words)
+
+
+def pronto_to_timings(pronto: str) -> Tuple[IRCapture, int]:
+    """Convert a ProntoHex string into raw timings and a carrier frequency.
+
+    The one-time sequence is used if present; otherwise, the repeat sequence is.
+    """
+    try:
+        words = [int(word, 16) for word in pronto.split()]
+    except ValueError:
+        raise CommandError(f"Invalid ProntoHex: {pronto}") from None
+
+    if len(words) < 4 or words[0] != 0 or not words[1]:
+        raise CommandError(f"Unsupported ProntoHex: {pronto}")
+
+    once, repeat = words[2] * 2, words[3] * 2
+    if len(words) != 4 + once + repeat:
+        raise CommandError(f"Invalid ProntoHex length: {pronto}")
+
+    period = words[1] * PRONTO_CLOCK
+    sequence = words[4 : 4 + once] if once else words[4 + once :]
+    return (
+        IRCapture(
+            round(word * period) * (1 if index % 2 == 0 else -1)
+            for index, word in enumerate(sequence)
+        ),
+        round(1000000 / period),
+    )
+
+
+@lru_cache(maxsize=DEFAULT_CACHE_SIZE)
+def encode_operand(code: IRCode, action: Optional[str] = None) -> str:
+    """Encode a code into the operand for a device action (memoized).
+
+    Protocol actions take the code's signal; the ``prontohex`` and ``raw`` actions
+    take the locally encoded timings in those formats.
+    """
+    action = action or code.protocol
+    if action == PROTOCOL_RAW:
+        return encode_timings(code).to_raw()
+    if action == PROTOCOL_PRONTOHEX:
+        return timings_to_pronto(
+            encode_timings(code), PROTOCOL_FREQUENCY_MAP[code.protocol]
+        )
+    if action != code.protocol:
+        raise CommandError(f"Cannot encode a {code.protocol} code for {action}")
+    if action not in ENCODER_MAP:
+        raise CommandError(f"Unsupported IR protocol: {action}")
+    return code.signal
+
+
+def _matches(value: int, expected: int, tolerance: float) -> bool:
+    """Return whether a measured duration is close enough to an expected one."""
+    return abs(abs(value) - expected) <= expected * tolerance
+
+
+def _decode_pulse_distance(
+    timings: List[int], start: int, count: int, unit: int, tolerance: float
+) -> Optional[int]:
+    """Decode <1,-1|1,-3> bits (LSB first) starting at an index."""
+    value = 0
+    for bit in range(count):
+        index = start + 2 * bit
+        if index + 1 >= len(timings) or not _matches(timings[index], unit, tolerance):
+            return None
+        space = -timings[index + 1]
+        if _matches(space, 3 * unit, tolerance):
+            value |= 1 << bit
+        elif not _matches(space, unit, tolerance):
+            return None
+    return value
+
+
+def decode_timings(
+    capture: IRCapture, *, tolerance: float = DEFAULT_TOLERANCE
+) -> Optional[IRCode]:
+    """Decode raw timings into a protocol code (returning None if unrecognized)."""
+    timings = list(capture)
+    if len(timings) < 4:
+        return None
+
+    pulse, space = timings[0], timings[1]
+
+    if _matches(pulse, 16 * NEC_UNIT, tolerance) and _matches(
+        space, 8 * NEC_UNIT, tolerance
+    ):
+        protocol = PROTOCOL_NEC1
+    elif _matches(pulse, 8 * NEC_UNIT, tolerance) and _matches(
+        space, 8 * NEC_UNIT, tolerance
+    ):
+        # NECx and Samsung36 share a leader; the latter has a mid-frame separator:
+        if len(timings) > 35 and _matches(timings[35], 9 * SAMSUNG36_UNIT, tolerance):
+            protocol = PROTOCOL_SAMSUNG36
+        else:
+            protocol = PROTOCOL_NECX
+    elif _matches(pulse, 4 * SONY_UNIT, tolerance):
+        return _decode_sony(timings, tolerance)
+    else:
+        return None
+
+    if protocol == PROTOCOL_SAMSUNG36:
+        address = _decode_pulse_distance(timings, 2, 16, SAMSUNG36_UNIT, tolerance)
+        data = _decode_pulse_distance(timings, 36, 20, SAMSUNG36_UNIT, tolerance)
+        if address is None or data is None:
+            return None
+        command, inverse = data >> 4 & 0xFF, data >> 12
+        if command ^ inverse != 0xFF:
+            return None
+        return IRCode(protocol, address, command)
+
+    value = _decode_pulse_distance(timings, 2, 32, NEC_UNIT, tolerance)
+    if value is None:
+        return None
+
+    device, subdevice = value & 0xFF, value >> 8 & 0xFF
+    command, inverse = value >> 16 & 0xFF, value >> 24
+    if command ^ inverse != 0xFF:
+        return None
+    return IRCode(protocol, subdevice << 8 | device, command)
+
+
+def _decode_sony(timings: List[int], tolerance: float) -> Optional[IRCode]:
+    """Decode Sony (SIRC) timings."""
+    bits: List[int] = []
+    for index in range(2, len(timings), 2):
+        if _matches(timings[index], 2 * SONY_UNIT, tolerance):
+            bits.append(1)
+        elif _matches(timings[index], SONY_UNIT, tolerance):
+            bits.append(0)
+        else:
+            return None
+        if index + 1 < len(timings) and not _matches(
+            timings[index + 1], SONY_UNIT, tolerance
+        ):
+            break
+
+    if len(bits) not in SONY_BIT_COUNTS:
+        return None
+
+    value = sum(bit << index for index, bit in enumerate(bits))
+    return IRCode(PROTOCOL_SONY, value >> 7, value & 0x7F, len(bits))
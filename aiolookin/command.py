@@ -1,37 +1,72 @@
 """Define endpoints to manage commands and their data."""
 from typing import Any, Awaitable, Callable, Dict, List, Optional, cast
 
+from .cache import CapabilityCache
+from .codec import IRCode, encode_operand
 from .errors import CommandError
 
 
 class CommandAPI:
     """Define a command data object."""
 
-    def __init__(self, async_request: Callable[..., Awaitable]) -> None:
+    def __init__(
+        self,
+        async_request: Callable[..., Awaitable],
+        *,
+        cache: Optional[CapabilityCache] = None,
+        validate: bool = True,
+    ) -> None:
         """Initialize."""
         self._async_request = async_request
+        self._cache = cache or CapabilityCache(ttl=0)
+        self._validate = validate
+
+    async def _async_fetch_list(self, endpoint: str) -> List[str]:
+        """Get a list of values from an endpoint."""
+        data = await self._async_request("get", endpoint)
+        return cast(List[str], data)
 
     async def async_get_command_list(self) -> List[str]:
         """Get the list of commands supported by the device."""
-        commands = await self._async_request("get", "commands")
-        return cast(List[str], commands)
+        return await self._cache.async_get(
+            "commands", lambda: self._async_fetch_list("commands")
+        )
 
     async def async_get_command_action_list(self, command: str) -> List[str]:
         """Get the list of actions that a command can trigger."""
-        actions = await self._async_request("get", f"commands/{command}")
-        return cast(List[str], actions)
+        endpoint = f"commands/{command}"
+        return await self._cache.async_get(
+            endpoint, lambda: self._async_fetch_list(endpoint)
+        )
 
     async def async_send_command(
-        self, command: str, action: str, *, operand: Optional[str] = None
+        self,
+        command: str,
+        action: str,
+        *,
+        operand: Optional[str] = None,
+        validate: Optional[bool] = None,
     ) -> Dict[str, Any]:
-        """Send a command/action (plus optional parameter)."""
-        command_list = await self.async_get_command_list()
-        if command not in command_list:
-            raise CommandError(f"Unknown command: {command}")
+        """Send a command/action (plus optional parameter).
+
+        Unless validation is disabled (here or on the device), the command and
+        action are checked against the (cached) lists the device supports; a cached
+        list that lacks them is refetched once before the command is rejected.
+        """
+        if validate is None:
+            validate = self._validate
+
+        if validate:
+            if not await self._cache.async_contains(
+                "commands", command, lambda: self._async_fetch_list("commands")
+            ):
+                raise CommandError(f"Unknown command: {command}")
 
-        action_list = await self.async_get_command_action_list(command)
-        if action not in action_list:
-            raise CommandError(f'Unknown action for command "{command}": {action}')
+            endpoint = f"commands/{command}"
+            if not await self._cache.async_contains(
+                endpoint, action, lambda: self._async_fetch_list(endpoint)
+            ):
+                raise CommandError(f'Unknown action for command "{command}": {action}')
 
         response = await self._async_request(
             "post",
@@ -39,3 +74,16 @@ class CommandAPI:
             json={"command": command, "action": action, "operand": operand},
         )
         return cast(Dict[str, Any], response)
+
+    async def async_send_ir_code(
+        self, code: IRCode, *, action: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """Send an IR code, encoding the operand locally for the given action.
+
+        The action defaults to the code's protocol (e.g. ``nec1``); ``prontohex``
+        and ``raw`` send the locally encoded timings instead.
+        """
+        action = action or code.protocol
+        return await self.async_send_command(
+            "IR", action, operand=encode_operand(code, action)
+        )
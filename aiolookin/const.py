@@ -2,3 +2,14 @@
 import logging
 
 LOGGER = logging.getLogger(__package__)
+
+DEFAULT_TIMEOUT = 10
+
+DEVICE_MODE_EXECUTOR = "Executor"
+DEVICE_MODE_SENSOR = "Sensor"
+DEVICE_MODE_UNKNOWN = "Unknown"
+
+DEVICE_MODE_MAP = {
+    "0": DEVICE_MODE_EXECUTOR,
+    "1": DEVICE_MODE_SENSOR,
+}
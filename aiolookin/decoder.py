@@ -0,0 +1,39 @@
+"""Define pluggable JSON decoding for device responses."""
+import json
+from typing import Any, Callable, Optional
+
+# A decoder takes a raw response body and returns the decoded JSON (raising a
+# ValueError if the body isn't valid JSON):
+JSONDecoder = Callable[[bytes], Any]
+
+
+def get_json_decoder(name: Optional[str] = None) -> JSONDecoder:
+    """Return a JSON decoder by name (or, by default, the fastest one installed).
+
+    orjson is preferred, then ujson; the standard library is the fallback.
+    """
+    if name in (None, "orjson"):
+        try:
+            import orjson  # pylint: disable=import-outside-toplevel
+
+            return orjson.loads
+        except ImportError:
+            if name is not None:
+                raise
+
+    if name in (None, "ujson"):
+        try:
+            import ujson  # pylint: disable=import-outside-toplevel
+
+            return ujson.loads  # type: ignore[no-any-return]
+        except ImportError:
+            if name is not None:
+                raise
+
+    if name in (None, "json"):
+        return json.loads
+
+    raise ValueError(f"Unknown JSON decoder: {name}")
+
+
+DEFAULT_JSON_DECODER = get_json_decoder()
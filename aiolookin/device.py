@@ -1,152 +1,497 @@
 """Define anything needed to connect to a LOOK.in device."""
-import json
-from typing import Any, Dict, List, Optional, Union, cast
+import asyncio
+from functools import partial
+from types import TracebackType
+from typing import Any, Dict, List, Optional, Tuple, Type, Union, cast
 
-from aiohttp import ClientSession, ClientTimeout
-from aiohttp.client_exceptions import ClientError
+from aiohttp import ClientSession
+from aiohttp.client_exceptions import ClientError, ClientResponseError
 
+from .cache import DEFAULT_CACHE_TTL, CapabilityCache
+from .coalesce import DEFAULT_FRESHNESS_WINDOW, RequestCoalescer
 from .command import CommandAPI
-from .const import LOGGER
-from .errors import RequestError
+from .const import (  # noqa: F401
+    DEFAULT_TIMEOUT,
+    DEVICE_MODE_EXECUTOR,
+    DEVICE_MODE_MAP,
+    DEVICE_MODE_SENSOR,
+    DEVICE_MODE_UNKNOWN,
+    LOGGER,
+)
+from .decoder import DEFAULT_JSON_DECODER, JSONDecoder
+from .errors import LookInError, RequestError
+from .events import DeviceInfoEvents
+from .instrumentation import Instrumentation
+from .models import DeviceInfo
+from .queue import DEFAULT_QUEUE_SIZE, CommandQueue
+from .ratelimit import TokenBucket
+from .resilience import BREAKER_STATE_OPEN, CircuitBreaker, RetryPolicy
+from .scheduler import (
+    PRIORITY_INTERACTIVE,
+    PRIORITY_REFRESH,
+    RequestScheduler,
+    get_request_priority,
+)
 from .sensor import SensorAPI
+from .transport import Transport
 
-DEFAULT_TIMEOUT = 10
 
-DEVICE_MODE_EXECUTOR = "Executor"
-DEVICE_MODE_SENSOR = "Sensor"
-DEVICE_MODE_UNKNOWN = "Unknown"
+# The coalescer key shared by concurrent device info refreshes (distinct from any
+# endpoint):
+DEVICE_INFO_REFRESH_KEY = "refresh:device"
 
-DEVICE_MODE_MAP = {
-    "0": DEVICE_MODE_EXECUTOR,
-    "1": DEVICE_MODE_SENSOR,
-}
+
+def _is_transient(err: Optional[BaseException]) -> bool:
+    """Return whether an error suggests that the device is unreachable/unhealthy."""
+    if isinstance(err, ClientResponseError):
+        return err.status >= 500
+    return isinstance(err, (asyncio.TimeoutError, ClientError))
 
 
 class Device:
-    """Define the device."""
+    """Define the device.
+
+    Unless a shared Transport is provided, the device owns its own (pooled)
+    transport; it should then be used as an async context manager or closed
+    via ``async_close()`` once no longer needed. Options of the transport itself
+    (``session``, ``instrumentation`` and ``json_decoder``) can't be combined with
+    a shared Transport.
+    """
 
     def __init__(
-        self, ip_address: str, *, session: Optional[ClientSession] = None
+        self,
+        ip_address: str,
+        *,
+        session: Optional[ClientSession] = None,
+        transport: Optional[Transport] = None,
+        cache_ttl: Optional[float] = DEFAULT_CACHE_TTL,
+        validate: bool = True,
+        queue_size: int = DEFAULT_QUEUE_SIZE,
+        coalesce_commands: bool = False,
+        retry_policy: Optional[RetryPolicy] = None,
+        circuit_breaker: Optional[CircuitBreaker] = None,
+        freshness_window: float = DEFAULT_FRESHNESS_WINDOW,
+        instrumentation: Optional[Instrumentation] = None,
+        json_decoder: Optional[JSONDecoder] = None,
+        scheduler: Optional[RequestScheduler] = None,
+        rate_limiter: Optional[TokenBucket] = None,
     ) -> None:
         """Initialize."""
+        if transport is not None:
+            transport_options = [
+                name
+                for name, value in (
+                    ("session", session),
+                    ("instrumentation", instrumentation),
+                    ("json_decoder", json_decoder),
+                )
+                if value is not None
+            ]
+            if transport_options:
+                raise ValueError(
+                    f"{', '.join(transport_options)} can't be combined with a "
+                    "transport; pass it to the Transport instead"
+                )
+
         self._device_info: Dict[str, str] = {}
+        self._info: Optional[DeviceInfo] = None
         self._ip_address = ip_address
-        self._session = session
-
-        self.command = CommandAPI(self._async_request)
-        self.sensor = SensorAPI(self._async_request)
+        self._owns_transport = transport is None
+        self._retry_policy = retry_policy
+        self._transport = transport or Transport(
+            session=session,
+            instrumentation=instrumentation,
+            json_decoder=json_decoder or DEFAULT_JSON_DECODER,
+        )
+
+        self.circuit_breaker = circuit_breaker or CircuitBreaker()
+        self.coalescer = RequestCoalescer(freshness_window=freshness_window)
+        self.rate_limiter = rate_limiter
+        self.scheduler = scheduler or RequestScheduler()
+
+        self.cache = CapabilityCache(ttl=cache_ttl)
+        self.command = CommandAPI(
+            self._async_request, cache=self.cache, validate=validate
+        )
+        self.sensor = SensorAPI(
+            self._async_request, cache=self.cache, validate=validate
+        )
+        self.command_queue = CommandQueue(
+            self.command.async_send_command,
+            maxsize=queue_size,
+            coalesce=coalesce_commands,
+        )
+        self.info_events = DeviceInfoEvents()
 
     def __repr__(self) -> str:
         """Return a string representation of the device."""
         return f"<Device type={self.type} id={self.device_id}>"
 
+    async def __aenter__(self) -> "Device":
+        """Enter the device's context."""
+        return self
+
+    async def __aexit__(
+        self,
+        exc_type: Optional[Type[BaseException]],
+        exc_val: Optional[BaseException],
+        exc_tb: Optional[TracebackType],
+    ) -> None:
+        """Exit the device's context."""
+        await self.async_close()
+
+    @property
+    def breaker_state(self) -> str:
+        """Return the state of the device's circuit breaker."""
+        return self.circuit_breaker.state
+
     @property
     def device_id(self) -> str:
         """Return the device id."""
-        return self._device_info["ID"]
+        return self.info.device_id
 
     @property
     def device_mode(self) -> str:
         """Return the device mode."""
-        raw_mode = self._device_info["SensorMode"]
-        if raw_mode not in DEVICE_MODE_MAP:
-            LOGGER.debug("Unknown device mode value: %s", raw_mode)
-            return DEVICE_MODE_UNKNOWN
-        return DEVICE_MODE_MAP[raw_mode]
+        return self.info.device_mode
 
     @property
     def eco_mode_enabled(self) -> bool:
         """Return whether the device has Eco mode enabled."""
-        return self._device_info["EcoMode"] == "on"
+        return self.info.eco_mode_enabled
 
     @property
     def firmware(self) -> str:
         """Return the device firmware."""
-        return self._device_info["Firmware"]
+        return self.info.firmware
 
     @property
     def homekit_enabled(self) -> bool:
         """Return whether the device is HomeKit-enabled."""
-        return bool(self._device_info["HomeKit"])
+        return self.info.homekit_enabled
+
+    @property
+    def info(self) -> DeviceInfo:
+        """Return the latest snapshot of the device's info."""
+        if self._info is None:
+            raise LookInError("Device info hasn't been loaded yet")
+        return self._info
 
     @property
     def internal_temp_c(self) -> int:
         """Return the device's internal temperature in C."""
-        return int(self._device_info["Temperature"])
+        return self.info.internal_temp_c
+
+    @property
+    def raw_device_info(self) -> Dict[str, Any]:
+        """Return a copy of the device info as the device last reported it."""
+        return dict(self._device_info)
+
+    @property
+    def ip_address(self) -> str:
+        """Return the IP address (optionally with a port) of the device."""
+        return self._ip_address
 
     @property
     def mrdc(self) -> str:
         """Return the MRDC (?)."""
-        return self._device_info["MRDC"]
+        return self.info.mrdc
 
     @property
     def name(self) -> str:
         """Return the name."""
-        return self._device_info["Name"]
+        return self.info.name
 
     @property
     def power_mode(self) -> str:
         """Return the power mode."""
-        return self._device_info["PowerMode"]
+        return self.info.power_mode
 
     @property
     def status(self) -> str:
         """Return the status."""
-        return self._device_info["Status"]
+        return self.info.status
 
     @property
     def type(self) -> str:
         """Return the device type."""
-        return self._device_info["Type"]
+        return self.info.type
 
     @property
     def voltage(self) -> int:
         """Return the current voltage in millivolts."""
-        return int(self._device_info["CurrentVoltage"])
+        return self.info.voltage
+
+    def _get_request_priority(self, method: str) -> int:
+        """Return the priority of a request made in the current context.
+
+        Unless one is set for the context (via ``request_priority()``), commands
+        are interactive and GET requests are state refreshes.
+        """
+        priority = get_request_priority()
+        if priority is not None:
+            return priority
+        return PRIORITY_REFRESH if method.lower() == "get" else PRIORITY_INTERACTIVE
 
     async def _async_request(
         self, method: str, endpoint: str, **kwargs: Dict[str, Any]
     ) -> Union[Dict[str, Any], List[str]]:
-        """Make an API request."""
-        url = f"http://{self._ip_address}/{endpoint}"
+        """Make an API request.
+
+        Concurrent, identical GET requests of the same priority share a single call
+        to the device.
+        """
+        priority = self._get_request_priority(method)
+
+        if method.lower() == "get" and not kwargs:
+            return cast(
+                Union[Dict[str, Any], List[str]],
+                await self.coalescer.async_run(
+                    (endpoint, priority),
+                    partial(
+                        self._async_request_with_policies, priority, method, endpoint
+                    ),
+                ),
+            )
+        return await self._async_request_with_policies(
+            priority, method, endpoint, **kwargs
+        )
+
+    async def _async_request_with_policies(
+        self, priority: int, method: str, endpoint: str, **kwargs: Dict[str, Any]
+    ) -> Union[Dict[str, Any], List[str]]:
+        """Make an API request with the scheduling and resilience policies applied.
+
+        Every attempt first waits for the device's and the transport's rate limits
+        (if any, by priority), then for its turn in the scheduler; it only holds a
+        scheduler slot while it is actually being sent, and an attempt that is never
+        sent (e.g., an overdue background request that gets dropped) gives its
+        tokens back. GET requests that fail transiently are retried according to the
+        retry policy (if any).
+        """
+        attempts = 1
+        if self._retry_policy and method.lower() == "get":
+            attempts = self._retry_policy.attempts
+
+        attempt = 0
+        while True:
+            # Fail fast (without waiting for a token) while the breaker is open:
+            if self.circuit_breaker.state == BREAKER_STATE_OPEN:
+                raise self._get_circuit_breaker_error(endpoint)
+            await self._async_wait_for_rate_limits(priority)
+
+            sent = False
+
+            async def async_attempt() -> Union[Dict[str, Any], List[str]]:
+                """Send the attempt once it is its turn."""
+                nonlocal sent
+                sent = True
+                return await self._async_attempt_request(method, endpoint, **kwargs)
+
+            try:
+                return cast(
+                    Union[Dict[str, Any], List[str]],
+                    await self.scheduler.async_run(priority, async_attempt),
+                )
+            except asyncio.CancelledError:
+                if not sent:
+                    self._release_rate_limits()
+                raise
+            except RequestError as err:
+                if not sent:
+                    self._release_rate_limits()
+                    raise
+                if not _is_transient(err.__cause__):
+                    raise
+                attempt += 1
+                if attempt >= attempts:
+                    raise
+                assert self._retry_policy
+                delay = self._retry_policy.get_delay(attempt - 1)
+                LOGGER.debug("Retrying %s in %.2f seconds: %s", endpoint, delay, err)
+                await asyncio.sleep(delay)
+
+    async def _async_attempt_request(
+        self, method: str, endpoint: str, **kwargs: Dict[str, Any]
+    ) -> Union[Dict[str, Any], List[str]]:
+        """Send a single request, recording the outcome with the circuit breaker.
 
-        use_running_session = self._session and not self._session.closed
-        if use_running_session:
-            session = self._session
-        else:
-            session = ClientSession(timeout=ClientTimeout(total=DEFAULT_TIMEOUT))
+        Requests fail fast while the circuit breaker is open.
+        """
+        if not self.circuit_breaker.allow_request():
+            raise self._get_circuit_breaker_error(endpoint)
 
-        assert session
+        try:
+            data = await self._async_send_request(method, endpoint, **kwargs)
+        except RequestError as err:
+            if _is_transient(err.__cause__):
+                self.circuit_breaker.record_failure()
+            else:
+                self.circuit_breaker.record_success()
+            raise
+        except BaseException:
+            # The request never completed (e.g., it was cancelled), so release a
+            # half-open probe without judging the device's health:
+            self.circuit_breaker.release_probe()
+            raise
+
+        self.circuit_breaker.record_success()
+        return data
+
+    async def _async_wait_for_rate_limits(self, priority: int) -> None:
+        """Wait until both the device and the transport allow another request."""
+        if self.rate_limiter is not None:
+            await self.rate_limiter.async_acquire(priority=priority)
+        if self._transport.rate_limiter is not None:
+            try:
+                await self._transport.rate_limiter.async_acquire(priority=priority)
+            except BaseException:
+                if self.rate_limiter is not None:
+                    self.rate_limiter.release()
+                raise
+
+    def _get_circuit_breaker_error(self, endpoint: str) -> RequestError:
+        """Return the error for a request that the circuit breaker doesn't allow."""
+        return RequestError(
+            f"Not requesting http://{self._ip_address}/{endpoint}: circuit breaker "
+            f"is {self.circuit_breaker.state}"
+        )
+
+    def _release_rate_limits(self) -> None:
+        """Give back the tokens taken for a request that was never sent."""
+        if self.rate_limiter is not None:
+            self.rate_limiter.release()
+        if self._transport.rate_limiter is not None:
+            self._transport.rate_limiter.release()
+
+    async def _async_send_request(
+        self, method: str, endpoint: str, **kwargs: Dict[str, Any]
+    ) -> Union[Dict[str, Any], List[str]]:
+        """Send a single HTTP request to the device."""
+        url = f"http://{self._ip_address}/{endpoint}"
+        # Get the session first, so that a request that can't be made isn't traced:
+        session = self._transport.session
 
-        data: Dict[str, Any] = {}
+        instrumentation = self._transport.instrumentation
+        trace = None
+        if instrumentation is not None:
+            trace = instrumentation.start_request(self._ip_address, endpoint, method)
 
         try:
-            async with session.request(method, url, **kwargs) as resp:
-                data = await resp.json()
+            async with session.request(
+                method, url, trace_request_ctx=trace, **kwargs
+            ) as resp:
+                # Error bodies aren't worth decoding:
                 resp.raise_for_status()
-        except (ClientError, json.decoder.JSONDecodeError) as err:
+                body = await resp.read()
+            if not body.strip():
+                raise ValueError("Empty response")
+            data = self._transport.json_decoder(body)
+        except (asyncio.TimeoutError, ClientError, ValueError) as err:
+            if instrumentation is not None and trace is not None:
+                instrumentation.finish_request(
+                    trace, status=getattr(err, "status", None), error=err
+                )
             raise RequestError(f"Error while requesting {url}: {err}") from err
-        finally:
-            if not use_running_session:
-                await session.close()
+
+        if instrumentation is not None and trace is not None:
+            instrumentation.finish_request(trace, status=resp.status)
 
         LOGGER.debug("Received data for %s: %s", url, data)
 
-        return data
+        return cast(Union[Dict[str, Any], List[str]], data)
+
+    @property
+    def transport(self) -> Transport:
+        """Return the transport the device uses."""
+        return self._transport
+
+    async def async_close(self) -> None:
+        """Close the device's command queue and transport (unless it is shared)."""
+        await self.command_queue.async_close()
+        if self._owns_transport:
+            await self._transport.async_close()
 
-    async def async_update_device_info(self) -> None:
-        """Get the latest device info.
+    async def async_update_device_info(self) -> Tuple[str, ...]:
+        """Get the latest device info (returning the names of the changed fields).
 
-        Intended to be called right after instantiating the object.
+        Intended to be called right after instantiating the object. Concurrent
+        calls share a single refresh, so every caller hears about its changes.
         """
+        return cast(
+            Tuple[str, ...],
+            await self.coalescer.async_run(
+                (DEVICE_INFO_REFRESH_KEY, self._get_request_priority("get")),
+                self._async_refresh_device_info,
+            ),
+        )
+
+    async def _async_refresh_device_info(self) -> Tuple[str, ...]:
+        """Request and load the latest device info."""
         data = await self._async_request("get", "device")
-        self._device_info = cast(Dict[str, Any], data)
+        return self.load_device_info(cast(Dict[str, Any], data))
+
+    def load_device_info(self, data: Dict[str, Any]) -> Tuple[str, ...]:
+        """Load device info that was already retrieved (returning the changed fields).
+
+        Useful for restoring a device without making a request (e.g., from a
+        DeviceRegistry). Subscribers to ``info_events`` hear about changed fields.
+        Raises a DeviceInfoError if the info is missing fields or malformed.
+        """
+        info = DeviceInfo.from_dict(data)
+        previous = self._info
+        changed_fields = info.diff(previous)
+        self._device_info = data
+        self._info = info
+
+        if changed_fields and self.info_events:
+            self.info_events.dispatch(self, previous, info, changed_fields)
+
+        return changed_fields
 
 
 async def async_get_device(
-    ip_address: str, *, session: Optional[ClientSession] = None
+    ip_address: str,
+    *,
+    session: Optional[ClientSession] = None,
+    transport: Optional[Transport] = None,
+    cache_ttl: Optional[float] = DEFAULT_CACHE_TTL,
+    validate: bool = True,
+    queue_size: int = DEFAULT_QUEUE_SIZE,
+    coalesce_commands: bool = False,
+    retry_policy: Optional[RetryPolicy] = None,
+    circuit_breaker: Optional[CircuitBreaker] = None,
+    freshness_window: float = DEFAULT_FRESHNESS_WINDOW,
+    instrumentation: Optional[Instrumentation] = None,
+    json_decoder: Optional[JSONDecoder] = None,
+    scheduler: Optional[RequestScheduler] = None,
+    rate_limiter: Optional[TokenBucket] = None,
 ) -> Device:
-    """Get a fully initialized device."""
-    device = Device(ip_address, session=session)
-    await device.async_update_device_info()
+    """Get a fully initialized device.
+
+    Unless a session or transport is provided, the device owns its transport; it
+    must then be closed via ``async_close()`` (or used as an async context
+    manager) once no longer needed.
+    """
+    device = Device(
+        ip_address,
+        session=session,
+        transport=transport,
+        cache_ttl=cache_ttl,
+        validate=validate,
+        queue_size=queue_size,
+        coalesce_commands=coalesce_commands,
+        retry_policy=retry_policy,
+        circuit_breaker=circuit_breaker,
+        freshness_window=freshness_window,
+        instrumentation=instrumentation,
+        json_decoder=json_decoder,
+        scheduler=scheduler,
+        rate_limiter=rate_limiter,
+    )
+    try:
+        await device.async_update_device_info()
+    except LookInError:
+        await device.async_close()
+        raise
     return device
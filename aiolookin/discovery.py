@@ -0,0 +1,242 @@
+"""Define discovery of devices on local networks."""
+import asyncio
+from collections import deque
+import ipaddress
+from typing import (
+    AsyncIterator,
+    Deque,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Set,
+    Union,
+)
+
+from .const import LOGGER
+from .device import Device
+from .errors import LookInError
+from .transport import Transport
+from .udp import UDP_PORT, UDPEvent, UDPListener
+
+DEFAULT_MAX_CONCURRENCY = 128
+DEFAULT_PORT = 80
+DEFAULT_PROBE_TIMEOUT = 1.0
+
+IPNetwork = Union[ipaddress.IPv4Network, ipaddress.IPv6Network]
+
+
+def _iter_hosts(networks: List[IPNetwork]) -> Iterator[str]:
+    """Iterate over every host address in a list of networks."""
+    for network in networks:
+        if network.num_addresses == 1:
+            yield str(network.network_address)
+            continue
+        for host in network.hosts():
+            yield str(host)
+
+
+class DeviceScanner:
+    """Define a scan of networks (in CIDR notation) for devices.
+
+    Every host is probed by requesting its device info, with at most
+    ``max_concurrency`` probes in flight (and never more than the transport has
+    connections, so that no probe spends its timeout waiting for one) and each one
+    abandoned after ``probe_timeout`` seconds; found devices already have their
+    info loaded.
+
+    If ``listen`` is set, hosts that announce themselves over UDP are probed right
+    away (those outside of ``networks`` are ignored, unless no networks are given);
+    the scan then keeps listening for ``listen_duration`` seconds after probing
+    every host.
+
+    Found devices use the given transport; without one, hosts are probed through
+    a transport that only lasts as long as the scan, and each found device owns
+    its own transport (and must be closed by the caller).
+    """
+
+    def __init__(
+        self,
+        networks: Iterable[str] = (),
+        *,
+        transport: Optional[Transport] = None,
+        port: int = DEFAULT_PORT,
+        max_concurrency: int = DEFAULT_MAX_CONCURRENCY,
+        probe_timeout: float = DEFAULT_PROBE_TIMEOUT,
+        listen: bool = False,
+        listen_port: int = UDP_PORT,
+        listen_duration: float = 0.0,
+    ) -> None:
+        """Initialize."""
+        self._announced: Deque[str] = deque()
+        self._found: "asyncio.Queue[Optional[Device]]" = asyncio.Queue()
+        self._networks: List[IPNetwork] = [
+            ipaddress.ip_network(network, strict=False) for network in networks
+        ]
+        self._hosts = _iter_hosts(self._networks)
+        self._scan_transport: Optional[Transport] = None
+        self._scanning = False
+        self._tasks: Set["asyncio.Task[Optional[Device]]"] = set()
+        self.listen = listen
+        self.listen_duration = listen_duration
+        self.listen_port = listen_port
+        self.max_concurrency = max_concurrency
+        self.port = port
+        self.probe_timeout = probe_timeout
+        self.probed: Set[str] = set()
+        self.transport = transport
+
+    def _handle_announcement(self, event: UDPEvent) -> None:
+        """Probe a host that announced itself."""
+        host = event.ip_address
+        if host in self.probed:
+            return
+        if self._networks and not any(
+            ipaddress.ip_address(host) in network for network in self._networks
+        ):
+            return
+
+        if self._scanning:
+            self._announced.append(host)
+            return
+
+        # The scan itself is over, so probe the host directly:
+        self.probed.add(host)
+        task = asyncio.ensure_future(self.async_probe(host))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    def _next_host(self) -> Optional[str]:
+        """Return the next host that hasn't been probed (announced ones first)."""
+        while True:
+            if self._announced:
+                host: Optional[str] = self._announced.popleft()
+            else:
+                host = next(self._hosts, None)
+            if host is None or host not in self.probed:
+                break
+        if host is not None:
+            self.probed.add(host)
+        return host
+
+    async def _async_scan_hosts(self) -> None:
+        """Probe hosts until there are none left."""
+        while True:
+            host = self._next_host()
+            if host is None:
+                return
+            await self.async_probe(host)
+
+    def _get_concurrency(self) -> int:
+        """Return how many probes to run at once."""
+        limit = self.transport.limit if self.transport is not None else 0
+        return min(self.max_concurrency, limit) if limit else self.max_concurrency
+
+    async def _async_supervise(self) -> None:
+        """Signal the end of the scan once every probe is done."""
+        await asyncio.gather(
+            *(self._async_scan_hosts() for _ in range(self._get_concurrency()))
+        )
+        self._scanning = False
+        if self.listen:
+            await asyncio.sleep(self.listen_duration)
+        while self._tasks:
+            await asyncio.gather(*self._tasks)
+        await self._found.put(None)
+
+    async def async_probe(self, host: str) -> Optional[Device]:
+        """Probe a single host (returning the device found there, if any)."""
+        address = host if self.port == DEFAULT_PORT else f"{host}:{self.port}"
+        device = Device(address, transport=self.transport or self._scan_transport)
+        try:
+            await asyncio.wait_for(
+                device.async_update_device_info(), self.probe_timeout
+            )
+        except (LookInError, asyncio.TimeoutError) as err:
+            # Anything that doesn't answer with a device's info isn't a device:
+            LOGGER.debug("No device found at %s: %s", address, err)
+            await device.async_close()
+            return None
+        except asyncio.CancelledError:
+            raise
+        except Exception:  # pylint: disable=broad-except
+            LOGGER.exception("Error while probing %s", address)
+            await device.async_close()
+            return None
+
+        if self.transport is None and self._scan_transport is not None:
+            # The scan's transport goes away with the scan, so hand out a device
+            # that owns its own:
+            found = Device(address)
+            found.load_device_info(device.raw_device_info)
+            await device.async_close()
+            device = found
+
+        LOGGER.debug("Found device %s at %s", device.device_id, address)
+        await self._found.put(device)
+        return device
+
+    async def async_scan(self) -> AsyncIterator[Device]:
+        """Run the scan, yielding devices as they are found."""
+        self._scanning = True
+        if self.transport is None:
+            self._scan_transport = Transport(limit=self.max_concurrency)
+        listener = None
+        if self.listen:
+            listener = UDPListener(port=self.listen_port)
+            listener.subscribe(self._handle_announcement)
+            await listener.async_start()
+
+        supervisor = asyncio.ensure_future(self._async_supervise())
+        try:
+            while True:
+                device = await self._found.get()
+                if device is None:
+                    return
+                yield device
+        finally:
+            if listener is not None:
+                await listener.async_stop()
+            pending = [*self._tasks, supervisor]
+            for task in pending:
+                task.cancel()
+            await asyncio.gather(*pending, return_exceptions=True)
+            # Close any device that was found but never handed out:
+            while not self._found.empty():
+                device = self._found.get_nowait()
+                if device is not None:
+                    await device.async_close()
+            if self._scan_transport is not None:
+                await self._scan_transport.async_close()
+                self._scan_transport = None
+
+
+def async_discover(
+    networks: Iterable[str] = (),
+    *,
+    transport: Optional[Transport] = None,
+    port: int = DEFAULT_PORT,
+    max_concurrency: int = DEFAULT_MAX_CONCURRENCY,
+    probe_timeout: float = DEFAULT_PROBE_TIMEOUT,
+    listen: bool = False,
+    listen_port: int = UDP_PORT,
+    listen_duration: float = 0.0,
+) -> AsyncIterator[Device]:
+    """Scan networks for devices, yielding them as they are found.
+
+    For example, to find every device on a /24:
+
+        async for device in async_discover(["192.168.1.0/24"], transport=transport):
+            ...
+    """
+    scanner = DeviceScanner(
+        networks,
+        transport=transport,
+        port=port,
+        max_concurrency=max_concurrency,
+        probe_timeout=probe_timeout,
+        listen=listen,
+        listen_port=listen_port,
+        listen_duration=listen_duration,
+    )
+    return scanner.async_scan()
@@ -0,0 +1,393 @@
+"""Define an emulator that serves virtual LOOK.in devices (for load testing)."""
+import asyncio
+import random
+import socket
+import time
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from aiohttp import web
+
+from .const import LOGGER
+from .udp import SENSOR_ID_MAP
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_JITTER = 0.01
+DEFAULT_LATENCY = 0.02
+DEFAULT_UPDATE_INTERVAL = 5.0
+
+COMMAND_ACTIONS = (
+    "ac",
+    "aiwa",
+    "localremote",
+    "nec1",
+    "necx",
+    "panasonic",
+    "prontohex",
+    "prontohex-blocked",
+    "raw",
+    "repeat",
+    "samsung36",
+    "saved",
+    "sony",
+)
+
+# The bounds that emulated Meteo readings wander between:
+HUMIDITY_RANGE = (30.0, 70.0)
+TEMPERATURE_RANGE = (15.0, 30.0)
+
+SENSOR_IDS = {sensor: sensor_id for sensor_id, sensor in SENSOR_ID_MAP.items()}
+
+
+def _wander(
+    value: float, step: float, bounds: Tuple[float, float], rand: random.Random
+) -> float:
+    """Move a value by up to a step in either direction (staying within bounds)."""
+    return round(min(max(value + rand.uniform(-step, step), bounds[0]), bounds[1]), 1)
+
+
+def _bind_socket(host: str, port: int) -> socket.socket:
+    """Return a listening-ready TCP socket bound to the first address of a host."""
+    family, kind, proto, _, sockaddr = socket.getaddrinfo(
+        host, port, type=socket.SOCK_STREAM, flags=socket.AI_PASSIVE
+    )[0]
+    sock = socket.socket(family, kind, proto)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    try:
+        sock.bind(sockaddr)
+    except OSError:
+        sock.close()
+        raise
+    return sock
+
+
+class VirtualDevice:
+    """Define the state of a single emulated device."""
+
+    __slots__ = (
+        "commands_received",
+        "device_id",
+        "firmware",
+        "host",
+        "humidity",
+        "ir_value",
+        "lock",
+        "name",
+        "port",
+        "temperature",
+        "updated",
+        "voltage",
+    )
+
+    def __init__(
+        self, device_id: str, name: str, host: str, rand: random.Random
+    ) -> None:
+        """Initialize."""
+        self.commands_received = 0
+        self.device_id = device_id
+        self.firmware = "2.36"
+        self.host = host
+        self.humidity = round(rand.uniform(*HUMIDITY_RANGE), 1)
+        self.ir_value: Dict[str, str] = {
+            "IsRepeated": "0",
+            "Protocol": "00",
+            "Raw": "",
+            "RepeatPause": "0",
+            "RepeatSignal": "",
+            "Signal": "",
+            "Updated": "0",
+        }
+        # Created once the emulator starts (a lock binds to the loop that is current):
+        self.lock: Optional[asyncio.Lock] = None
+        self.name = name
+        self.port = 0
+        self.temperature = round(rand.uniform(*TEMPERATURE_RANGE), 1)
+        self.updated = int(time.time())
+        self.voltage = 5800 + rand.randrange(200)
+
+    def __repr__(self) -> str:
+        """Return a string representation of the device."""
+        return f"<VirtualDevice id={self.device_id} address={self.address}>"
+
+    @property
+    def address(self) -> str:
+        """Return the address that a Device should be created with."""
+        return self.host if self.port == 80 else f"{self.host}:{self.port}"
+
+    @property
+    def device_info(self) -> Dict[str, str]:
+        """Return the device info (as the firmware reports it)."""
+        return {
+            "Type": "Remote",
+            "MRDC": f"{self.device_id}{self.device_id}",
+            "Status": "Running",
+            "ID": self.device_id,
+            "Name": self.name,
+            "Time": str(int(time.time())),
+            "Timezone": "0",
+            "PowerMode": "5v",
+            "CurrentVoltage": str(self.voltage),
+            "Firmware": self.firmware,
+            "Temperature": str(40 + int(self.temperature)),
+            "HomeKit": "1",
+            "EcoMode": "off",
+            "SensorMode": "0",
+        }
+
+    @property
+    def meteo_signal(self) -> str:
+        """Return the Meteo reading in the layout used by UDP notifications."""
+        return (
+            f"{round(self.temperature * 10) & 0xFFFF:04X}"
+            f"{round(self.humidity * 10) & 0xFFFF:04X}"
+        )
+
+    @property
+    def meteo_value(self) -> Dict[str, str]:
+        """Return the Meteo sensor value."""
+        return {
+            "Humidity": str(self.humidity),
+            "Pressure": "0",
+            "Temperature": str(self.temperature),
+            "Updated": str(self.updated),
+        }
+
+    def receive_command(self, action: str, operand: str) -> bool:
+        """Record a command (returning whether it echoed an IR signal to the IR sensor)."""
+        self.commands_received += 1
+        if action not in ("nec1", "necx", "samsung36", "sony"):
+            return False
+        self.ir_value = {
+            **self.ir_value,
+            "Signal": operand,
+            "Updated": str(int(time.time())),
+        }
+        return True
+
+    def step(self, rand: random.Random) -> bool:
+        """Advance the Meteo reading by a random walk (returning whether it moved)."""
+        signal = self.meteo_signal
+        self.temperature = _wander(self.temperature, 0.2, TEMPERATURE_RANGE, rand)
+        self.humidity = _wander(self.humidity, 0.5, HUMIDITY_RANGE, rand)
+        if self.meteo_signal == signal:
+            return False
+        self.updated = int(time.time())
+        return True
+
+
+class DeviceEmulator:
+    """Define an emulator that serves any number of virtual devices.
+
+    Every device gets its own listening socket; devices are spread over
+    ``hosts`` (e.g., loopback aliases like 127.0.0.2, which Linux routes without
+    any configuration), and each one binds ``port`` (0 picks a free port). Like
+    the real firmware, a device handles one request at a time, after ``latency``
+    (plus up to ``jitter``) seconds.
+
+    Every ``update_interval`` seconds, Meteo readings drift; if ``notify_port`` is
+    set, devices announce themselves and their sensor changes (Meteo drift and IR
+    signals echoed by commands) over UDP, the way real devices broadcast them.
+    """
+
+    def __init__(
+        self,
+        *,
+        devices: int = 1,
+        hosts: Sequence[str] = (DEFAULT_HOST,),
+        port: int = 0,
+        latency: float = DEFAULT_LATENCY,
+        jitter: float = DEFAULT_JITTER,
+        failure_rate: float = 0.0,
+        update_interval: Optional[float] = DEFAULT_UPDATE_INTERVAL,
+        notify_host: str = DEFAULT_HOST,
+        notify_port: Optional[int] = None,
+        seed: Optional[int] = None,
+    ) -> None:
+        """Initialize."""
+        if port and devices > len(hosts):
+            raise ValueError("A fixed port requires a separate host for every device")
+
+        self._random = random.Random(seed)
+        self._runner: Optional[web.AppRunner] = None
+        self._udp_transport: Optional[asyncio.DatagramTransport] = None
+        self._update_task: Optional["asyncio.Task[None]"] = None
+        self._devices_by_socket: Dict[Tuple[str, int], VirtualDevice] = {}
+        self.devices = [
+            VirtualDevice(
+                f"{index + 1:08X}",
+                f"Virtual Device {index + 1}",
+                hosts[index % len(hosts)],
+                self._random,
+            )
+            for index in range(devices)
+        ]
+        self.failure_rate = failure_rate
+        self.jitter = jitter
+        self.latency = latency
+        self.notify_host = notify_host
+        self.notify_port = notify_port
+        self.port = port
+        self.requests = 0
+        self.update_interval = update_interval
+
+    async def __aenter__(self) -> "DeviceEmulator":
+        """Start the emulator upon entering its context."""
+        await self.async_start()
+        return self
+
+    async def __aexit__(self, *_: Any) -> None:
+        """Stop the emulator upon exiting its context."""
+        await self.async_stop()
+
+    @property
+    def addresses(self) -> List[str]:
+        """Return the address of every virtual device."""
+        return [device.address for device in self.devices]
+
+    def _get_device(self, request: web.Request) -> VirtualDevice:
+        """Return the virtual device that a request was made to."""
+        assert request.transport
+        sockname = request.transport.get_extra_info("sockname")
+        return self._devices_by_socket[(sockname[0], sockname[1])]
+
+    async def _async_respond(
+        self, device: VirtualDevice, payload: Any, status: int = 200
+    ) -> web.Response:
+        """Respond like the firmware would (one request at a time, with latency)."""
+        self.requests += 1
+        assert device.lock
+        async with device.lock:
+            delay = self.latency + self._random.uniform(0, self.jitter)
+            if delay:
+                await asyncio.sleep(delay)
+            if self.failure_rate and self._random.random() < self.failure_rate:
+                return web.Response(status=500, text="Internal Server Error")
+            return web.json_response(payload, status=status)
+
+    async def _async_get_command_actions(self, request: web.Request) -> web.Response:
+        """Return the actions for a command."""
+        device = self._get_device(request)
+        if request.match_info["command"] != "IR":
+            return await self._async_respond(device, {"success": "false"}, 404)
+        return await self._async_respond(device, list(COMMAND_ACTIONS))
+
+    async def _async_get_commands(self, request: web.Request) -> web.Response:
+        """Return the command list."""
+        return await self._async_respond(self._get_device(request), ["IR"])
+
+    async def _async_get_device(self, request: web.Request) -> web.Response:
+        """Return the device info."""
+        device = self._get_device(request)
+        return await self._async_respond(device, device.device_info)
+
+    async def _async_get_sensor(self, request: web.Request) -> web.Response:
+        """Return a sensor value."""
+        device = self._get_device(request)
+        sensor = request.match_info["sensor"]
+        if sensor == "IR":
+            return await self._async_respond(device, device.ir_value)
+        if sensor == "Meteo":
+            return await self._async_respond(device, device.meteo_value)
+        return await self._async_respond(device, {"success": "false"}, 404)
+
+    async def _async_get_sensors(self, request: web.Request) -> web.Response:
+        """Return the sensor list."""
+        return await self._async_respond(self._get_device(request), list(SENSOR_IDS))
+
+    async def _async_post_command(self, request: web.Request) -> web.Response:
+        """Accept a command."""
+        device = self._get_device(request)
+        try:
+            payload = await request.json()
+            command, action = payload["command"], payload["action"]
+        except (KeyError, TypeError, ValueError):
+            return await self._async_respond(device, {"success": "false"}, 400)
+
+        if command != "IR" or action not in COMMAND_ACTIONS:
+            return await self._async_respond(device, {"success": "false"}, 400)
+
+        if device.receive_command(action, payload.get("operand") or ""):
+            self._notify(
+                f"LOOK.in:Updated!{device.device_id}:{SENSOR_IDS['IR']}:"
+                f"{device.ir_value['Protocol']}:{device.ir_value['Signal']}"
+            )
+        return await self._async_respond(device, {"success": "true"})
+
+    async def _async_update(self, interval: float) -> None:
+        """Evolve sensor values (and notify about them) forever."""
+        while True:
+            await asyncio.sleep(interval)
+            self.step()
+
+    def _notify(self, message: str) -> None:
+        """Send a UDP notification."""
+        if self._udp_transport is not None:
+            self._udp_transport.sendto(message.encode("ascii"))
+
+    def step(self) -> List[VirtualDevice]:
+        """Evolve every sensor value once (returning the devices that changed)."""
+        changed = [device for device in self.devices if device.step(self._random)]
+        for device in changed:
+            self._notify(
+                f"LOOK.in:Updated!{device.device_id}:{SENSOR_IDS['Meteo']}:00:"
+                f"{device.meteo_signal}"
+            )
+        return changed
+
+    async def async_start(self) -> None:
+        """Start serving every virtual device."""
+        if self._runner is not None:
+            return
+
+        app = web.Application()
+        app.router.add_get("/commands", self._async_get_commands)
+        app.router.add_get("/commands/{command}", self._async_get_command_actions)
+        app.router.add_get("/device", self._async_get_device)
+        app.router.add_get("/sensors", self._async_get_sensors)
+        app.router.add_get("/sensors/{sensor}", self._async_get_sensor)
+        app.router.add_post("/commands", self._async_post_command)
+
+        self._runner = web.AppRunner(app, access_log=None)
+        await self._runner.setup()
+        for device in self.devices:
+            # Bind every device's socket up front, so that each device knows its
+            # own (even if a host resolves to several addresses):
+            sock = _bind_socket(device.host, self.port)
+            await web.SockSite(self._runner, sock).start()
+            sockname = sock.getsockname()
+            device.lock = asyncio.Lock()
+            device.port = sockname[1]
+            self._devices_by_socket[(sockname[0], sockname[1])] = device
+
+        if self.notify_port is not None:
+            loop = asyncio.get_event_loop()
+            transport, _ = await loop.create_datagram_endpoint(
+                asyncio.DatagramProtocol,
+                remote_addr=(self.notify_host, self.notify_port),
+            )
+            self._udp_transport = transport
+            for device in self.devices:
+                self._notify(f"LOOK.in:Alive!{device.device_id}:1:2.36")
+
+        if self.update_interval:
+            self._update_task = asyncio.ensure_future(
+                self._async_update(self.update_interval)
+            )
+
+        LOGGER.debug("Emulating %s devices", len(self.devices))
+
+    async def async_stop(self) -> None:
+        """Stop serving every virtual device."""
+        if self._update_task is not None:
+            self._update_task.cancel()
+            await asyncio.gather(self._update_task, return_exceptions=True)
+            self._update_task = None
+
+        if self._udp_transport is not None:
+            self._udp_transport.close()
+            self._udp_transport = None
+
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+
+        self._devices_by_socket.clear()
@@ -13,6 +13,12 @@ class CommandError(LookInError):
     pass
 
 
+class DeviceInfoError(LookInError):
+    """Define an error related to missing or malformed device info."""
+
+    pass
+
+
 class RequestError(LookInError):
     """Define an error related a bad HTTP request."""
 
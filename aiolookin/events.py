@@ -0,0 +1,182 @@
+"""Define field-level change events for device info."""
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    Callable,
+    Dict,
+    FrozenSet,
+    Iterable,
+    List,
+    NamedTuple,
+    Optional,
+    Tuple,
+    TypeVar,
+    Union,
+)
+
+from .const import LOGGER
+from .models import RAW_DEVICE_INFO_FIELDS, DeviceInfo
+
+if TYPE_CHECKING:
+    from .device import Device
+    from .sharding import ShardedDevice
+
+
+_SubscriptionT = TypeVar("_SubscriptionT")
+
+
+def add_subscription(
+    subscriptions: List[_SubscriptionT], subscription: _SubscriptionT
+) -> Callable[[], None]:
+    """Add a subscription to a list (returning a function that removes it again)."""
+    subscriptions.append(subscription)
+
+    def unsubscribe() -> None:
+        """Unsubscribe."""
+        if subscription in subscriptions:
+            subscriptions.remove(subscription)
+
+    return unsubscribe
+
+
+def get_info_field(name: str) -> str:
+    """Return the DeviceInfo field for a name (which may be a raw device info key)."""
+    field = RAW_DEVICE_INFO_FIELDS.get(name, name)
+    if field not in DeviceInfo._fields:
+        raise ValueError(
+            f"Unknown device info field: {name} (expected one of "
+            f"{', '.join(DeviceInfo._fields)})"
+        )
+    return field
+
+
+class FieldChange(NamedTuple):
+    """Define a change to a single field of a device's info."""
+
+    field: str
+    old: Any
+    new: Any
+
+
+InfoChangeCallback = Callable[
+    [Union["Device", "ShardedDevice"], Tuple[FieldChange, ...]], None
+]
+
+
+class InfoSubscription:
+    """Define a subscriber's interest in a device's info.
+
+    Numeric fields with a threshold only count as changed once they move at least
+    that far from the value last reported to this subscriber (so slow drift still
+    gets reported eventually).
+    """
+
+    __slots__ = ("callback", "fields", "reported", "thresholds")
+
+    def __init__(
+        self,
+        callback: InfoChangeCallback,
+        *,
+        fields: Optional[Iterable[str]] = None,
+        thresholds: Optional[Dict[str, float]] = None,
+    ) -> None:
+        """Initialize."""
+        self.callback = callback
+        self.fields: Optional[FrozenSet[str]] = (
+            frozenset(get_info_field(field) for field in fields)
+            if fields is not None
+            else None
+        )
+        self.reported: Dict[str, Any] = {}
+        self.thresholds = {
+            get_info_field(field): threshold
+            for field, threshold in (thresholds or {}).items()
+        }
+
+        for field in self.thresholds:
+            if DeviceInfo.__annotations__[field] not in (int, float):
+                raise ValueError(
+                    f"Cannot set a threshold on a non-numeric field: {field}"
+                )
+
+    def get_changes(
+        self,
+        old: Optional[DeviceInfo],
+        new: DeviceInfo,
+        changed_fields: Iterable[str],
+    ) -> Tuple[FieldChange, ...]:
+        """Return the changes this subscriber should hear about."""
+        changes: List[FieldChange] = []
+        for field in changed_fields:
+            if self.fields is not None and field not in self.fields:
+                continue
+
+            value = getattr(new, field)
+            threshold = self.thresholds.get(field)
+            if threshold is None:
+                changes.append(
+                    FieldChange(field, getattr(old, field) if old else None, value)
+                )
+                continue
+
+            if field not in self.reported and old is not None:
+                self.reported[field] = getattr(old, field)
+            reported = self.reported.get(field)
+            if reported is not None and abs(value - reported) < threshold:
+                continue
+            self.reported[field] = value
+            changes.append(FieldChange(field, reported, value))
+
+        return tuple(changes)
+
+
+class DeviceInfoEvents:
+    """Define the subscribers to changes in a single device's info."""
+
+    def __init__(self) -> None:
+        """Initialize."""
+        self._subscriptions: List[InfoSubscription] = []
+
+    def __len__(self) -> int:
+        """Return the number of subscriptions."""
+        return len(self._subscriptions)
+
+    def dispatch(
+        self,
+        device: Union["Device", "ShardedDevice"],
+        old: Optional[DeviceInfo],
+        new: DeviceInfo,
+        changed_fields: Iterable[str],
+    ) -> None:
+        """Notify every subscriber that has changes to hear about."""
+        changed_fields = tuple(changed_fields)
+        for subscription in list(self._subscriptions):
+            changes = subscription.get_changes(old, new, changed_fields)
+            if not changes:
+                continue
+            try:
+                subscription.callback(device, changes)
+            except Exception:  # pylint: disable=broad-except
+                LOGGER.exception("Error in device info callback for %s", device)
+
+    def subscribe(
+        self,
+        callback: InfoChangeCallback,
+        *,
+        fields: Optional[Iterable[str]] = None,
+        thresholds: Optional[Dict[str, float]] = None,
+    ) -> Callable[[], None]:
+        """Subscribe to changed fields (optionally only some, with deadbands).
+
+        Fields are named as on DeviceInfo (or by their raw device info keys, like
+        ``CurrentVoltage``). For example, to hear about firmware updates and voltage
+        swings of at least 100 mV:
+
+            device.info_events.subscribe(
+                callback,
+                fields=("firmware", "voltage"),
+                thresholds={"voltage": 100},
+            )
+        """
+        subscription = InfoSubscription(callback, fields=fields, thresholds=thresholds)
+        return add_subscription(self._subscriptions, subscription)
@@ -0,0 +1,217 @@
+"""Define a Prometheus-style exporter for device and sensor state."""
+from typing import Dict, List, Optional, Set, Tuple
+
+from aiohttp import web
+
+from .device import Device
+from .models import DeviceInfo, MeteoSensorValue, SensorValue
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+DEFAULT_HOST = "0.0.0.0"
+DEFAULT_PORT = 9580
+
+METRIC_DEVICE_INFO = "lookin_device_info"
+METRIC_DEVICE_TEMPERATURE = "lookin_device_internal_temperature_celsius"
+METRIC_DEVICE_VOLTAGE = "lookin_device_voltage_millivolts"
+METRIC_METEO_HUMIDITY = "lookin_meteo_humidity_percent"
+METRIC_METEO_PRESSURE = "lookin_meteo_pressure"
+METRIC_METEO_TEMPERATURE = "lookin_meteo_temperature_celsius"
+METRIC_SENSOR_UPDATED = "lookin_sensor_updated_timestamp_seconds"
+
+# Metric families, in the order they are rendered:
+METRIC_FAMILIES: Tuple[Tuple[str, str], ...] = (
+    (METRIC_DEVICE_INFO, "Static information about the device."),
+    (METRIC_DEVICE_VOLTAGE, "The device's current voltage."),
+    (METRIC_DEVICE_TEMPERATURE, "The device's internal temperature."),
+    (METRIC_METEO_TEMPERATURE, "The temperature reported by the Meteo sensor."),
+    (METRIC_METEO_HUMIDITY, "The humidity reported by the Meteo sensor."),
+    (METRIC_METEO_PRESSURE, "The pressure reported by the Meteo sensor."),
+    (METRIC_SENSOR_UPDATED, "When a sensor value was last updated."),
+)
+
+
+def _escape(value: str) -> str:
+    """Escape a label value."""
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(labels: Dict[str, str]) -> str:
+    """Format a set of labels."""
+    return ",".join(f'{key}="{_escape(value)}"' for key, value in labels.items())
+
+
+class _DeviceState:
+    """Define the latest state known for a device."""
+
+    __slots__ = ("info", "lines", "sensors")
+
+    def __init__(self) -> None:
+        """Initialize."""
+        self.info: Optional[DeviceInfo] = None
+        self.lines: Dict[str, str] = {}
+        self.sensors: Dict[str, SensorValue] = {}
+
+    def render(self, device_id: str) -> None:
+        """Re-render the sample lines for every metric family."""
+        lines: Dict[str, List[str]] = {}
+        labels = {"device_id": device_id}
+
+        if self.info is not None:
+            labels["name"] = self.info.name
+            info_labels = {
+                **labels,
+                "firmware": self.info.firmware,
+                "mode": self.info.device_mode,
+                "status": self.info.status,
+                "type": self.info.type,
+            }
+            lines[METRIC_DEVICE_INFO] = [f"{{{_format_labels(info_labels)}}} 1"]
+            lines[METRIC_DEVICE_VOLTAGE] = [
+                f"{{{_format_labels(labels)}}} {self.info.voltage}"
+            ]
+            lines[METRIC_DEVICE_TEMPERATURE] = [
+                f"{{{_format_labels(labels)}}} {self.info.internal_temp_c}"
+            ]
+
+        for sensor, value in sorted(self.sensors.items()):
+            if isinstance(value, MeteoSensorValue):
+                for metric, reading in (
+                    (METRIC_METEO_TEMPERATURE, value.temperature),
+                    (METRIC_METEO_HUMIDITY, value.humidity),
+                    (METRIC_METEO_PRESSURE, value.pressure),
+                ):
+                    if reading is not None:
+                        lines.setdefault(metric, []).append(
+                            f"{{{_format_labels(labels)}}} {reading}"
+                        )
+            if value.timestamp is not None:
+                sensor_labels = _format_labels({**labels, "sensor": sensor})
+                lines.setdefault(METRIC_SENSOR_UPDATED, []).append(
+                    f"{{{sensor_labels}}} {value.timestamp}"
+                )
+
+        self.lines = {
+            metric: "".join(f"{metric}{sample}\n" for sample in samples)
+            for metric, samples in lines.items()
+        }
+
+
+class MetricsExporter:
+    """Define an exporter that serves the latest state of devices to Prometheus.
+
+    State is pushed in (from refreshes the caller already makes), so scrapes never
+    trigger device requests. Only devices whose state changed since the previous
+    scrape are re-rendered (every other device's sample lines are reused as is); if
+    nothing changed, the previous output is reused.
+    """
+
+    def __init__(self, *, host: str = DEFAULT_HOST, port: int = DEFAULT_PORT) -> None:
+        """Initialize."""
+        self._dirty: Set[str] = set()
+        self._host = host
+        self._output: Optional[str] = None
+        self._port = port
+        self._runner: Optional[web.AppRunner] = None
+        self._site: Optional[web.TCPSite] = None
+        self._sorted_states: Optional[List[_DeviceState]] = None
+        self._states: Dict[str, _DeviceState] = {}
+        self.renders = 0
+
+    @property
+    def port(self) -> int:
+        """Return the port the HTTP endpoint is bound to."""
+        if self._runner is None or not self._runner.addresses:
+            return self._port
+        return int(self._runner.addresses[0][1])
+
+    def _get_state(self, device_id: str) -> _DeviceState:
+        """Return the state for a device (creating it if needed)."""
+        state = self._states.get(device_id)
+        if state is None:
+            state = self._states[device_id] = _DeviceState()
+            self._sorted_states = None
+        return state
+
+    async def _async_handle_metrics(self, _: web.Request) -> web.Response:
+        """Serve the metrics."""
+        return web.Response(
+            body=self.render().encode(), headers={"Content-Type": CONTENT_TYPE}
+        )
+
+    def remove_device(self, device_id: str) -> None:
+        """Stop exporting a device."""
+        if self._states.pop(device_id, None) is not None:
+            self._dirty.discard(device_id)
+            self._output = None
+            self._sorted_states = None
+
+    def render(self) -> str:
+        """Render the metrics in the Prometheus text exposition format."""
+        if self._output is not None and not self._dirty:
+            return self._output
+
+        for device_id in self._dirty:
+            state = self._states.get(device_id)
+            if state is not None:
+                state.render(device_id)
+                self.renders += 1
+        self._dirty.clear()
+
+        # Devices are only sorted again once devices were added or removed:
+        if self._sorted_states is None:
+            self._sorted_states = [state for _, state in sorted(self._states.items())]
+
+        chunks = []
+        for metric, description in METRIC_FAMILIES:
+            samples = "".join(
+                state.lines.get(metric, "") for state in self._sorted_states
+            )
+            if samples:
+                chunks.append(f"# HELP {metric} {description}\n")
+                chunks.append(f"# TYPE {metric} gauge\n")
+                chunks.append(samples)
+
+        self._output = "".join(chunks)
+        return self._output
+
+    def update_device(self, device: Device) -> bool:
+        """Store a device's latest info (returning whether it changed)."""
+        return self.update_device_info(device.info)
+
+    def update_device_info(self, info: DeviceInfo) -> bool:
+        """Store a device info snapshot (returning whether it changed)."""
+        state = self._get_state(info.device_id)
+        if state.info == info:
+            return False
+        state.info = info
+        self._dirty.add(info.device_id)
+        return True
+
+    def update_sensor(self, device_id: str, value: SensorValue) -> bool:
+        """Store a sensor's latest value (returning whether it changed)."""
+        state = self._get_state(device_id)
+        if state.sensors.get(value.sensor) == value:
+            return False
+        state.sensors[value.sensor] = value
+        self._dirty.add(device_id)
+        return True
+
+    async def async_start(self) -> None:
+        """Start serving the metrics at /metrics."""
+        if self._runner is not None:
+            return
+
+        app = web.Application()
+        app.router.add_get("/metrics", self._async_handle_metrics)
+        self._runner = web.AppRunner(app, access_log=None)
+        await self._runner.setup()
+        self._site = web.TCPSite(self._runner, self._host, self._port)
+        await self._site.start()
+
+    async def async_stop(self) -> None:
+        """Stop serving the metrics."""
+        if self._runner is not None:
+            await self._runner.cleanup()
+        self._runner = None
+        self._site = None
@@ -0,0 +1,254 @@
+"""Define an object to manage many devices concurrently."""
+import asyncio
+from types import TracebackType
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    AsyncIterator,
+    Awaitable,
+    Callable,
+    Dict,
+    Iterable,
+    Iterator,
+    Optional,
+    Set,
+    Tuple,
+    Type,
+    Union,
+)
+
+from .cache import DEFAULT_CACHE_TTL
+from .const import LOGGER
+from .device import Device
+from .transport import Transport
+
+if TYPE_CHECKING:
+    from .sharding import ShardedDevice
+
+DEFAULT_MAX_CONCURRENCY = 32
+
+
+class FleetResult:
+    """Define the outcome of a fleet operation against a single device."""
+
+    __slots__ = ("data", "device", "error")
+
+    def __init__(
+        self,
+        device: Union[Device, "ShardedDevice"],
+        *,
+        data: Any = None,
+        error: Optional[Exception] = None,
+    ) -> None:
+        """Initialize."""
+        self.data = data
+        self.device = device
+        self.error = error
+
+    def __repr__(self) -> str:
+        """Return a string representation of the result."""
+        return f"<FleetResult ip_address={self.ip_address} ok={self.ok}>"
+
+    @property
+    def ip_address(self) -> str:
+        """Return the IP address of the device."""
+        return self.device.ip_address
+
+    @property
+    def ok(self) -> bool:
+        """Return whether the operation succeeded."""
+        return self.error is None
+
+
+async def async_run_bounded(
+    devices: Iterable[Device],
+    async_func: Callable[[Device], Awaitable[Any]],
+    *,
+    max_concurrency: int = DEFAULT_MAX_CONCURRENCY,
+) -> AsyncIterator[FleetResult]:
+    """Run a coroutine function against devices, yielding results as they finish.
+
+    At most ``max_concurrency`` calls run at once; any exception a call raises is
+    captured on its FleetResult (with its return value as data otherwise).
+    """
+    semaphore = asyncio.Semaphore(max_concurrency)
+
+    async def async_run_one(device: Device) -> FleetResult:
+        """Run the coroutine function against a single device."""
+        async with semaphore:
+            try:
+                data = await async_func(device)
+            except asyncio.CancelledError:
+                raise
+            except Exception as err:  # pylint: disable=broad-except
+                LOGGER.debug(
+                    "Fleet operation failed for %s: %s", device.ip_address, err
+                )
+                return FleetResult(device, error=err)
+        return FleetResult(device, data=data)
+
+    tasks = [asyncio.ensure_future(async_run_one(device)) for device in devices]
+
+    try:
+        for next_done in asyncio.as_completed(tasks):
+            yield await next_done
+    finally:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+
+class DeviceFleet:
+    """Define a collection of devices that share a transport.
+
+    Every bulk operation runs with bounded concurrency, isolates errors per device
+    (any exception is captured on the corresponding FleetResult rather than
+    raised), and yields results as they complete.
+    """
+
+    def __init__(
+        self,
+        ip_addresses: Iterable[str] = (),
+        *,
+        transport: Optional[Transport] = None,
+        max_concurrency: int = DEFAULT_MAX_CONCURRENCY,
+        cache_ttl: Optional[float] = DEFAULT_CACHE_TTL,
+        validate: bool = True,
+    ) -> None:
+        """Initialize."""
+        self._cache_ttl = cache_ttl
+        self._devices: Dict[str, Device] = {}
+        self._initialized: Set[str] = set()
+        self._max_concurrency = max_concurrency
+        self._owns_transport = transport is None
+        self._transport = transport or Transport(limit=max_concurrency)
+        self._validate = validate
+
+        for ip_address in ip_addresses:
+            self.add(ip_address)
+
+    def __contains__(self, ip_address: str) -> bool:
+        """Return whether the fleet contains a device."""
+        return ip_address in self._devices
+
+    def __iter__(self) -> Iterator[Device]:
+        """Iterate over the devices in the fleet."""
+        return iter(list(self._devices.values()))
+
+    def __len__(self) -> int:
+        """Return the number of devices in the fleet."""
+        return len(self._devices)
+
+    async def __aenter__(self) -> "DeviceFleet":
+        """Enter the fleet's context."""
+        return self
+
+    async def __aexit__(
+        self,
+        exc_type: Optional[Type[BaseException]],
+        exc_val: Optional[BaseException],
+        exc_tb: Optional[TracebackType],
+    ) -> None:
+        """Exit the fleet's context."""
+        await self.async_close()
+
+    @property
+    def initialized_devices(self) -> Dict[str, Device]:
+        """Return the devices that have successfully loaded their info."""
+        return {
+            ip_address: device
+            for ip_address, device in self._devices.items()
+            if ip_address in self._initialized
+        }
+
+    @property
+    def transport(self) -> Transport:
+        """Return the transport shared by the fleet's devices."""
+        return self._transport
+
+    def add(self, ip_address: str) -> Device:
+        """Add a device to the fleet (returning the existing one if present)."""
+        if ip_address not in self._devices:
+            self._devices[ip_address] = Device(
+                ip_address,
+                transport=self._transport,
+                cache_ttl=self._cache_ttl,
+                validate=self._validate,
+            )
+        return self._devices[ip_address]
+
+    def get(self, ip_address: str) -> Optional[Device]:
+        """Return the device at an IP address (if it is part of the fleet)."""
+        return self._devices.get(ip_address)
+
+    def _async_run(
+        self,
+        devices: Iterable[Device],
+        async_func: Callable[[Device], Awaitable[Any]],
+    ) -> AsyncIterator[FleetResult]:
+        """Run a coroutine function against devices, yielding results as they finish."""
+        return async_run_bounded(
+            devices, async_func, max_concurrency=self._max_concurrency
+        )
+
+    async def _async_update_device(self, device: Device) -> Tuple[str, ...]:
+        """Update a single device and mark it as initialized (returning changes)."""
+        changed_fields = await device.async_update_device_info()
+        self._initialized.add(device.ip_address)
+        return changed_fields
+
+    async def async_close(self) -> None:
+        """Close every device, then the fleet's transport (unless it is shared)."""
+        await asyncio.gather(
+            *(device.async_close() for device in self._devices.values()),
+            return_exceptions=True,
+        )
+        if self._owns_transport:
+            await self._transport.async_close()
+
+    def async_initialize(self) -> AsyncIterator[FleetResult]:
+        """Load the info of every device that hasn't been initialized yet."""
+        return self._async_run(
+            [
+                device
+                for ip_address, device in self._devices.items()
+                if ip_address not in self._initialized
+            ],
+            self._async_update_device,
+        )
+
+    def async_query(
+        self,
+        async_func: Callable[[Device], Awaitable[Any]],
+        *,
+        initialized_only: bool = True,
+    ) -> AsyncIterator[FleetResult]:
+        """Run a coroutine function against devices (storing its return as data).
+
+        For example, to get the Meteo values of every initialized device:
+
+            async for result in fleet.async_query(
+                lambda device: device.sensor.async_get_sensor_value("Meteo")
+            ):
+                ...
+        """
+        devices = (
+            self.initialized_devices.values()
+            if initialized_only
+            else self._devices.values()
+        )
+        return self._async_run(list(devices), async_func)
+
+    async def async_remove(self, ip_address: str) -> None:
+        """Remove a device from the fleet (closing it)."""
+        device = self._devices.pop(ip_address, None)
+        self._initialized.discard(ip_address)
+        if device is not None:
+            await device.async_close()
+
+    def async_update_device_info(self) -> AsyncIterator[FleetResult]:
+        """Refresh the info of every device in the fleet.
+
+        The data of every successful result holds the names of the changed fields.
+        """
+        return self._async_run(list(self._devices.values()), self._async_update_device)
@@ -0,0 +1,341 @@
+"""Define a compact, fixed-capacity store for the history of sensor readings."""
+from array import array
+import math
+import time
+from typing import (
+    Any,
+    Dict,
+    Iterator,
+    List,
+    NamedTuple,
+    Optional,
+    Sequence,
+    Tuple,
+)
+
+from .errors import SensorError
+from .models import SensorValue, parse_sensor_value
+
+try:
+    import numpy as np
+
+    HAS_NUMPY = True
+except ImportError:  # pragma: no cover
+    HAS_NUMPY = False
+
+# A week of readings at one per minute:
+DEFAULT_CAPACITY = 10080
+
+# The (numeric) model attributes that are recorded for each sensor:
+HISTORY_FIELDS_MAP: Dict[str, Tuple[str, ...]] = {
+    "Meteo": ("temperature", "humidity", "pressure"),
+}
+
+# Timestamps are stored as doubles; values are stored as single-precision floats
+# (more than enough for what the sensors report), with NaN marking gaps:
+TIMESTAMP_TYPECODE = "d"
+VALUE_TYPECODE = "f"
+
+
+class Aggregate(NamedTuple):
+    """Define the aggregate of a field over a window of readings."""
+
+    samples: int
+    min: float
+    max: float
+    mean: float
+
+
+class SensorHistory:
+    """Define a ring buffer of readings for a single device/sensor.
+
+    Every field gets its own typed array, preallocated to ``capacity``; once full,
+    the oldest readings are overwritten. Readings must arrive in timestamp order
+    (repeated or older timestamps are ignored), which lets windows be found with a
+    binary search.
+    """
+
+    __slots__ = ("_fields", "_size", "_start", "_timestamps", "_values", "capacity")
+
+    def __init__(
+        self, fields: Sequence[str], *, capacity: int = DEFAULT_CAPACITY
+    ) -> None:
+        """Initialize."""
+        if capacity < 1:
+            raise ValueError("The capacity must be at least 1")
+
+        self._fields = tuple(fields)
+        self._size = 0
+        self._start = 0
+        self._timestamps: "array[float]" = array(
+            TIMESTAMP_TYPECODE, bytes(8 * capacity)
+        )
+        self._values: Dict[str, "array[float]"] = {
+            field: array(VALUE_TYPECODE, bytes(4 * capacity)) for field in self._fields
+        }
+        self.capacity = capacity
+
+    def __len__(self) -> int:
+        """Return the number of stored readings."""
+        return self._size
+
+    def __repr__(self) -> str:
+        """Return a string representation of the history."""
+        return f"<SensorHistory fields={self._fields} size={self._size}>"
+
+    @property
+    def fields(self) -> Tuple[str, ...]:
+        """Return the recorded fields."""
+        return self._fields
+
+    @property
+    def latest_timestamp(self) -> Optional[float]:
+        """Return the timestamp of the newest reading."""
+        if not self._size:
+            return None
+        return self._timestamps[(self._start + self._size - 1) % self.capacity]
+
+    @property
+    def nbytes(self) -> int:
+        """Return the size of the underlying buffers (in bytes)."""
+        return sum(
+            buffer.itemsize * len(buffer)
+            for buffer in (self._timestamps, *self._values.values())
+        )
+
+    def _find(self, timestamp: float) -> int:
+        """Return the (logical) index of the first reading at or after a timestamp."""
+        low, high = 0, self._size
+        while low < high:
+            middle = (low + high) // 2
+            if self._timestamps[(self._start + middle) % self.capacity] < timestamp:
+                low = middle + 1
+            else:
+                high = middle
+        return low
+
+    def _segments(
+        self, buffer: "array[float]", since: Optional[float]
+    ) -> List[memoryview]:
+        """Return views onto the (at most two) contiguous runs of a window."""
+        first = self._find(since) if since is not None else 0
+        view = memoryview(buffer)
+        begin = (self._start + first) % self.capacity
+        end = begin + self._size - first
+        if end <= self.capacity:
+            return [view[begin:end]] if end > begin else []
+        return [view[begin:], view[: end - self.capacity]]
+
+    def append(self, timestamp: float, values: Sequence[Optional[float]]) -> bool:
+        """Record a reading (returning False if it isn't newer than the last one)."""
+        latest = self.latest_timestamp
+        if latest is not None and timestamp <= latest:
+            return False
+
+        if self._size < self.capacity:
+            index = (self._start + self._size) % self.capacity
+            self._size += 1
+        else:
+            index = self._start
+            self._start = (self._start + 1) % self.capacity
+
+        self._timestamps[index] = timestamp
+        for field, value in zip(self._fields, values):
+            self._values[field][index] = math.nan if value is None else value
+        return True
+
+    def append_value(self, value: SensorValue) -> bool:
+        """Record a parsed sensor value."""
+        if value.timestamp is None:
+            return False
+        return self.append(
+            value.timestamp, [getattr(value, field) for field in self._fields]
+        )
+
+    def views(
+        self, field: Optional[str] = None, *, since: Optional[float] = None
+    ) -> List[memoryview]:
+        """Return zero-copy views of a field's readings (or, by default, timestamps).
+
+        Because the buffer wraps around, a window spans one or two views (oldest
+        first).
+        """
+        buffer = self._timestamps if field is None else self._values[field]
+        return self._segments(buffer, since)
+
+    def as_numpy(
+        self, field: Optional[str] = None, *, since: Optional[float] = None
+    ) -> Any:
+        """Return a NumPy array of a field's readings (or, by default, timestamps).
+
+        If the window doesn't wrap around the end of the buffer, the array is a view
+        that shares its memory; otherwise, the two runs are concatenated.
+        """
+        if not HAS_NUMPY:
+            raise ImportError("NumPy is required to create a NumPy array")
+
+        segments = [
+            np.frombuffer(view, dtype=view.format)
+            for view in self.views(field, since=since)
+        ]
+        if not segments:
+            return np.empty(
+                0, dtype=TIMESTAMP_TYPECODE if field is None else VALUE_TYPECODE
+            )
+        if len(segments) == 1:
+            return segments[0]
+        return np.concatenate(segments)
+
+    def iter_readings(
+        self, *, since: Optional[float] = None
+    ) -> Iterator[Tuple[float, Dict[str, float]]]:
+        """Iterate over (timestamp, values) pairs, oldest first."""
+        first = self._find(since) if since is not None else 0
+        for offset in range(first, self._size):
+            index = (self._start + offset) % self.capacity
+            yield self._timestamps[index], {
+                field: values[index] for field, values in self._values.items()
+            }
+
+    def aggregate(
+        self,
+        field: str,
+        *,
+        seconds: Optional[float] = None,
+        now: Optional[float] = None,
+    ) -> Optional[Aggregate]:
+        """Return the min/max/mean of a field over the last ``seconds`` (or ever).
+
+        Gaps (readings without the field) are skipped; None is returned if the
+        window has no readings.
+        """
+        since = None
+        if seconds is not None:
+            since = (time.time() if now is None else now) - seconds
+
+        if HAS_NUMPY:
+            values = self.as_numpy(field, since=since)
+            values = values[~np.isnan(values)]
+            if not values.size:
+                return None
+            return Aggregate(
+                int(values.size),
+                float(values.min()),
+                float(values.max()),
+                float(values.mean(dtype=np.float64)),
+            )
+
+        present = [
+            value
+            for view in self.views(field, since=since)
+            for value in view
+            if not math.isnan(value)
+        ]
+        if not present:
+            return None
+        return Aggregate(
+            len(present), min(present), max(present), math.fsum(present) / len(present)
+        )
+
+    def downsample(
+        self, field: str, interval: float, *, since: Optional[float] = None
+    ) -> List[Tuple[float, float]]:
+        """Return the mean of a field per ``interval`` seconds (as start/mean pairs).
+
+        Buckets are aligned to multiples of the interval; empty buckets are omitted.
+        """
+        if interval <= 0:
+            raise ValueError("The interval must be positive")
+
+        if HAS_NUMPY:
+            timestamps = self.as_numpy(since=since)
+            values = self.as_numpy(field, since=since).astype(np.float64)
+            present = ~np.isnan(values)
+            timestamps, values = timestamps[present], values[present]
+            if not values.size:
+                return []
+            buckets = np.floor(timestamps / interval)
+            starts = np.flatnonzero(np.diff(buckets, prepend=buckets[0] - 1))
+            sums = np.add.reduceat(values, starts)
+            counts = np.diff(np.append(starts, values.size))
+            return [
+                (float(bucket * interval), float(mean))
+                for bucket, mean in zip(buckets[starts], sums / counts)
+            ]
+
+        downsampled: List[Tuple[float, float]] = []
+        current = 0.0
+        total = 0.0
+        count = 0
+        for timestamp, values_by_field in self.iter_readings(since=since):
+            value = values_by_field[field]
+            if math.isnan(value):
+                continue
+            bucket = float(math.floor(timestamp / interval) * interval)
+            if count and bucket != current:
+                downsampled.append((current, total / count))
+                total, count = 0.0, 0
+            current = bucket
+            total += value
+            count += 1
+        if count:
+            downsampled.append((current, total / count))
+        return downsampled
+
+
+class HistoryStore:
+    """Define a store of sensor histories for many devices.
+
+    Histories are created on demand, with a fixed capacity each, so the store's
+    memory use only depends on how many device/sensor pairs it tracks.
+    """
+
+    def __init__(
+        self,
+        *,
+        capacity: int = DEFAULT_CAPACITY,
+        fields_map: Optional[Dict[str, Tuple[str, ...]]] = None,
+    ) -> None:
+        """Initialize."""
+        self._capacity = capacity
+        self._fields_map = fields_map or HISTORY_FIELDS_MAP
+        self._histories: Dict[Tuple[str, str], SensorHistory] = {}
+
+    def __contains__(self, key: Tuple[str, str]) -> bool:
+        """Return whether a device/sensor pair has a history."""
+        return key in self._histories
+
+    def __len__(self) -> int:
+        """Return the number of device/sensor pairs with a history."""
+        return len(self._histories)
+
+    @property
+    def nbytes(self) -> int:
+        """Return the size of every history's buffers (in bytes)."""
+        return sum(history.nbytes for history in self._histories.values())
+
+    def add(self, device_id: str, sensor: str, data: Dict[str, Any]) -> bool:
+        """Record a raw sensor value (as returned by SensorAPI)."""
+        return self.add_value(device_id, parse_sensor_value(sensor, data))
+
+    def add_value(self, device_id: str, value: SensorValue) -> bool:
+        """Record a parsed sensor value."""
+        key = (device_id, value.sensor)
+        history = self._histories.get(key)
+        if history is None:
+            fields = self._fields_map.get(value.sensor)
+            if fields is None:
+                raise SensorError(f"No history fields for sensor: {value.sensor}")
+            history = self._histories[key] = SensorHistory(
+                fields, capacity=self._capacity
+            )
+        return history.append_value(value)
+
+    def get(self, device_id: str, sensor: str) -> Optional[SensorHistory]:
+        """Return the history of a device's sensor."""
+        return self._histories.get((device_id, sensor))
+
+    def remove(self, device_id: str) -> None:
+        """Drop every history of a device."""
+        for key in [key for key in self._histories if key[0] == device_id]:
+            del self._histories[key]
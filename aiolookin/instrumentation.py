@@ -0,0 +1,292 @@
+"""Define request instrumentation (latency histograms, error counts and hooks)."""
+from bisect import bisect_left
+from collections import defaultdict
+import time
+from types import SimpleNamespace
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+from aiohttp import (
+    ClientSession,
+    TraceConfig,
+    TraceConnectionCreateEndParams,
+    TraceConnectionCreateStartParams,
+    TraceDnsResolveHostEndParams,
+    TraceDnsResolveHostStartParams,
+    TraceRequestEndParams,
+)
+
+from .const import LOGGER
+from .events import add_subscription
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+PHASE_BODY = "body"
+PHASE_CONNECT = "connect"
+PHASE_DNS = "dns"
+PHASE_FIRST_BYTE = "first_byte"
+PHASE_TOTAL = "total"
+
+MetricKey = Tuple[str, str, str]
+
+
+class Histogram:
+    """Define a cumulative histogram of durations (in seconds)."""
+
+    __slots__ = ("buckets", "count", "counts", "total")
+
+    def __init__(self, buckets: Sequence[float] = DEFAULT_BUCKETS) -> None:
+        """Initialize."""
+        self.buckets = tuple(buckets)
+        # The final count is the +Inf bucket:
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.count = 0
+        self.total = 0.0
+
+    def __repr__(self) -> str:
+        """Return a string representation of the histogram."""
+        return f"<Histogram count={self.count} mean={self.mean:.4f}>"
+
+    @property
+    def mean(self) -> float:
+        """Return the mean of the observed durations."""
+        return self.total / self.count if self.count else 0.0
+
+    def observe(self, value: float) -> None:
+        """Record a duration."""
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.total += value
+
+    def quantile(self, quantile: float) -> float:
+        """Estimate a quantile as the upper bound of the bucket that contains it."""
+        if not self.count:
+            return 0.0
+        target = quantile * self.count
+        cumulative = 0
+        for bound, count in zip(self.buckets, self.counts):
+            cumulative += count
+            if cumulative >= target:
+                return bound
+        return float("inf")
+
+
+class RequestTrace:
+    """Define the timestamps collected over the course of a single request."""
+
+    __slots__ = (
+        "connect_end",
+        "connect_start",
+        "device",
+        "dns_end",
+        "dns_start",
+        "endpoint",
+        "headers_received",
+        "method",
+        "start",
+    )
+
+    def __init__(self, device: str, endpoint: str, method: str) -> None:
+        """Initialize."""
+        self.connect_end: Optional[float] = None
+        self.connect_start: Optional[float] = None
+        self.device = device
+        self.dns_end: Optional[float] = None
+        self.dns_start: Optional[float] = None
+        self.endpoint = endpoint
+        self.headers_received: Optional[float] = None
+        self.method = method.upper()
+        self.start = time.perf_counter()
+
+    def get_phases(self, end: float) -> Dict[str, float]:
+        """Return the duration of every phase the request went through."""
+        phases = {PHASE_TOTAL: end - self.start}
+
+        dns = 0.0
+        if self.dns_start is not None and self.dns_end is not None:
+            dns = phases[PHASE_DNS] = self.dns_end - self.dns_start
+        if self.connect_start is not None and self.connect_end is not None:
+            # Connection creation includes resolving the host:
+            phases[PHASE_CONNECT] = self.connect_end - self.connect_start - dns
+        if self.headers_received is not None:
+            phases[PHASE_FIRST_BYTE] = self.headers_received - (
+                self.connect_end or self.start
+            )
+            phases[PHASE_BODY] = end - self.headers_received
+
+        return phases
+
+
+class RequestSample:
+    """Define the outcome of an instrumented request (as passed to listeners)."""
+
+    __slots__ = ("device", "endpoint", "error", "method", "phases", "status")
+
+    def __init__(
+        self,
+        trace: RequestTrace,
+        phases: Dict[str, float],
+        *,
+        status: Optional[int] = None,
+        error: Optional[str] = None,
+    ) -> None:
+        """Initialize."""
+        self.device = trace.device
+        self.endpoint = trace.endpoint
+        self.error = error
+        self.method = trace.method
+        self.phases = phases
+        self.status = status
+
+    def __repr__(self) -> str:
+        """Return a string representation of the sample."""
+        return (
+            f"<RequestSample {self.method} {self.device}/{self.endpoint} "
+            f"status={self.status} error={self.error}>"
+        )
+
+
+def _get_trace(trace_config_ctx: SimpleNamespace) -> Optional[RequestTrace]:
+    """Return the trace attached to a request (if it was made by a device)."""
+    trace = trace_config_ctx.trace_request_ctx
+    return trace if isinstance(trace, RequestTrace) else None
+
+
+async def _on_connection_create_start(
+    _: ClientSession, ctx: SimpleNamespace, __: TraceConnectionCreateStartParams
+) -> None:
+    """Record the start of a new connection."""
+    trace = _get_trace(ctx)
+    if trace:
+        trace.connect_start = time.perf_counter()
+
+
+async def _on_connection_create_end(
+    _: ClientSession, ctx: SimpleNamespace, __: TraceConnectionCreateEndParams
+) -> None:
+    """Record the end of a new connection."""
+    trace = _get_trace(ctx)
+    if trace:
+        trace.connect_end = time.perf_counter()
+
+
+async def _on_dns_resolvehost_start(
+    _: ClientSession, ctx: SimpleNamespace, __: TraceDnsResolveHostStartParams
+) -> None:
+    """Record the start of a DNS resolution."""
+    trace = _get_trace(ctx)
+    if trace:
+        trace.dns_start = time.perf_counter()
+
+
+async def _on_dns_resolvehost_end(
+    _: ClientSession, ctx: SimpleNamespace, __: TraceDnsResolveHostEndParams
+) -> None:
+    """Record the end of a DNS resolution."""
+    trace = _get_trace(ctx)
+    if trace:
+        trace.dns_end = time.perf_counter()
+
+
+async def _on_request_end(
+    _: ClientSession, ctx: SimpleNamespace, __: TraceRequestEndParams
+) -> None:
+    """Record the arrival of the response headers."""
+    trace = _get_trace(ctx)
+    if trace:
+        trace.headers_received = time.perf_counter()
+
+
+class Instrumentation:
+    """Define latency histograms and error counts for device requests.
+
+    Metrics are keyed by (device, endpoint, method). The per-phase breakdown
+    (DNS, connect, first byte and body) relies on the trace config, which the
+    Transport attaches to the sessions it creates; requests made over an external
+    session only record their total duration.
+    """
+
+    def __init__(self, *, buckets: Sequence[float] = DEFAULT_BUCKETS) -> None:
+        """Initialize."""
+        self._buckets = tuple(buckets)
+        self._listeners: List[Callable[[RequestSample], None]] = []
+        self.errors: Dict[Tuple[str, str, str, str], int] = defaultdict(int)
+        self.histograms: Dict[MetricKey, Dict[str, Histogram]] = {}
+        self.trace_config = TraceConfig()
+
+        self.trace_config.on_connection_create_end.append(_on_connection_create_end)
+        self.trace_config.on_connection_create_start.append(_on_connection_create_start)
+        self.trace_config.on_dns_resolvehost_end.append(_on_dns_resolvehost_end)
+        self.trace_config.on_dns_resolvehost_start.append(_on_dns_resolvehost_start)
+        self.trace_config.on_request_end.append(_on_request_end)
+
+    def add_listener(
+        self, callback: Callable[[RequestSample], None]
+    ) -> Callable[[], None]:
+        """Add a callback that receives every request sample."""
+        return add_subscription(self._listeners, callback)
+
+    def finish_request(
+        self,
+        trace: RequestTrace,
+        *,
+        status: Optional[int] = None,
+        error: Optional[BaseException] = None,
+    ) -> RequestSample:
+        """Record the outcome of a request."""
+        phases = trace.get_phases(time.perf_counter())
+        key = (trace.device, trace.endpoint, trace.method)
+
+        histograms = self.histograms.get(key)
+        if histograms is None:
+            histograms = self.histograms[key] = {}
+        for phase, duration in phases.items():
+            histogram = histograms.get(phase)
+            if histogram is None:
+                histogram = histograms[phase] = Histogram(self._buckets)
+            histogram.observe(duration)
+
+        error_type = None
+        if error is not None:
+            error_type = type(error).__name__
+            self.errors[key + (error_type,)] += 1
+
+        sample = RequestSample(trace, phases, status=status, error=error_type)
+        for listener in list(self._listeners):
+            try:
+                listener(sample)
+            except Exception:  # pylint: disable=broad-except
+                LOGGER.exception("Error in instrumentation listener")
+        return sample
+
+    def get_histogram(
+        self, device: str, endpoint: str, method: str, phase: str = PHASE_TOTAL
+    ) -> Optional[Histogram]:
+        """Return the histogram for a device/endpoint/method and phase."""
+        return self.histograms.get((device, endpoint, method.upper()), {}).get(phase)
+
+    def reset(self) -> None:
+        """Clear every histogram and error count."""
+        self.errors.clear()
+        self.histograms.clear()
+
+    @staticmethod
+    def start_request(device: str, endpoint: str, method: str) -> RequestTrace:
+        """Start tracing a request."""
+        return RequestTrace(device, endpoint, method)
+
+    def summary(self) -> List[Dict[str, Any]]:
+        """Return a plain summary of every metric (e.g., for logging or export)."""
+        return [
+            {
+                "device": device,
+                "endpoint": endpoint,
+                "method": method,
+                "phase": phase,
+                "count": histogram.count,
+                "mean": histogram.mean,
+                "p50": histogram.quantile(0.5),
+                "p99": histogram.quantile(0.99),
+            }
+            for (device, endpoint, method), histograms in self.histograms.items()
+            for phase, histogram in histograms.items()
+        ]
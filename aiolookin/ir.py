@@ -0,0 +1,92 @@
+"""Define a compact representation of captured IR signals."""
+from array import array
+import re
+from typing import Any, Dict, Iterable, Iterator, Union
+
+try:
+    import numpy as np
+
+    HAS_NUMPY = True
+except ImportError:  # pragma: no cover
+    HAS_NUMPY = False
+
+# Raw timings are signed microsecond durations: positive values are pulses (the
+# IR LED is on) and negative values are spaces (it is off):
+RAW_TIMING_PATTERN = re.compile(r"-?\d+")
+
+
+class IRCapture:
+    """Define a captured IR signal, stored as a compact array of timings."""
+
+    __slots__ = ("_timings",)
+
+    def __init__(self, timings: Union["array[int]", Iterable[int]]) -> None:
+        """Initialize."""
+        if isinstance(timings, array) and timings.typecode == "i":
+            self._timings = timings
+        else:
+            self._timings = array("i", timings)
+
+    def __eq__(self, other: object) -> bool:
+        """Return whether two captures have identical timings."""
+        if not isinstance(other, IRCapture):
+            return NotImplemented
+        return self._timings == other._timings
+
+    def __hash__(self) -> int:
+        """Return a hash of the timings."""
+        return hash(self._timings.tobytes())
+
+    def __iter__(self) -> Iterator[int]:
+        """Iterate over the signed timings."""
+        return iter(self._timings)
+
+    def __len__(self) -> int:
+        """Return the number of timings."""
+        return len(self._timings)
+
+    def __repr__(self) -> str:
+        """Return a string representation of the capture."""
+        return f"<IRCapture timings={len(self._timings)} duration={self.duration}>"
+
+    @classmethod
+    def from_raw(cls, raw: str) -> "IRCapture":
+        """Parse a device's raw timing string in a single pass."""
+        return cls(
+            array("i", (int(m.group()) for m in RAW_TIMING_PATTERN.finditer(raw)))
+        )
+
+    @classmethod
+    def from_sensor_value(cls, data: Dict[str, Any]) -> "IRCapture":
+        """Create a capture from the IR sensor's value."""
+        return cls.from_raw(data.get("Raw", ""))
+
+    @property
+    def duration(self) -> int:
+        """Return the total duration of the signal in microseconds."""
+        return sum(abs(timing) for timing in self._timings)
+
+    @property
+    def pulses(self) -> "array[int]":
+        """Return the durations of the pulses (in microseconds)."""
+        return array("i", (timing for timing in self._timings if timing > 0))
+
+    @property
+    def spaces(self) -> "array[int]":
+        """Return the durations of the spaces (in microseconds, as positive values)."""
+        return array("i", (-timing for timing in self._timings if timing < 0))
+
+    @property
+    def timings(self) -> "array[int]":
+        """Return the underlying array of signed timings (without copying)."""
+        return self._timings
+
+    def as_numpy(self) -> Any:
+        """Return a NumPy view onto the timings (sharing the same memory)."""
+        if not HAS_NUMPY:
+            raise ImportError("NumPy is required to create a NumPy view")
+        return np.frombuffer(self._timings, dtype=np.intc)
+
+    def to_raw(self) -> str:
+        """Serialize the capture back into the device's raw timing format."""
+        return " ".join(map(str, self._timings))
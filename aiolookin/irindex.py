@@ -0,0 +1,261 @@
+"""Define an index for matching captured IR signals against a library of codes."""
+from array import array
+import json
+import statistics
+from typing import Any, Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+from .errors import LookInError
+from .ir import HAS_NUMPY, IRCapture
+from .storage import write_json_atomic
+
+if HAS_NUMPY:
+    import numpy as np
+
+DEFAULT_ABSOLUTE_TOLERANCE = 150
+DEFAULT_TOLERANCE = 0.25
+
+# Spaces longer than this (in microseconds) end a frame; trailing ones are dropped,
+# since how long a device waited after the last frame says nothing about the code:
+GAP_THRESHOLD = 15000
+
+# Fingerprints express every duration as a multiple of the signal's median
+# duration, with everything beyond this multiple lumped together:
+MAX_SYMBOL = 4
+
+INDEX_VERSION = 1
+
+TIMING_TYPECODE = "f"
+
+
+class IRMatch(NamedTuple):
+    """Define a library code that a capture matched."""
+
+    key: str
+    error: float
+
+
+def normalize_timings(capture: IRCapture) -> "array[float]":
+    """Return the unsigned durations of a capture, without leading/trailing gaps."""
+    timings = capture.timings
+    start = 0
+    end = len(timings)
+    while start < end and timings[start] < 0:
+        start += 1
+    while end > start and timings[end - 1] < 0 and -timings[end - 1] >= GAP_THRESHOLD:
+        end -= 1
+    return array(TIMING_TYPECODE, (abs(timing) for timing in timings[start:end]))
+
+
+def fingerprint(timings: "array[float]") -> Tuple[int, bytes]:
+    """Return a fingerprint of normalized timings that tolerates jitter.
+
+    Captures of the same code share a fingerprint as long as no duration lands
+    close to the midpoint between two multiples of the median duration.
+    """
+    if not timings:
+        return (0, b"")
+    base = statistics.median(timings)
+    return (
+        len(timings),
+        bytes(min(int(timing / base + 0.5), MAX_SYMBOL) for timing in timings),
+    )
+
+
+class _CodeGroup:
+    """Define the codes that share a number of timings, packed into one array."""
+
+    __slots__ = ("_matrix", "keys", "length", "timings")
+
+    def __init__(self, length: int) -> None:
+        """Initialize."""
+        self._matrix: Any = None
+        self.keys: List[str] = []
+        self.length = length
+        self.timings: "array[float]" = array(TIMING_TYPECODE)
+
+    @property
+    def matrix(self) -> Any:
+        """Return a NumPy copy of the timings (one row per code)."""
+        if self._matrix is None:
+            # A copy rather than a view, since a view would keep the array's buffer
+            # exported (which prevents it from growing on PyPy):
+            self._matrix = np.array(self.timings, dtype=np.float32).reshape(
+                -1, self.length
+            )
+        return self._matrix
+
+    def add(self, key: str, timings: "array[float]") -> int:
+        """Add a code's timings (returning its row)."""
+        self.keys.append(key)
+        self.timings.extend(timings)
+        self._matrix = None
+        return len(self.keys) - 1
+
+    def get_row(self, row: int) -> "array[float]":
+        """Return the timings of a single code."""
+        return self.timings[row * self.length : (row + 1) * self.length]
+
+
+class IRCodeIndex:
+    """Define an index of known IR codes that captures can be matched against.
+
+    Captures are normalized (unsigned durations, without trailing gaps) and match a
+    code with the same number of timings when every duration is within
+    ``tolerance`` (relative) or ``absolute_tolerance`` (in microseconds) of the
+    code's. A fingerprint lookup finds the likely candidates right away; the best
+    of them is then only replaced by a code of the same length that is strictly
+    closer, which is checked with a vectorized comparison when NumPy is installed
+    (and otherwise cut short as soon as a code can no longer beat it).
+    """
+
+    def __init__(
+        self,
+        *,
+        tolerance: float = DEFAULT_TOLERANCE,
+        absolute_tolerance: float = DEFAULT_ABSOLUTE_TOLERANCE,
+    ) -> None:
+        """Initialize."""
+        self._fingerprints: Dict[Tuple[int, bytes], List[int]] = {}
+        self._groups: Dict[int, _CodeGroup] = {}
+        self._keys: Dict[str, int] = {}
+        self.absolute_tolerance = absolute_tolerance
+        self.tolerance = tolerance
+
+    def __contains__(self, key: str) -> bool:
+        """Return whether the index contains a code."""
+        return key in self._keys
+
+    def __len__(self) -> int:
+        """Return the number of captures in the index."""
+        return sum(len(group.keys) for group in self._groups.values())
+
+    @property
+    def keys(self) -> List[str]:
+        """Return the key of every code in the index."""
+        return list(self._keys)
+
+    def _get_error(
+        self,
+        timings: "array[float]",
+        candidate: "array[float]",
+        bound: Optional[float] = None,
+    ) -> Optional[float]:
+        """Return the mean relative error of a candidate (None if it doesn't match).
+
+        With a bound, candidates whose error would exceed it don't match either.
+        """
+        limit = bound * len(timings) if bound is not None else None
+        error = 0.0
+        for timing, expected in zip(timings, candidate):
+            diff = abs(timing - expected)
+            if diff > max(expected * self.tolerance, self.absolute_tolerance):
+                return None
+            error += diff / max(expected, 1)
+            if limit is not None and error > limit:
+                return None
+        return error / len(timings)
+
+    def _scan(
+        self,
+        group: _CodeGroup,
+        timings: "array[float]",
+        best_match: Optional[IRMatch] = None,
+    ) -> Optional[IRMatch]:
+        """Return the best match in a group (unless none beats the given one)."""
+        if HAS_NUMPY:
+            matrix = group.matrix
+            capture = np.array(timings, dtype=np.float32)
+            diffs = np.abs(matrix - capture)
+            allowed = np.maximum(matrix * self.tolerance, self.absolute_tolerance)
+            matches = np.flatnonzero((diffs <= allowed).all(axis=1))
+            if not matches.size:
+                return best_match
+            errors = (diffs[matches] / np.maximum(matrix[matches], 1)).mean(axis=1)
+            best = int(errors.argmin())
+            if best_match is not None and float(errors[best]) >= best_match.error:
+                return best_match
+            return IRMatch(group.keys[int(matches[best])], float(errors[best]))
+
+        for row, key in enumerate(group.keys):
+            error = self._get_error(
+                timings,
+                group.get_row(row),
+                best_match.error if best_match is not None else None,
+            )
+            if error is not None and (best_match is None or error < best_match.error):
+                best_match = IRMatch(key, error)
+        return best_match
+
+    def add(self, key: str, capture: IRCapture) -> None:
+        """Add a capture of a code (a code can have any number of captures)."""
+        timings = normalize_timings(capture)
+        if not timings:
+            raise ValueError(f"Cannot index an empty capture for {key}")
+
+        group = self._groups.get(len(timings))
+        if group is None:
+            group = self._groups[len(timings)] = _CodeGroup(len(timings))
+        row = group.add(key, timings)
+
+        self._fingerprints.setdefault(fingerprint(timings), []).append(row)
+        self._keys[key] = self._keys.get(key, 0) + 1
+
+    def add_many(self, codes: Iterable[Tuple[str, IRCapture]]) -> None:
+        """Add many captures at once."""
+        for key, capture in codes:
+            self.add(key, capture)
+
+    def match(self, capture: IRCapture) -> Optional[IRMatch]:
+        """Return the code that best matches a capture (if any matches)."""
+        timings = normalize_timings(capture)
+        group = self._groups.get(len(timings))
+        if group is None:
+            return None
+
+        # The best candidate with the same fingerprint bounds the full scan:
+        best_match = None
+        for row in self._fingerprints.get(fingerprint(timings), ()):
+            error = self._get_error(timings, group.get_row(row))
+            if error is not None and (best_match is None or error < best_match.error):
+                best_match = IRMatch(group.keys[row], error)
+
+        return self._scan(group, timings, best_match)
+
+    def match_sensor_value(self, data: Dict[str, Any]) -> Optional[IRMatch]:
+        """Return the code that best matches the IR sensor's value (if any)."""
+        return self.match(IRCapture.from_sensor_value(data))
+
+    @classmethod
+    def load(cls, path: str) -> "IRCodeIndex":
+        """Load an index that was saved to disk."""
+        try:
+            with open(path, encoding="utf-8") as fptr:
+                data = json.load(fptr)
+        except ValueError as err:
+            raise LookInError(f"Invalid IR code index file {path}: {err}") from err
+
+        if data.get("version") != INDEX_VERSION:
+            raise LookInError(f"Unsupported IR code index version in {path}")
+
+        index = cls(
+            tolerance=data["tolerance"],
+            absolute_tolerance=data["absolute_tolerance"],
+        )
+        index.add_many((key, IRCapture.from_raw(raw)) for key, raw in data["codes"])
+        return index
+
+    def save(self, path: str) -> None:
+        """Write the index to disk (atomically replacing any existing file)."""
+        codes = [
+            [key, " ".join(str(int(timing)) for timing in group.get_row(row))]
+            for group in self._groups.values()
+            for row, key in enumerate(group.keys)
+        ]
+        data = {
+            "absolute_tolerance": self.absolute_tolerance,
+            "codes": codes,
+            "tolerance": self.tolerance,
+            "version": INDEX_VERSION,
+        }
+
+        write_json_atomic(path, data)
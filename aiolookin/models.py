@@ -0,0 +1,193 @@
+"""Define typed models for the values that sensors report."""
+from datetime import datetime, timezone
+from typing import Any, Dict, NamedTuple, Optional, Tuple, Type
+
+from .const import DEVICE_MODE_MAP, DEVICE_MODE_UNKNOWN, LOGGER
+from .errors import DeviceInfoError
+from .ir import IRCapture
+
+
+def _to_float(value: Any) -> Optional[float]:
+    """Convert a raw value to a float (returning None if it can't be)."""
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _to_int(value: Any, base: int = 10) -> Optional[int]:
+    """Convert a raw value to an int (returning None if it can't be)."""
+    try:
+        return int(value, base) if isinstance(value, str) else int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+# The DeviceInfo field that each raw device info key is converted into:
+RAW_DEVICE_INFO_FIELDS = {
+    "CurrentVoltage": "voltage",
+    "EcoMode": "eco_mode_enabled",
+    "Firmware": "firmware",
+    "HomeKit": "homekit_enabled",
+    "ID": "device_id",
+    "MRDC": "mrdc",
+    "Name": "name",
+    "PowerMode": "power_mode",
+    "SensorMode": "device_mode",
+    "Status": "status",
+    "Temperature": "internal_temp_c",
+    "Type": "type",
+}
+
+
+class DeviceInfo(NamedTuple):
+    """Define an immutable, already-converted snapshot of a device's info.
+
+    The device's clock (``Time``) is deliberately left out, so that two snapshots
+    only differ when something meaningful changed.
+    """
+
+    device_id: str
+    device_mode: str
+    eco_mode_enabled: bool
+    firmware: str
+    homekit_enabled: bool
+    internal_temp_c: int
+    mrdc: str
+    name: str
+    power_mode: str
+    status: str
+    type: str
+    voltage: int
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, str]) -> "DeviceInfo":
+        """Create a snapshot from the device's raw info.
+
+        Raises a DeviceInfoError if a field is missing or can't be converted.
+        """
+        try:
+            raw_mode = data["SensorMode"]
+            device_mode = DEVICE_MODE_MAP.get(raw_mode)
+            if device_mode is None:
+                LOGGER.debug("Unknown device mode value: %s", raw_mode)
+                device_mode = DEVICE_MODE_UNKNOWN
+
+            return cls(
+                device_id=data["ID"],
+                device_mode=device_mode,
+                eco_mode_enabled=data["EcoMode"] == "on",
+                firmware=data["Firmware"],
+                homekit_enabled=data["HomeKit"] == "1",
+                internal_temp_c=int(data["Temperature"]),
+                mrdc=data["MRDC"],
+                name=data["Name"],
+                power_mode=data["PowerMode"],
+                status=data["Status"],
+                type=data["Type"],
+                voltage=int(data["CurrentVoltage"]),
+            )
+        except KeyError as err:
+            raise DeviceInfoError(f"Device info is missing a field: {err}") from err
+        except (TypeError, ValueError) as err:
+            raise DeviceInfoError(f"Invalid device info: {err}") from err
+
+    def diff(self, other: Optional["DeviceInfo"]) -> Tuple[str, ...]:
+        """Return the names of the fields that differ from another snapshot."""
+        if other is None:
+            return self._fields
+        return tuple(
+            field
+            for field, value, other_value in zip(self._fields, self, other)
+            if value != other_value
+        )
+
+
+class SensorValue:
+    """Define the base of every sensor value."""
+
+    __slots__ = ("sensor", "timestamp")
+
+    def __init__(self, sensor: str, data: Dict[str, Any]) -> None:
+        """Initialize."""
+        self.sensor = sensor
+        self.timestamp = _to_int(data.get("Updated"))
+
+    def __eq__(self, other: object) -> bool:
+        """Return whether two values are equal."""
+        if not isinstance(other, type(self)):
+            return NotImplemented
+        return all(
+            getattr(self, slot) == getattr(other, slot)
+            for cls in type(self).__mro__
+            for slot in getattr(cls, "__slots__", ())
+        )
+
+    def __repr__(self) -> str:
+        """Return a string representation of the value."""
+        return f"<{type(self).__name__} sensor={self.sensor} updated={self.updated}>"
+
+    @property
+    def updated(self) -> Optional[datetime]:
+        """Return when the value was last updated (as a UTC datetime)."""
+        if self.timestamp is None:
+            return None
+        return datetime.fromtimestamp(self.timestamp, tz=timezone.utc)
+
+
+class GenericSensorValue(SensorValue):
+    """Define a value from a sensor without a dedicated model."""
+
+    __slots__ = ("values",)
+
+    def __init__(self, sensor: str, data: Dict[str, Any]) -> None:
+        """Initialize."""
+        super().__init__(sensor, data)
+        self.values = {key: value for key, value in data.items() if key != "Updated"}
+
+
+class MeteoSensorValue(SensorValue):
+    """Define a value from the Meteo sensor."""
+
+    __slots__ = ("humidity", "pressure", "temperature")
+
+    def __init__(self, sensor: str, data: Dict[str, Any]) -> None:
+        """Initialize."""
+        super().__init__(sensor, data)
+        self.humidity = _to_float(data.get("Humidity"))
+        self.pressure = _to_float(data.get("Pressure"))
+        self.temperature = _to_float(data.get("Temperature"))
+
+
+class IRSensorValue(SensorValue):
+    """Define a value from the IR sensor."""
+
+    __slots__ = (
+        "capture",
+        "is_repeated",
+        "protocol",
+        "repeat_pause",
+        "repeat_signal",
+        "signal",
+    )
+
+    def __init__(self, sensor: str, data: Dict[str, Any]) -> None:
+        """Initialize."""
+        super().__init__(sensor, data)
+        self.capture = IRCapture.from_sensor_value(data)
+        self.is_repeated = data.get("IsRepeated") == "1"
+        self.protocol = _to_int(data.get("Protocol"), 16)
+        self.repeat_pause = _to_int(data.get("RepeatPause"))
+        self.repeat_signal = data.get("RepeatSignal") or None
+        self.signal = data.get("Signal") or None
+
+
+SENSOR_MODEL_MAP: Dict[str, Type[SensorValue]] = {
+    "IR": IRSensorValue,
+    "Meteo": MeteoSensorValue,
+}
+
+
+def parse_sensor_value(sensor: str, data: Dict[str, Any]) -> SensorValue:
+    """Parse a sensor's raw value into the appropriate model."""
+    return SENSOR_MODEL_MAP.get(sensor, GenericSensorValue)(sensor, data)
@@ -0,0 +1,266 @@
+"""Define a scheduler that polls sensors at rates adapted to how often they change."""
+import asyncio
+import heapq
+import random
+import time
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
+
+from .const import LOGGER
+from .device import Device
+from .errors import LookInError
+from .events import add_subscription
+from .models import SensorValue, parse_sensor_value
+from .scheduler import PRIORITY_BACKGROUND, request_priority
+
+DEFAULT_BACKOFF = 1.5
+DEFAULT_INITIAL_INTERVAL = 30.0
+DEFAULT_JITTER = 0.1
+DEFAULT_MAX_INTERVAL = 300.0
+DEFAULT_MAX_REQUESTS_PER_SECOND = 10.0
+DEFAULT_MIN_INTERVAL = 5.0
+DEFAULT_SPEEDUP = 0.5
+
+PollerCallback = Callable[[Device, SensorValue], None]
+
+
+class PollTarget:
+    """Define the polling state of a single device/sensor pair."""
+
+    __slots__ = (
+        "changes",
+        "device",
+        "interval",
+        "last_updated",
+        "next_poll",
+        "polls",
+        "removed",
+        "sensor",
+    )
+
+    def __init__(self, device: Device, sensor: str, interval: float) -> None:
+        """Initialize."""
+        self.changes = 0
+        self.device = device
+        self.interval = interval
+        self.last_updated: Optional[int] = None
+        self.next_poll = 0.0
+        self.polls = 0
+        self.removed = False
+        self.sensor = sensor
+
+    def __lt__(self, other: "PollTarget") -> bool:
+        """Order targets by when they are next due."""
+        return self.next_poll < other.next_poll
+
+    def __repr__(self) -> str:
+        """Return a string representation of the target."""
+        return (
+            f"<PollTarget {self.device.ip_address}/{self.sensor} "
+            f"interval={self.interval:.1f}>"
+        )
+
+
+class SensorPoller:
+    """Define a scheduler that polls sensors and delivers only changed readings.
+
+    Each device/sensor pair has its own interval: when a poll finds a new
+    ``Updated`` timestamp, the interval shrinks (towards half of the observed time
+    between updates); when it doesn't, the interval grows by ``backoff``. Both
+    stay within ``min_interval`` and ``max_interval``. Polls are spread randomly
+    across their interval and, across every pair, never exceed
+    ``max_requests_per_second``.
+    """
+
+    def __init__(
+        self,
+        *,
+        initial_interval: float = DEFAULT_INITIAL_INTERVAL,
+        min_interval: float = DEFAULT_MIN_INTERVAL,
+        max_interval: float = DEFAULT_MAX_INTERVAL,
+        backoff: float = DEFAULT_BACKOFF,
+        speedup: float = DEFAULT_SPEEDUP,
+        jitter: float = DEFAULT_JITTER,
+        max_requests_per_second: float = DEFAULT_MAX_REQUESTS_PER_SECOND,
+    ) -> None:
+        """Initialize."""
+        self._next_slot = 0.0
+        self._queue: List[PollTarget] = []
+        self._subscriptions: List[
+            Tuple[Optional[str], Optional[str], PollerCallback]
+        ] = []
+        self._targets: Dict[Tuple[str, str], PollTarget] = {}
+        self._task: Optional["asyncio.Task[None]"] = None
+        self._tasks: Set["asyncio.Task[None]"] = set()
+        self._wakeup: Optional[asyncio.Event] = None
+        self.backoff = backoff
+        self.initial_interval = initial_interval
+        self.jitter = jitter
+        self.max_interval = max_interval
+        self.max_requests_per_second = max_requests_per_second
+        self.min_interval = min_interval
+        self.requests = 0
+        self.speedup = speedup
+
+    async def __aenter__(self) -> "SensorPoller":
+        """Start the poller upon entering its context."""
+        await self.async_start()
+        return self
+
+    async def __aexit__(self, *_: Any) -> None:
+        """Stop the poller upon exiting its context."""
+        await self.async_stop()
+
+    @property
+    def targets(self) -> List[PollTarget]:
+        """Return every device/sensor pair being polled."""
+        return list(self._targets.values())
+
+    def _clamp(self, interval: float) -> float:
+        """Keep an interval within the configured bounds."""
+        return min(max(interval, self.min_interval), self.max_interval)
+
+    def _dispatch(self, device: Device, value: SensorValue) -> None:
+        """Deliver a changed reading to matching subscribers."""
+        for ip_address, sensor, callback in list(self._subscriptions):
+            if ip_address is not None and ip_address != device.ip_address:
+                continue
+            if sensor is not None and sensor != value.sensor:
+                continue
+            try:
+                callback(device, value)
+            except Exception:  # pylint: disable=broad-except
+                LOGGER.exception("Error in poller callback for %s", value)
+
+    def _schedule(self, target: PollTarget, delay: float) -> None:
+        """Schedule the next poll of a target."""
+        target.next_poll = time.monotonic() + delay
+        heapq.heappush(self._queue, target)
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+    def add(self, device: Device, sensor: str) -> Callable[[], None]:
+        """Start polling a device's sensor (returning a callable that stops it)."""
+        key = (device.ip_address, sensor)
+        target = self._targets.get(key)
+        if target is None:
+            target = self._targets[key] = PollTarget(
+                device, sensor, self._clamp(self.initial_interval)
+            )
+            # Spread the first polls across the interval to avoid a thundering herd:
+            self._schedule(target, random.uniform(0, target.interval))  # nosec
+
+        def remove() -> None:
+            """Stop polling the sensor."""
+            if self._targets.get(key) is target:
+                target.removed = True
+                del self._targets[key]
+
+        return remove
+
+    def get_interval(self, device: Device, sensor: str) -> Optional[float]:
+        """Return the current polling interval of a device's sensor."""
+        target = self._targets.get((device.ip_address, sensor))
+        return target.interval if target else None
+
+    def subscribe(
+        self,
+        callback: PollerCallback,
+        *,
+        ip_address: Optional[str] = None,
+        sensor: Optional[str] = None,
+    ) -> Callable[[], None]:
+        """Subscribe to changed readings (optionally for one device and/or sensor)."""
+        return add_subscription(self._subscriptions, (ip_address, sensor, callback))
+
+    async def async_poll(self, target: PollTarget) -> None:
+        """Poll a target once and adapt its interval to what was found."""
+        target.polls += 1
+        self.requests += 1
+        try:
+            with request_priority(PRIORITY_BACKGROUND):
+                data = await target.device.sensor.async_get_sensor_value(target.sensor)
+        except LookInError as err:
+            LOGGER.debug("Unable to poll %s: %s", target, err)
+            target.interval = self._clamp(target.interval * self.backoff)
+            return
+
+        value = parse_sensor_value(target.sensor, data)
+        if value.timestamp is None or value.timestamp == target.last_updated:
+            target.interval = self._clamp(target.interval * self.backoff)
+            return
+
+        previous = target.last_updated
+        target.last_updated = value.timestamp
+        if previous is not None:
+            target.changes += 1
+            interval = target.interval * self.speedup
+            if value.timestamp > previous:
+                # Poll about twice per observed change:
+                interval = max(interval, (value.timestamp - previous) / 2)
+            target.interval = self._clamp(min(interval, target.interval))
+
+        self._dispatch(target.device, value)
+
+    async def _async_poll_and_reschedule(self, target: PollTarget) -> None:
+        """Poll a target and schedule its next poll."""
+        try:
+            await self.async_poll(target)
+        finally:
+            if not target.removed:
+                self._schedule(
+                    target,
+                    target.interval
+                    * random.uniform(1 - self.jitter, 1 + self.jitter),  # nosec
+                )
+
+    async def _async_run(self) -> None:
+        """Run polls as they become due (within the request budget)."""
+        assert self._wakeup
+        while True:
+            while self._queue and self._queue[0].removed:
+                heapq.heappop(self._queue)
+
+            if not self._queue:
+                await self._wakeup.wait()
+                self._wakeup.clear()
+                continue
+
+            now = time.monotonic()
+            delay = max(self._queue[0].next_poll, self._next_slot) - now
+            if delay > 0:
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), delay)
+                except asyncio.TimeoutError:
+                    pass
+                self._wakeup.clear()
+                continue
+
+            target = heapq.heappop(self._queue)
+            if target.removed:
+                continue
+
+            self._next_slot = max(now, self._next_slot) + (
+                1 / self.max_requests_per_second
+            )
+            task = asyncio.ensure_future(self._async_poll_and_reschedule(target))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def async_start(self) -> None:
+        """Start polling."""
+        if self._task is not None:
+            return
+        self._wakeup = asyncio.Event()
+        self._task = asyncio.ensure_future(self._async_run())
+
+    async def async_stop(self) -> None:
+        """Stop polling (cancelling any in-flight polls)."""
+        tasks = list(self._tasks)
+        if self._task is not None:
+            tasks.append(self._task)
+        for task in tasks:
+            task.cancel()
+        if tasks:
+            await asyncio.gather(*tasks, return_exceptions=True)
+        self._task = None
+        self._wakeup = None
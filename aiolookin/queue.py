@@ -0,0 +1,140 @@
+"""Define a queue that serializes the commands sent to a device."""
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+from .const import LOGGER
+from .errors import CommandError
+
+DEFAULT_QUEUE_SIZE = 64
+
+CommandKey = Tuple[str, str, Optional[str]]
+
+
+class CommandQueue:
+    """Define a bounded queue of commands for a single device.
+
+    Commands are sent one at a time, in order; since every device has its own
+    queue, different devices still run in parallel. Enqueuing into a full queue
+    waits for a free slot.
+
+    Every enqueued command is sent, since repeating one is often intentional (e.g.,
+    pressing "volume up" twice). With ``coalesce=True``, enqueuing a command
+    identical to one that is still waiting returns the pending result instead of
+    adding a duplicate.
+    """
+
+    def __init__(
+        self,
+        async_send_command: Callable[..., Awaitable[Dict[str, Any]]],
+        *,
+        maxsize: int = DEFAULT_QUEUE_SIZE,
+        coalesce: bool = False,
+    ) -> None:
+        """Initialize."""
+        self._async_send_command = async_send_command
+        self._coalesce = coalesce
+        self._maxsize = maxsize
+        self._pending: Dict[CommandKey, "asyncio.Future[Dict[str, Any]]"] = {}
+        self._queue: Optional[
+            "asyncio.Queue[Tuple[CommandKey, asyncio.Future[Dict[str, Any]]]]"
+        ] = None
+        self._worker: Optional["asyncio.Task[None]"] = None
+        self.coalesced = 0
+
+    @property
+    def pending(self) -> int:
+        """Return the number of commands waiting to be sent."""
+        if self._queue is None:
+            return 0
+        return self._queue.qsize()
+
+    async def _async_work(self) -> None:
+        """Send queued commands one at a time."""
+        assert self._queue
+
+        while True:
+            key, future = await self._queue.get()
+            if self._pending.get(key) is future:
+                self._pending.pop(key)
+
+            if future.done():
+                self._queue.task_done()
+                continue
+
+            command, action, operand = key
+            try:
+                result = await self._async_send_command(
+                    command, action, operand=operand
+                )
+            except asyncio.CancelledError:
+                if not future.done():
+                    future.set_exception(CommandError("The command queue was closed"))
+                raise
+            except Exception as err:  # pylint: disable=broad-except
+                if not future.done():
+                    future.set_exception(err)
+            else:
+                if not future.done():
+                    future.set_result(result)
+            finally:
+                self._queue.task_done()
+
+    async def async_close(self) -> None:
+        """Stop the queue, failing any commands that haven't been sent."""
+        if self._worker is not None:
+            self._worker.cancel()
+            await asyncio.gather(self._worker, return_exceptions=True)
+            self._worker = None
+
+        if self._queue is not None:
+            while not self._queue.empty():
+                _, future = self._queue.get_nowait()
+                if not future.done():
+                    future.set_exception(CommandError("The command queue was closed"))
+            self._queue = None
+
+        self._pending.clear()
+
+    async def async_enqueue(
+        self, command: str, action: str, *, operand: Optional[str] = None
+    ) -> "asyncio.Future[Dict[str, Any]]":
+        """Enqueue a command, returning a future that resolves to its response.
+
+        If the queue is full, this waits until there is room.
+        """
+        key = (command, action, operand)
+
+        if self._coalesce and key in self._pending:
+            self.coalesced += 1
+            LOGGER.debug("Coalescing duplicate command: %s", key)
+            return self._pending[key]
+
+        if self._queue is None:
+            self._queue = asyncio.Queue(self._maxsize)
+        if self._worker is None or self._worker.done():
+            self._worker = asyncio.ensure_future(self._async_work())
+
+        future: "asyncio.Future[Dict[str, Any]]" = (
+            asyncio.get_event_loop().create_future()
+        )
+        if self._coalesce:
+            self._pending[key] = future
+
+        try:
+            await self._queue.put((key, future))
+        except asyncio.CancelledError:
+            if self._pending.get(key) is future:
+                self._pending.pop(key)
+            future.cancel()
+            raise
+
+        return future
+
+    async def async_send(
+        self, command: str, action: str, *, operand: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """Enqueue a command and wait for its response."""
+        future = await self.async_enqueue(command, action, operand=operand)
+        # Shield the shared future so that one cancelled caller doesn't cancel the
+        # command for every other caller it was coalesced with:
+        return await asyncio.shield(future)
@@ -0,0 +1,176 @@
+"""Define token-bucket rate limiting for the requests made to devices."""
+import asyncio
+import heapq
+import itertools
+import time
+from typing import List, NamedTuple, Optional, Tuple
+
+from .const import LOGGER
+from .errors import RequestError
+
+
+class RateLimiterState(NamedTuple):
+    """Define a snapshot of a rate limiter's state."""
+
+    rate: float
+    burst: float
+    tokens: float
+    waiting: int
+    acquired: int
+    throttled: int
+    total_wait: float
+
+
+class TokenBucket:
+    """Define a token bucket that admits ``rate`` requests per second on average.
+
+    The bucket holds up to ``burst`` tokens (by default, one second's worth), so
+    that short bursts go out right away. Once it is empty, callers aren't rejected:
+    they wait in line, and tokens are handed out as they accrue, by priority (the
+    lowest value first, as with RequestScheduler), then in the order callers
+    arrived. If ``max_wait`` is set, a caller that would (likely) wait longer than
+    that fails with a RequestError instead.
+
+    A single bucket can be shared by any number of devices (e.g., by every device
+    using the same Transport) to limit their combined rate.
+    """
+
+    def __init__(
+        self,
+        rate: float,
+        *,
+        burst: Optional[float] = None,
+        max_wait: Optional[float] = None,
+    ) -> None:
+        """Initialize."""
+        if rate <= 0:
+            raise ValueError("The rate must be positive")
+
+        self._sequence = itertools.count()
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._tokens = burst if burst is not None else max(rate, 1.0)
+        self._updated = time.monotonic()
+        self._waiters: List[Tuple[int, int, "asyncio.Future[None]"]] = []
+        self.acquired = 0
+        self.burst = self._tokens
+        self.max_wait = max_wait
+        self.rate = rate
+        self.throttled = 0
+        self.total_wait = 0.0
+        self.waiting = 0
+
+    def __repr__(self) -> str:
+        """Return a string representation of the bucket."""
+        return f"<TokenBucket rate={self.rate} tokens={self.tokens:.2f}>"
+
+    @property
+    def state(self) -> RateLimiterState:
+        """Return a snapshot of the bucket's state."""
+        return RateLimiterState(
+            rate=self.rate,
+            burst=self.burst,
+            tokens=self.tokens,
+            waiting=self.waiting,
+            acquired=self.acquired,
+            throttled=self.throttled,
+            total_wait=self.total_wait,
+        )
+
+    @property
+    def tokens(self) -> float:
+        """Return the number of available tokens."""
+        self._refill()
+        return self._tokens
+
+    def _refill(self) -> None:
+        """Add the tokens that accrued since the last refill."""
+        now = time.monotonic()
+        self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def _wake_waiters(self) -> None:
+        """Hand the available tokens to waiters (scheduling the next handout)."""
+        self._timer = None
+        self._refill()
+        while self._waiters:
+            future = self._waiters[0][2]
+            if future.done():
+                # The caller went away:
+                heapq.heappop(self._waiters)
+                continue
+            if self._tokens < 1:
+                break
+            heapq.heappop(self._waiters)
+            self._tokens -= 1
+            future.set_result(None)
+
+        if self._waiters:
+            self._timer = asyncio.get_event_loop().call_later(
+                (1 - self._tokens) / self.rate, self._wake_waiters
+            )
+
+    def release(self) -> None:
+        """Give back a token that was taken but never used."""
+        self._refill()
+        self._tokens = min(self.burst, self._tokens + 1)
+        self.acquired -= 1
+        if self._waiters:
+            if self._timer is not None:
+                self._timer.cancel()
+            self._wake_waiters()
+
+    def try_acquire(self) -> bool:
+        """Take a token if one is available right away (returning whether it was)."""
+        self._refill()
+        if self._tokens < 1 or self.waiting:
+            return False
+        self._tokens -= 1
+        self.acquired += 1
+        return True
+
+    async def async_acquire(self, *, priority: int = 0) -> None:
+        """Take a token, waiting for one to become available if needed."""
+        if self.try_acquire():
+            return
+
+        if self.max_wait is not None:
+            ahead = sum(
+                1
+                for waiter in self._waiters
+                if waiter[0] <= priority and not waiter[2].done()
+            )
+            delay = (ahead + 1 - self._tokens) / self.rate
+            if delay > self.max_wait:
+                raise RequestError(
+                    f"Rate limit exceeded: a token isn't available for {delay:.2f} "
+                    "seconds"
+                )
+
+        future: "asyncio.Future[None]" = asyncio.get_event_loop().create_future()
+        heapq.heappush(self._waiters, (priority, next(self._sequence), future))
+        self.throttled += 1
+        self.waiting += 1
+        if self._timer is None:
+            self._wake_waiters()
+
+        LOGGER.debug("Rate limited; waiting for a token")
+        start = time.monotonic()
+        try:
+            await future
+        except asyncio.CancelledError:
+            if not future.cancelled():
+                # The token was handed over just as the caller went away:
+                self.acquired += 1
+                self.release()
+            raise
+        finally:
+            self.waiting -= 1
+
+        self.acquired += 1
+        self.total_wait += time.monotonic() - start
+
+    def reset_stats(self) -> None:
+        """Reset the counters."""
+        self.acquired = 0
+        self.throttled = 0
+        self.total_wait = 0.0
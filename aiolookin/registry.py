@@ -0,0 +1,265 @@
+"""Define a persistent, on-disk registry of devices for warm startup."""
+import asyncio
+import json
+import time
+from typing import Any, AsyncIterator, Dict, Iterable, Iterator, List, Optional
+
+from .const import LOGGER
+from .device import Device
+from .errors import LookInError
+from .fleet import DEFAULT_MAX_CONCURRENCY, FleetResult, async_run_bounded
+from .scheduler import PRIORITY_BACKGROUND, request_priority
+from .storage import write_json_atomic
+from .transport import Transport
+
+REGISTRY_VERSION = 1
+
+
+class RegistryEntry:
+    """Define what the registry knows about a single device."""
+
+    __slots__ = ("capabilities", "info", "ip_address", "updated")
+
+    def __init__(
+        self,
+        ip_address: str,
+        info: Dict[str, Any],
+        *,
+        capabilities: Optional[Dict[str, List[str]]] = None,
+        updated: Optional[float] = None,
+    ) -> None:
+        """Initialize."""
+        self.capabilities = capabilities or {}
+        self.info = info
+        self.ip_address = ip_address
+        self.updated = time.time() if updated is None else updated
+
+    def __repr__(self) -> str:
+        """Return a string representation of the entry."""
+        return f"<RegistryEntry device_id={self.device_id} ip={self.ip_address}>"
+
+    @property
+    def device_id(self) -> str:
+        """Return the device id."""
+        return str(self.info["ID"])
+
+    @property
+    def firmware(self) -> str:
+        """Return the firmware the device had when it was recorded."""
+        return str(self.info["Firmware"])
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "RegistryEntry":
+        """Create an entry from its stored form."""
+        return cls(
+            data["ip_address"],
+            data["info"],
+            capabilities=data.get("capabilities"),
+            updated=data.get("updated"),
+        )
+
+    def as_dict(self) -> Dict[str, Any]:
+        """Return the stored form of the entry."""
+        return {
+            "capabilities": self.capabilities,
+            "info": self.info,
+            "ip_address": self.ip_address,
+            "updated": self.updated,
+        }
+
+
+class DeviceRegistry:
+    """Define a registry of device info and capability lists, keyed by device id.
+
+    Devices restored from the registry are usable right away (without making any
+    requests); they should then be revalidated in the background. A device is
+    considered stale when its firmware changed since it was recorded (in which
+    case its cached capabilities are dropped) or, if ``max_age`` is set, when it
+    was recorded more than ``max_age`` seconds ago.
+    """
+
+    def __init__(self, path: str, *, max_age: Optional[float] = None) -> None:
+        """Initialize."""
+        self._entries: Dict[str, RegistryEntry] = {}
+        self.max_age = max_age
+        self.path = path
+
+    def __contains__(self, device_id: str) -> bool:
+        """Return whether the registry contains a device."""
+        return device_id in self._entries
+
+    def __iter__(self) -> Iterator[RegistryEntry]:
+        """Iterate over the registry's entries."""
+        return iter(list(self._entries.values()))
+
+    def __len__(self) -> int:
+        """Return the number of devices in the registry."""
+        return len(self._entries)
+
+    def get(self, device_id: str) -> Optional[RegistryEntry]:
+        """Return the entry for a device (if it is part of the registry)."""
+        return self._entries.get(device_id)
+
+    def get_by_ip_address(self, ip_address: str) -> Optional[RegistryEntry]:
+        """Return the entry for the device at an IP address (if there is one)."""
+        for entry in self._entries.values():
+            if entry.ip_address == ip_address:
+                return entry
+        return None
+
+    def is_stale(self, device_id: str) -> bool:
+        """Return whether a device's entry is missing or older than the max age."""
+        entry = self._entries.get(device_id)
+        if entry is None:
+            return True
+        return self.max_age is not None and time.time() - entry.updated > self.max_age
+
+    def load(self) -> None:
+        """Load the registry from disk (an absent file leaves it empty)."""
+        try:
+            with open(self.path, encoding="utf-8") as fptr:
+                data = json.load(fptr)
+        except FileNotFoundError:
+            return
+        except ValueError as err:
+            raise LookInError(f"Invalid registry file {self.path}: {err}") from err
+
+        try:
+            if data.get("version") != REGISTRY_VERSION:
+                LOGGER.debug(
+                    "Ignoring registry file with unknown version: %s", self.path
+                )
+                return
+
+            entries = {
+                device_id: RegistryEntry.from_dict(entry)
+                for device_id, entry in data["devices"].items()
+            }
+        except (AttributeError, KeyError, TypeError) as err:
+            raise LookInError(f"Invalid registry file {self.path}: {err!r}") from err
+
+        self._entries = entries
+
+    def _as_dict(self) -> Dict[str, Any]:
+        """Return the stored form of the registry."""
+        return {
+            "devices": {
+                device_id: entry.as_dict() for device_id, entry in self._entries.items()
+            },
+            "version": REGISTRY_VERSION,
+        }
+
+    def record(self, device: Device) -> RegistryEntry:
+        """Record the current info and cached capabilities of a device.
+
+        Any other device recorded at the same IP address is dropped (it has since
+        moved or been replaced).
+        """
+        entry = RegistryEntry(
+            device.ip_address,
+            device.raw_device_info,
+            capabilities=device.cache.export(),
+        )
+        for device_id, other in list(self._entries.items()):
+            if other.ip_address == entry.ip_address and device_id != entry.device_id:
+                del self._entries[device_id]
+        self._entries[entry.device_id] = entry
+        return entry
+
+    def remove(self, device_id: str) -> None:
+        """Remove a device from the registry."""
+        self._entries.pop(device_id, None)
+
+    def restore(
+        self, device_id: str, *, transport: Optional[Transport] = None, **kwargs: Any
+    ) -> Device:
+        """Create a device from its entry (without making any requests).
+
+        Extra keyword arguments are passed to the Device itself.
+        """
+        entry = self._entries.get(device_id)
+        if entry is None:
+            raise LookInError(f"Unknown device: {device_id}")
+
+        device = Device(entry.ip_address, transport=transport, **kwargs)
+        device.load_device_info(dict(entry.info))
+        device.cache.load(entry.capabilities)
+        return device
+
+    def restore_all(
+        self, *, transport: Optional[Transport] = None, **kwargs: Any
+    ) -> List[Device]:
+        """Create a device from every entry (without making any requests)."""
+        return [
+            self.restore(device_id, transport=transport, **kwargs)
+            for device_id in self._entries
+        ]
+
+    def save(self) -> None:
+        """Write the registry to disk (atomically replacing any existing file)."""
+        write_json_atomic(self.path, self._as_dict())
+
+    async def async_load(self) -> None:
+        """Load the registry from disk without blocking the event loop."""
+        await asyncio.get_event_loop().run_in_executor(None, self.load)
+
+    async def async_revalidate(self, device: Device) -> bool:
+        """Refresh a device's info and record it (returning whether it was stale)."""
+        if device.raw_device_info:
+            entry = self._entries.get(device.device_id)
+        else:
+            entry = self.get_by_ip_address(device.ip_address)
+        with request_priority(PRIORITY_BACKGROUND):
+            await device.async_update_device_info()
+
+        stale = entry is None or self.is_stale(entry.device_id)
+        if entry is not None and entry.device_id != device.device_id:
+            LOGGER.debug(
+                "Device at %s changed (%s -> %s)",
+                device.ip_address,
+                entry.device_id,
+                device.device_id,
+            )
+            device.cache.invalidate()
+            stale = True
+        elif entry is not None and entry.firmware != device.firmware:
+            LOGGER.debug(
+                "Firmware of %s changed (%s -> %s)",
+                device.device_id,
+                entry.firmware,
+                device.firmware,
+            )
+            device.cache.invalidate()
+            stale = True
+
+        self.record(device)
+        return stale
+
+    def async_revalidate_all(
+        self,
+        devices: Iterable[Device],
+        *,
+        max_concurrency: int = DEFAULT_MAX_CONCURRENCY,
+    ) -> AsyncIterator[FleetResult]:
+        """Revalidate devices, yielding results (whose data is the staleness).
+
+        For example, to revalidate restored devices in the background:
+
+            async def async_revalidate():
+                async for result in registry.async_revalidate_all(devices):
+                    ...
+                await registry.async_save()
+
+            asyncio.ensure_future(async_revalidate())
+        """
+        return async_run_bounded(
+            devices, self.async_revalidate, max_concurrency=max_concurrency
+        )
+
+    async def async_save(self) -> None:
+        """Write the registry to disk without blocking the event loop."""
+        # Take the snapshot here, since the registry may change while it's written:
+        data = self._as_dict()
+        await asyncio.get_event_loop().run_in_executor(
+            None, write_json_atomic, self.path, data
+        )
@@ -0,0 +1,109 @@
+"""Define retry and circuit breaker policies for device requests."""
+import random
+import time
+
+DEFAULT_BASE_DELAY = 0.1
+DEFAULT_FAILURE_THRESHOLD = 5
+DEFAULT_MAX_DELAY = 2.0
+DEFAULT_RECOVERY_TIMEOUT = 30.0
+DEFAULT_RETRY_ATTEMPTS = 3
+
+BREAKER_STATE_CLOSED = "closed"
+BREAKER_STATE_HALF_OPEN = "half_open"
+BREAKER_STATE_OPEN = "open"
+
+
+class RetryPolicy:
+    """Define how idempotent requests are retried.
+
+    Delays grow exponentially from ``base_delay`` up to ``max_delay``; with jitter
+    enabled, each delay is drawn uniformly from zero up to that bound ("full
+    jitter"), so that many devices failing at once don't retry in lockstep.
+    """
+
+    def __init__(
+        self,
+        *,
+        attempts: int = DEFAULT_RETRY_ATTEMPTS,
+        base_delay: float = DEFAULT_BASE_DELAY,
+        max_delay: float = DEFAULT_MAX_DELAY,
+        jitter: bool = True,
+    ) -> None:
+        """Initialize."""
+        self.attempts = max(attempts, 1)
+        self.base_delay = base_delay
+        self.jitter = jitter
+        self.max_delay = max_delay
+
+    def get_delay(self, attempt: int) -> float:
+        """Return how long to wait after a failed attempt (counting from 0)."""
+        delay = min(self.max_delay, self.base_delay * (1 << attempt))
+        if self.jitter:
+            return random.uniform(0, delay)  # nosec
+        return delay
+
+
+class CircuitBreaker:
+    """Define a circuit breaker that fails fast for an unhealthy device.
+
+    After ``failure_threshold`` consecutive failures, the breaker opens and every
+    request fails immediately. Once ``recovery_timeout`` seconds pass, it becomes
+    half-open and lets a single probe through: success closes it again, failure
+    re-opens it.
+    """
+
+    def __init__(
+        self,
+        *,
+        failure_threshold: int = DEFAULT_FAILURE_THRESHOLD,
+        recovery_timeout: float = DEFAULT_RECOVERY_TIMEOUT,
+    ) -> None:
+        """Initialize."""
+        self._opened_at = 0.0
+        self._probe_in_flight = False
+        self.failure_count = 0
+        self.failure_threshold = failure_threshold
+        self.recovery_timeout = recovery_timeout
+
+    def __repr__(self) -> str:
+        """Return a string representation of the breaker."""
+        return f"<CircuitBreaker state={self.state} failures={self.failure_count}>"
+
+    @property
+    def state(self) -> str:
+        """Return the state of the breaker."""
+        if self.failure_count < self.failure_threshold:
+            return BREAKER_STATE_CLOSED
+        if time.monotonic() - self._opened_at >= self.recovery_timeout:
+            return BREAKER_STATE_HALF_OPEN
+        return BREAKER_STATE_OPEN
+
+    def allow_request(self) -> bool:
+        """Return whether a request may proceed (claiming the probe if half-open)."""
+        state = self.state
+        if state == BREAKER_STATE_CLOSED:
+            return True
+        if state == BREAKER_STATE_HALF_OPEN and not self._probe_in_flight:
+            self._probe_in_flight = True
+            return True
+        return False
+
+    def record_failure(self) -> None:
+        """Record a failed request."""
+        self._probe_in_flight = False
+        self.failure_count += 1
+        if self.failure_count >= self.failure_threshold:
+            self._opened_at = time.monotonic()
+
+    def record_success(self) -> None:
+        """Record a successful request."""
+        self._probe_in_flight = False
+        self.failure_count = 0
+
+    def release_probe(self) -> None:
+        """Release a claimed half-open probe without recording an outcome."""
+        self._probe_in_flight = False
+
+    def reset(self) -> None:
+        """Close the breaker."""
+        self.record_success()
@@ -0,0 +1,266 @@
+"""Define a scheduler that orders the requests made to a device by priority."""
+import asyncio
+from contextlib import contextmanager
+from functools import partial
+import heapq
+import itertools
+from typing import (
+    Any,
+    Awaitable,
+    Callable,
+    Dict,
+    Iterator,
+    List,
+    Optional,
+    Set,
+    cast,
+)
+from weakref import WeakKeyDictionary
+
+from .const import LOGGER
+from .errors import RequestError
+
+try:
+    from contextvars import ContextVar
+
+    HAS_CONTEXTVARS = True
+except ImportError:  # pragma: no cover
+    HAS_CONTEXTVARS = False
+
+PRIORITY_INTERACTIVE = 0
+PRIORITY_REFRESH = 1
+PRIORITY_BACKGROUND = 2
+
+# How long (in seconds) a request of each priority may wait before it is overdue;
+# overdue background requests are dropped rather than sent:
+DEFAULT_DEADLINES = {
+    PRIORITY_INTERACTIVE: 5.0,
+    PRIORITY_REFRESH: 10.0,
+    PRIORITY_BACKGROUND: 30.0,
+}
+
+DEFAULT_CONCURRENCY = 1
+
+_REQUEST_PRIORITY: Optional["ContextVar[Optional[int]]"] = (
+    ContextVar("request_priority", default=None) if HAS_CONTEXTVARS else None
+)
+
+# Without contextvars (Python 3.6), priorities are tracked per task instead:
+_TASK_PRIORITIES: "WeakKeyDictionary[asyncio.Task[Any], int]" = WeakKeyDictionary()
+
+
+def _get_current_task() -> Optional["asyncio.Task[Any]"]:
+    """Return the task that is currently running (if any)."""
+    current_task = getattr(asyncio, "current_task", None) or getattr(
+        asyncio.Task, "current_task"
+    )
+    return cast(Optional["asyncio.Task[Any]"], current_task())
+
+
+def get_request_priority() -> Optional[int]:
+    """Return the priority set for requests made in the current context (if any)."""
+    if _REQUEST_PRIORITY is not None:
+        return _REQUEST_PRIORITY.get()
+
+    task = _get_current_task()
+    return _TASK_PRIORITIES.get(task) if task is not None else None
+
+
+@contextmanager
+def request_priority(priority: int) -> Iterator[None]:
+    """Set the priority of every request made within the block.
+
+    For example, to poll a sensor without delaying interactive commands:
+
+        with request_priority(PRIORITY_BACKGROUND):
+            await device.sensor.async_get_sensor_value("Meteo")
+
+    On Python 3.6 (which lacks contextvars), the priority only applies to requests
+    made by the current task itself, not by tasks it spawns within the block.
+    """
+    if _REQUEST_PRIORITY is not None:
+        token = _REQUEST_PRIORITY.set(priority)
+        try:
+            yield
+        finally:
+            _REQUEST_PRIORITY.reset(token)
+        return
+
+    task = _get_current_task()
+    if task is None:
+        yield
+        return
+
+    previous = _TASK_PRIORITIES.get(task)
+    _TASK_PRIORITIES[task] = priority
+    try:
+        yield
+    finally:
+        if previous is None:
+            _TASK_PRIORITIES.pop(task, None)
+        else:
+            _TASK_PRIORITIES[task] = previous
+
+
+class ScheduledRequest:
+    """Define a request waiting for (or holding) one of a scheduler's slots."""
+
+    __slots__ = ("async_func", "deadline", "future", "priority", "sequence", "task")
+
+    def __init__(
+        self,
+        priority: int,
+        deadline: float,
+        sequence: int,
+        async_func: Callable[[], Awaitable[Any]],
+        future: "asyncio.Future[Any]",
+    ) -> None:
+        """Initialize."""
+        self.async_func = async_func
+        self.deadline = deadline
+        self.future = future
+        self.priority = priority
+        self.sequence = sequence
+        self.task: Optional["asyncio.Task[Any]"] = None
+
+    def __lt__(self, other: "ScheduledRequest") -> bool:
+        """Order requests by priority, then deadline, then arrival."""
+        return (self.priority, self.deadline, self.sequence) < (
+            other.priority,
+            other.deadline,
+            other.sequence,
+        )
+
+    def __repr__(self) -> str:
+        """Return a string representation of the request."""
+        return f"<ScheduledRequest priority={self.priority} deadline={self.deadline}>"
+
+
+class RequestScheduler:
+    """Define a per-device scheduler with priority classes and deadlines.
+
+    At most ``concurrency`` requests run at once; waiting requests run in order of
+    priority (interactive, then refresh, then background) and, within a priority,
+    earliest deadline first, so a higher-priority request overtakes every waiting
+    request of a lower priority. Requests that are already running are never
+    interrupted (a request that was sent can't be taken back). Background requests
+    that are still waiting once their deadline passes are dropped (failing with a
+    RequestError).
+    """
+
+    def __init__(
+        self,
+        *,
+        concurrency: int = DEFAULT_CONCURRENCY,
+        deadlines: Optional[Dict[int, float]] = None,
+    ) -> None:
+        """Initialize."""
+        self._queue: List[ScheduledRequest] = []
+        self._running: Set[ScheduledRequest] = set()
+        self._sequence = itertools.count()
+        self.concurrency = concurrency
+        self.deadlines = {**DEFAULT_DEADLINES, **(deadlines or {})}
+        self.dropped = 0
+
+    @property
+    def pending(self) -> int:
+        """Return the number of requests waiting for a slot."""
+        return sum(1 for request in self._queue if not request.future.done())
+
+    @property
+    def running(self) -> int:
+        """Return the number of requests currently running."""
+        return len(self._running)
+
+    def _dispatch(self) -> None:
+        """Start waiting requests while there are free slots."""
+        now = asyncio.get_event_loop().time()
+        while self._queue and len(self._running) < self.concurrency:
+            request = heapq.heappop(self._queue)
+            if request.future.done():
+                continue
+            if self._is_overdue(request, now):
+                self._drop(request)
+                continue
+
+            self._running.add(request)
+            request.task = asyncio.ensure_future(request.async_func())
+            request.task.add_done_callback(partial(self._finish, request))
+
+    def _drop(self, request: ScheduledRequest) -> None:
+        """Fail a request that waited past its deadline."""
+        self.dropped += 1
+        LOGGER.debug("Dropping overdue request: %s", request)
+        request.future.set_exception(RequestError("Dropped an overdue request"))
+
+    def _drop_overdue(self) -> None:
+        """Drop every waiting background request that is overdue."""
+        now = asyncio.get_event_loop().time()
+        queue = []
+        for request in self._queue:
+            if request.future.done():
+                continue
+            if self._is_overdue(request, now):
+                self._drop(request)
+                continue
+            queue.append(request)
+        heapq.heapify(queue)
+        self._queue = queue
+
+    def _finish(self, request: ScheduledRequest, task: "asyncio.Task[Any]") -> None:
+        """Settle a request once it has run."""
+        self._running.discard(request)
+
+        if request.future.done():
+            # The caller went away; there is nobody left to settle:
+            if not task.cancelled():
+                task.exception()
+        elif task.cancelled():
+            request.future.cancel()
+        elif task.exception() is not None:
+            request.future.set_exception(task.exception())  # type: ignore[arg-type]
+        else:
+            request.future.set_result(task.result())
+
+        self._dispatch()
+
+    def _is_overdue(self, request: ScheduledRequest, now: float) -> bool:
+        """Return whether a request should be dropped rather than run."""
+        return request.priority >= PRIORITY_BACKGROUND and now > request.deadline
+
+    async def async_run(
+        self,
+        priority: int,
+        async_func: Callable[[], Awaitable[Any]],
+        *,
+        deadline: Optional[float] = None,
+    ) -> Any:
+        """Run a coroutine function once it is its turn (returning its result).
+
+        The deadline (in seconds from now) defaults to the one for the priority.
+        """
+        loop = asyncio.get_event_loop()
+        if deadline is None:
+            deadline = self.deadlines.get(priority, self.deadlines[PRIORITY_BACKGROUND])
+
+        request = ScheduledRequest(
+            priority,
+            loop.time() + deadline,
+            next(self._sequence),
+            async_func,
+            loop.create_future(),
+        )
+
+        def cancel_task(future: "asyncio.Future[Any]") -> None:
+            """Cancel the running request if the caller was cancelled."""
+            if future.cancelled() and request.task and not request.task.done():
+                request.task.cancel()
+
+        request.future.add_done_callback(cancel_task)
+
+        if priority < PRIORITY_BACKGROUND:
+            self._drop_overdue()
+
+        heapq.heappush(self._queue, request)
+        self._dispatch()
+        return await request.future
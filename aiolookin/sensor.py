@@ -1,27 +1,54 @@
 """Define endpoints to manage sensor data."""
-from typing import Any, Awaitable, Callable, Dict, List, cast
+from typing import Any, Awaitable, Callable, Dict, List, Optional, cast
 
+from .cache import CapabilityCache
 from .errors import SensorError
+from .models import SensorValue, parse_sensor_value
 
 
 class SensorAPI:
     """Define a sensor data object."""
 
-    def __init__(self, async_request: Callable[..., Awaitable]) -> None:
+    def __init__(
+        self,
+        async_request: Callable[..., Awaitable],
+        *,
+        cache: Optional[CapabilityCache] = None,
+        validate: bool = True,
+    ) -> None:
         """Initialize."""
         self._async_request = async_request
+        self._cache = cache or CapabilityCache(ttl=0)
+        self._validate = validate
 
-    async def async_get_sensor_value(self, sensor: str) -> Dict[str, Any]:
+    async def _async_fetch_sensor_list(self) -> List[str]:
+        """Get the list of sensors from the device itself."""
+        data = await self._async_request("get", "sensors")
+        return cast(List[str], data)
+
+    async def async_get_sensor_value(
+        self, sensor: str, *, validate: Optional[bool] = None
+    ) -> Dict[str, Any]:
         """Get the latest value of a particular sensor."""
-        sensor_list = await self.async_get_sensor_list()
+        if validate is None:
+            validate = self._validate
 
-        if sensor not in sensor_list:
-            raise SensorError(f"Unknown sensor: {sensor}")
+        if validate:
+            if not await self._cache.async_contains(
+                "sensors", sensor, self._async_fetch_sensor_list
+            ):
+                raise SensorError(f"Unknown sensor: {sensor}")
 
         data = await self._async_request("get", f"sensors/{sensor}")
         return cast(Dict[str, Any], data)
 
+    async def async_get_sensor_reading(
+        self, sensor: str, *, validate: Optional[bool] = None
+    ) -> SensorValue:
+        """Get the latest value of a particular sensor as a typed model."""
+        data = await self.async_get_sensor_value(sensor, validate=validate)
+        return parse_sensor_value(sensor, data)
+
     async def async_get_sensor_list(self) -> List[str]:
         """Get the list of sensors supported by the device."""
-        data = await self._async_request("get", "sensors")
-        return cast(List[str], data)
+        return await self._cache.async_get("sensors", self._async_fetch_sensor_list)
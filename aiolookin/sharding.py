@@ -0,0 +1,754 @@
+"""Define a fleet whose devices are spread over a pool of worker processes."""
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+import itertools
+import multiprocessing
+from multiprocessing.connection import Connection
+import os
+from types import TracebackType
+from typing import (
+    Any,
+    AsyncIterator,
+    Awaitable,
+    Callable,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Set,
+    Tuple,
+    Type,
+    cast,
+)
+import zlib
+
+from .cache import DEFAULT_CACHE_TTL
+from .codec import IRCode
+from .const import LOGGER
+from .device import Device
+from .errors import LookInError, RequestError
+from .events import DeviceInfoEvents, add_subscription
+from .fleet import DEFAULT_MAX_CONCURRENCY, DeviceFleet, FleetResult
+from .models import DeviceInfo, SensorValue
+
+# Every message is a tuple whose first item is one of these:
+MESSAGE_ADD = "add"
+MESSAGE_CALL = "call"
+MESSAGE_INFOS = "infos"
+MESSAGE_REFRESH = "refresh"
+MESSAGE_REMOVE = "remove"
+MESSAGE_RESULT = "result"
+MESSAGE_STOP = "stop"
+
+# The device methods that can be called through a shard:
+SHARD_METHODS = {
+    ("command", "async_get_command_action_list"),
+    ("command", "async_get_command_list"),
+    ("command", "async_send_command"),
+    ("command", "async_send_ir_code"),
+    ("device", "async_update_device_info"),
+    ("sensor", "async_get_sensor_list"),
+    ("sensor", "async_get_sensor_reading"),
+    ("sensor", "async_get_sensor_value"),
+}
+
+ShardInfoCallback = Callable[["ShardedDevice", Tuple[str, ...]], None]
+
+# An info update, as streamed back from a shard:
+InfoUpdate = Tuple[str, Optional[DeviceInfo], Tuple[str, ...], Optional[Exception]]
+
+
+def _log_send_error(shard: int, kind: str, future: "asyncio.Future[None]") -> None:
+    """Log a message that couldn't be sent to a shard."""
+    if not future.cancelled() and future.exception() is not None:
+        LOGGER.warning(
+            "Unable to send a %s message to shard %s: %s",
+            kind,
+            shard,
+            future.exception(),
+        )
+
+
+def get_shard(key: str, shards: int) -> int:
+    """Return the shard that owns a key (stable across processes and runs)."""
+    return zlib.crc32(key.encode()) % shards
+
+
+def _get_info_update(
+    device: Device, changed_fields: Tuple[str, ...], error: Optional[Exception]
+) -> InfoUpdate:
+    """Return an info update for a device."""
+    info = device.info if error is None else None
+    return (device.ip_address, info, changed_fields, error)
+
+
+async def _async_call(
+    device: Device, target: str, method: str, args: Tuple, kwargs: Dict[str, Any]
+) -> Any:
+    """Call a device method within a shard."""
+    if (target, method) not in SHARD_METHODS:
+        raise LookInError(f"Unsupported shard method: {target}.{method}")
+    if target == "device":
+        changed_fields = await device.async_update_device_info()
+        return _get_info_update(device, changed_fields, None)
+    return await getattr(getattr(device, target), method)(*args, **kwargs)
+
+
+async def _async_refresh(fleet: DeviceFleet) -> List[InfoUpdate]:
+    """Refresh the info of every device in a shard."""
+    return [
+        _get_info_update(cast(Device, result.device), result.data or (), result.error)
+        async for result in fleet.async_update_device_info()
+    ]
+
+
+class ShardWorker:
+    """Define the part of a shard that runs in its worker process."""
+
+    def __init__(
+        self, conn: Connection, ip_addresses: List[str], options: Dict[str, Any]
+    ) -> None:
+        """Initialize."""
+        self._conn = conn
+        self._executor = ThreadPoolExecutor(1)
+        self._send_executor = ThreadPoolExecutor(1)
+        self._tasks: Set["asyncio.Task[None]"] = set()
+        self.update_interval: Optional[float] = options.pop("update_interval")
+        self.fleet = DeviceFleet(ip_addresses, **options)
+
+    async def _async_handle_message(self, message: Tuple) -> None:
+        """Handle a message from the parent."""
+        kind = message[0]
+        if kind == MESSAGE_ADD:
+            self.fleet.add(message[1])
+        elif kind == MESSAGE_REMOVE:
+            await self.fleet.async_remove(message[1])
+        elif kind == MESSAGE_CALL:
+            self._start(self._async_handle_call(*message[1:]))
+        elif kind == MESSAGE_REFRESH:
+            self._start(self._async_handle_refresh(message[1]))
+
+    def _start(self, coro: Awaitable[None]) -> None:
+        """Run a coroutine in the background."""
+        task = asyncio.ensure_future(coro)
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _async_send(self, message: Tuple) -> None:
+        """Send a message to the parent (without blocking the event loop)."""
+        await asyncio.get_event_loop().run_in_executor(
+            self._send_executor, self._conn.send, message
+        )
+
+    async def _async_send_result(
+        self, request_id: int, data: Any, error: Optional[Exception]
+    ) -> None:
+        """Send the result of a request back to the parent.
+
+        If the result can't be sent (e.g., because it can't be pickled), the
+        request fails with a RequestError instead, so that the parent never waits
+        for it forever.
+        """
+        try:
+            await self._async_send((MESSAGE_RESULT, request_id, data, error))
+        except Exception as err:  # pylint: disable=broad-except
+            LOGGER.debug("Unable to send the result of request %s: %s", request_id, err)
+            await self._async_send(
+                (
+                    MESSAGE_RESULT,
+                    request_id,
+                    None,
+                    RequestError(str(error) if error is not None else str(err)),
+                )
+            )
+
+    async def _async_handle_call(
+        self,
+        request_id: int,
+        ip_address: str,
+        target: str,
+        method: str,
+        args: Tuple,
+        kwargs: Dict[str, Any],
+    ) -> None:
+        """Run a call and send its result back."""
+        device = self.fleet.add(ip_address)
+        try:
+            data = await _async_call(device, target, method, args, kwargs)
+        except asyncio.CancelledError:
+            raise
+        except Exception as err:  # pylint: disable=broad-except
+            await self._async_send_result(request_id, None, err)
+        else:
+            await self._async_send_result(request_id, data, None)
+
+    async def _async_handle_refresh(self, request_id: int) -> None:
+        """Refresh every device and send the updates back."""
+        try:
+            updates = await _async_refresh(self.fleet)
+        except asyncio.CancelledError:
+            raise
+        except Exception as err:  # pylint: disable=broad-except
+            LOGGER.exception("Error while refreshing the shard's devices")
+            await self._async_send_result(request_id, None, err)
+        else:
+            await self._async_send_result(request_id, updates, None)
+
+    async def _async_update(self, interval: float) -> None:
+        """Periodically refresh every device, streaming back what changed."""
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                updates = [
+                    update
+                    for update in await _async_refresh(self.fleet)
+                    if update[2] and update[3] is None
+                ]
+                if updates:
+                    await self._async_send((MESSAGE_INFOS, updates))
+            except asyncio.CancelledError:
+                raise
+            except Exception:  # pylint: disable=broad-except
+                LOGGER.exception("Error while streaming the shard's updates")
+
+    async def async_run(self) -> None:
+        """Serve requests for the shard's devices until told to stop."""
+        loop = asyncio.get_event_loop()
+        if self.update_interval:
+            self._start(self._async_update(self.update_interval))
+
+        while True:
+            try:
+                message = await loop.run_in_executor(self._executor, self._conn.recv)
+            except EOFError:
+                break
+            if message[0] == MESSAGE_STOP:
+                break
+            await self._async_handle_message(message)
+
+        for task in list(self._tasks):
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        await self.fleet.async_close()
+
+        self._executor.shutdown(wait=False)
+        self._send_executor.shutdown(wait=True)
+        self._conn.close()
+
+
+def run_shard(
+    conn: Connection, ip_addresses: List[str], options: Dict[str, Any]
+) -> None:
+    """Run a shard (the entry point of every worker process)."""
+    loop = asyncio.new_event_loop()
+    asyncio.set_event_loop(loop)
+    try:
+        loop.run_until_complete(ShardWorker(conn, ip_addresses, options).async_run())
+    finally:
+        loop.close()
+
+
+class ShardedCommandAPI:
+    """Define a CommandAPI whose calls run in the device's shard."""
+
+    def __init__(self, async_call: Callable[..., Any]) -> None:
+        """Initialize."""
+        self._async_call = async_call
+
+    async def async_get_command_list(self) -> List[str]:
+        """Get the list of commands supported by the device."""
+        return cast(
+            List[str], await self._async_call("command", "async_get_command_list")
+        )
+
+    async def async_get_command_action_list(self, command: str) -> List[str]:
+        """Get the list of actions that a command can trigger."""
+        return cast(
+            List[str],
+            await self._async_call("command", "async_get_command_action_list", command),
+        )
+
+    async def async_send_command(
+        self,
+        command: str,
+        action: str,
+        *,
+        operand: Optional[str] = None,
+        validate: Optional[bool] = None,
+    ) -> Dict[str, Any]:
+        """Send a command/action (plus optional parameter)."""
+        return cast(
+            Dict[str, Any],
+            await self._async_call(
+                "command",
+                "async_send_command",
+                command,
+                action,
+                operand=operand,
+                validate=validate,
+            ),
+        )
+
+    async def async_send_ir_code(
+        self, code: IRCode, *, action: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """Send an IR code, encoding the operand for the given action."""
+        return cast(
+            Dict[str, Any],
+            await self._async_call(
+                "command", "async_send_ir_code", code, action=action
+            ),
+        )
+
+
+class ShardedSensorAPI:
+    """Define a SensorAPI whose calls run in the device's shard."""
+
+    def __init__(self, async_call: Callable[..., Any]) -> None:
+        """Initialize."""
+        self._async_call = async_call
+
+    async def async_get_sensor_list(self) -> List[str]:
+        """Get the list of sensors supported by the device."""
+        return cast(
+            List[str], await self._async_call("sensor", "async_get_sensor_list")
+        )
+
+    async def async_get_sensor_reading(
+        self, sensor: str, *, validate: Optional[bool] = None
+    ) -> SensorValue:
+        """Get the latest value of a particular sensor as a typed model."""
+        return cast(
+            SensorValue,
+            await self._async_call(
+                "sensor", "async_get_sensor_reading", sensor, validate=validate
+            ),
+        )
+
+    async def async_get_sensor_value(
+        self, sensor: str, *, validate: Optional[bool] = None
+    ) -> Dict[str, Any]:
+        """Get the latest value of a particular sensor."""
+        return cast(
+            Dict[str, Any],
+            await self._async_call(
+                "sensor", "async_get_sensor_value", sensor, validate=validate
+            ),
+        )
+
+
+class ShardedDevice:
+    """Define the parent-side handle of a device that lives in a shard.
+
+    It mirrors a Device: ``command`` and ``sensor`` offer the same methods (run in
+    the shard), and the info snapshot is kept up to date by the shard (with
+    subscribers to ``info_events`` hearing about changed fields).
+    """
+
+    def __init__(self, fleet: "ShardedFleet", ip_address: str, shard: int) -> None:
+        """Initialize."""
+        self._fleet = fleet
+        self._info: Optional[DeviceInfo] = None
+        self.command = ShardedCommandAPI(self._async_call)
+        self.info_events = DeviceInfoEvents()
+        self.ip_address = ip_address
+        self.sensor = ShardedSensorAPI(self._async_call)
+        self.shard = shard
+
+    def __repr__(self) -> str:
+        """Return a string representation of the device."""
+        return f"<ShardedDevice ip_address={self.ip_address} shard={self.shard}>"
+
+    @property
+    def device_id(self) -> str:
+        """Return the device id."""
+        return self.info.device_id
+
+    @property
+    def device_mode(self) -> str:
+        """Return the device mode."""
+        return self.info.device_mode
+
+    @property
+    def eco_mode_enabled(self) -> bool:
+        """Return whether the device has Eco mode enabled."""
+        return self.info.eco_mode_enabled
+
+    @property
+    def firmware(self) -> str:
+        """Return the device firmware."""
+        return self.info.firmware
+
+    @property
+    def homekit_enabled(self) -> bool:
+        """Return whether the device is HomeKit-enabled."""
+        return self.info.homekit_enabled
+
+    @property
+    def info(self) -> DeviceInfo:
+        """Return the latest snapshot of the device's info."""
+        if self._info is None:
+            raise LookInError("Device info hasn't been loaded yet")
+        return self._info
+
+    @property
+    def internal_temp_c(self) -> int:
+        """Return the device's internal temperature in C."""
+        return self.info.internal_temp_c
+
+    @property
+    def mrdc(self) -> str:
+        """Return the MRDC (?)."""
+        return self.info.mrdc
+
+    @property
+    def name(self) -> str:
+        """Return the name."""
+        return self.info.name
+
+    @property
+    def power_mode(self) -> str:
+        """Return the power mode."""
+        return self.info.power_mode
+
+    @property
+    def status(self) -> str:
+        """Return the status."""
+        return self.info.status
+
+    @property
+    def type(self) -> str:
+        """Return the device type."""
+        return self.info.type
+
+    @property
+    def voltage(self) -> int:
+        """Return the current voltage in millivolts."""
+        return self.info.voltage
+
+    async def _async_call(
+        self, target: str, method: str, *args: Any, **kwargs: Any
+    ) -> Any:
+        """Call a device method in the device's shard."""
+        return await self._fleet.async_call(self, target, method, args, kwargs)
+
+    async def async_update_device_info(self) -> Tuple[str, ...]:
+        """Get the latest device info (returning the names of the changed fields)."""
+        update = await self._async_call("device", "async_update_device_info")
+        self._fleet.apply_update(update)
+        return cast(Tuple[str, ...], update[2])
+
+
+class ShardedFleet:
+    """Define a fleet whose devices are partitioned over worker processes.
+
+    Every shard is a process with its own event loop, transport and DeviceFleet;
+    devices are assigned to shards by a stable hash of their IP address. Calls
+    are routed to the owning shard over a pipe, and if ``update_interval`` is
+    set, every shard refreshes its devices that often and streams back only the
+    info that changed (which subscribers are told about).
+    """
+
+    def __init__(
+        self,
+        ip_addresses: Iterable[str] = (),
+        *,
+        processes: Optional[int] = None,
+        max_concurrency: int = DEFAULT_MAX_CONCURRENCY,
+        cache_ttl: Optional[float] = DEFAULT_CACHE_TTL,
+        validate: bool = True,
+        update_interval: Optional[float] = None,
+    ) -> None:
+        """Initialize."""
+        self._conns: List[Connection] = []
+        self._devices: Dict[str, ShardedDevice] = {}
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._send_executors: List[ThreadPoolExecutor] = []
+        self._stopped_shards: Set[int] = set()
+        self._options = {
+            "cache_ttl": cache_ttl,
+            "max_concurrency": max_concurrency,
+            "update_interval": update_interval,
+            "validate": validate,
+        }
+        self._pending: Dict[int, Tuple[int, "asyncio.Future[Any]"]] = {}
+        self._processes: List[multiprocessing.process.BaseProcess] = []
+        self._readers: List["asyncio.Task[None]"] = []
+        self._request_ids = itertools.count()
+        self._subscriptions: List[ShardInfoCallback] = []
+        self.shards = processes or os.cpu_count() or 1
+
+        for ip_address in ip_addresses:
+            self.add(ip_address)
+
+    def __contains__(self, ip_address: str) -> bool:
+        """Return whether the fleet contains a device."""
+        return ip_address in self._devices
+
+    def __iter__(self) -> Iterator[ShardedDevice]:
+        """Iterate over the devices in the fleet."""
+        return iter(list(self._devices.values()))
+
+    def __len__(self) -> int:
+        """Return the number of devices in the fleet."""
+        return len(self._devices)
+
+    async def __aenter__(self) -> "ShardedFleet":
+        """Enter the fleet's context (starting its shards)."""
+        await self.async_start()
+        return self
+
+    async def __aexit__(
+        self,
+        exc_type: Optional[Type[BaseException]],
+        exc_val: Optional[BaseException],
+        exc_tb: Optional[TracebackType],
+    ) -> None:
+        """Exit the fleet's context (stopping its shards)."""
+        await self.async_stop()
+
+    @property
+    def started(self) -> bool:
+        """Return whether the shards are running."""
+        return bool(self._conns)
+
+    def _send(self, shard: int, message: Tuple) -> "asyncio.Future[None]":
+        """Send a message to a shard (without blocking the event loop).
+
+        Every shard has its own sending thread, so messages to a shard stay in
+        order and a shard that falls behind doesn't hold up the others.
+        """
+        if not self._conns:
+            raise LookInError("The sharded fleet isn't running")
+        if shard in self._stopped_shards:
+            raise RequestError(f"Shard {shard} stopped")
+        return asyncio.get_event_loop().run_in_executor(
+            self._send_executors[shard], self._conns[shard].send, message
+        )
+
+    def _send_nowait(self, shard: int, message: Tuple) -> None:
+        """Send a message to a shard without waiting for it to be sent."""
+        self._send(shard, message).add_done_callback(
+            partial(_log_send_error, shard, message[0])
+        )
+
+    def add(self, ip_address: str) -> ShardedDevice:
+        """Add a device to the fleet (returning the existing one if present)."""
+        if ip_address not in self._devices:
+            shard = get_shard(ip_address, self.shards)
+            self._devices[ip_address] = ShardedDevice(self, ip_address, shard)
+            if self._conns:
+                self._send_nowait(shard, (MESSAGE_ADD, ip_address))
+        return self._devices[ip_address]
+
+    def apply_update(self, update: InfoUpdate) -> None:
+        """Apply an info update from a shard (telling subscribers what changed)."""
+        ip_address, info, changed_fields, error = update
+        device = self._devices.get(ip_address)
+        if device is None or error is not None or info is None:
+            return
+
+        previous = device._info
+        device._info = info
+        if not changed_fields:
+            return
+
+        if device.info_events:
+            device.info_events.dispatch(device, previous, info, changed_fields)
+        for callback in list(self._subscriptions):
+            try:
+                callback(device, changed_fields)
+            except Exception:  # pylint: disable=broad-except
+                LOGGER.exception("Error in sharded fleet callback for %s", device)
+
+    def get(self, ip_address: str) -> Optional[ShardedDevice]:
+        """Return the device at an IP address (if it is part of the fleet)."""
+        return self._devices.get(ip_address)
+
+    def remove(self, ip_address: str) -> None:
+        """Remove a device from the fleet."""
+        device = self._devices.pop(ip_address, None)
+        if device is not None and self._conns:
+            self._send_nowait(device.shard, (MESSAGE_REMOVE, ip_address))
+
+    def subscribe(self, callback: ShardInfoCallback) -> Callable[[], None]:
+        """Subscribe to info changes streamed back from the shards."""
+        return add_subscription(self._subscriptions, callback)
+
+    def _handle_message(self, message: Tuple) -> None:
+        """Handle a message from a shard."""
+        if message[0] == MESSAGE_RESULT:
+            _, request_id, data, error = message
+            entry = self._pending.pop(request_id, None)
+            if entry is None or entry[1].done():
+                return
+            if error is not None:
+                entry[1].set_exception(error)
+            else:
+                entry[1].set_result(data)
+        elif message[0] == MESSAGE_INFOS:
+            for update in message[1]:
+                self.apply_update(update)
+
+    async def _async_read(self, shard: int) -> None:
+        """Handle the messages that a shard sends back."""
+        loop = asyncio.get_event_loop()
+        conn = self._conns[shard]
+
+        while True:
+            try:
+                message = await loop.run_in_executor(self._executor, conn.recv)
+                self._handle_message(message)
+            except (EOFError, OSError):
+                break
+            except asyncio.CancelledError:
+                raise
+            except Exception:  # pylint: disable=broad-except
+                # The stream can't be trusted after a message that can't be read, so
+                # the shard is treated as dead:
+                LOGGER.exception("Unable to handle a message from shard %s", shard)
+                self._processes[shard].terminate()
+                break
+
+        self._stopped_shards.add(shard)
+        for request_id, (request_shard, future) in list(self._pending.items()):
+            if request_shard == shard:
+                del self._pending[request_id]
+                if not future.done():
+                    future.set_exception(RequestError(f"Shard {shard} stopped"))
+
+    async def _async_request(self, shard: int, message: Tuple) -> Any:
+        """Send a request to a shard and wait for its result."""
+        request_id = next(self._request_ids)
+        future: "asyncio.Future[Any]" = asyncio.get_event_loop().create_future()
+        self._pending[request_id] = (shard, future)
+        try:
+            try:
+                await self._send(shard, (message[0], request_id, *message[1:]))
+            except OSError as err:
+                raise RequestError(f"Shard {shard} stopped") from err
+            return await future
+        finally:
+            self._pending.pop(request_id, None)
+
+    async def async_call(
+        self,
+        device: ShardedDevice,
+        target: str,
+        method: str,
+        args: Tuple,
+        kwargs: Dict[str, Any],
+    ) -> Any:
+        """Call a device method in the device's shard."""
+        return await self._async_request(
+            device.shard,
+            (MESSAGE_CALL, device.ip_address, target, method, args, kwargs),
+        )
+
+    async def async_start(self) -> None:
+        """Start a worker process for every shard."""
+        if self._conns:
+            return
+
+        # Forking a process with a running event loop isn't safe:
+        context = multiprocessing.get_context("spawn")
+        self._executor = ThreadPoolExecutor(self.shards)
+        self._send_executors = [ThreadPoolExecutor(1) for _ in range(self.shards)]
+        self._stopped_shards.clear()
+
+        assignments: List[List[str]] = [[] for _ in range(self.shards)]
+        for device in self._devices.values():
+            assignments[device.shard].append(device.ip_address)
+
+        for ip_addresses in assignments:
+            conn, child_conn = context.Pipe()
+            process = context.Process(
+                target=run_shard,
+                args=(child_conn, ip_addresses, dict(self._options)),
+                daemon=True,
+            )
+            process.start()
+            child_conn.close()
+            self._conns.append(conn)
+            self._processes.append(process)
+
+        self._readers = [
+            asyncio.ensure_future(self._async_read(shard))
+            for shard in range(self.shards)
+        ]
+
+    async def async_stop(self) -> None:
+        """Stop every shard."""
+        if not self._conns:
+            return
+
+        loop = asyncio.get_event_loop()
+        for shard in range(self.shards):
+            try:
+                await self._send(shard, (MESSAGE_STOP,))
+            except (OSError, RequestError):
+                pass
+
+        await asyncio.gather(*self._readers, return_exceptions=True)
+        for process in self._processes:
+            await loop.run_in_executor(self._executor, process.join, 5)
+            if process.is_alive():
+                process.terminate()
+        for conn in self._conns:
+            conn.close()
+
+        assert self._executor
+        self._executor.shutdown(wait=False)
+        for executor in self._send_executors:
+            executor.shutdown(wait=False)
+        self._conns = []
+        self._executor = None
+        self._send_executors = []
+        self._processes = []
+        self._readers = []
+
+    async def _async_refresh_shard(self, shard: int) -> List[FleetResult]:
+        """Refresh the info of every device in a shard."""
+        try:
+            updates = await self._async_request(shard, (MESSAGE_REFRESH,))
+        except asyncio.CancelledError:
+            raise
+        except Exception as err:  # pylint: disable=broad-except
+            LOGGER.debug("Unable to refresh shard %s: %s", shard, err)
+            return [
+                FleetResult(device, error=err)
+                for device in self._devices.values()
+                if device.shard == shard
+            ]
+
+        results = []
+        for update in updates:
+            device = self._devices.get(update[0])
+            if device is None:
+                continue
+            self.apply_update(update)
+            results.append(FleetResult(device, data=update[2], error=update[3]))
+        return results
+
+    async def async_update_device_info(self) -> AsyncIterator[FleetResult]:
+        """Refresh the info of every device, yielding results as shards finish.
+
+        Like DeviceFleet, errors are isolated per device (a shard that fails as a
+        whole fails every one of its devices), and the data of every successful
+        result holds the names of the changed fields.
+        """
+        tasks = [
+            asyncio.ensure_future(self._async_refresh_shard(shard))
+            for shard in range(self.shards)
+        ]
+
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                for result in await next_done:
+                    yield result
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
@@ -0,0 +1,19 @@
+"""Define helpers for persisting state to disk."""
+import json
+import os
+import tempfile
+from typing import Any
+
+
+def write_json_atomic(path: str, data: Any) -> None:
+    """Write compact JSON to a file, atomically replacing any existing file."""
+    fd, tmp_path = tempfile.mkstemp(
+        dir=os.path.dirname(os.path.abspath(path)), suffix=".tmp"
+    )
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as fptr:
+            json.dump(data, fptr, separators=(",", ":"))
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
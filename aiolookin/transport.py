@@ -0,0 +1,118 @@
+"""Define a pooled, keep-alive HTTP transport that devices can own or share."""
+from types import TracebackType
+from typing import Optional, Type
+
+from aiohttp import ClientSession, ClientTimeout, TCPConnector
+
+from .const import DEFAULT_TIMEOUT
+from .decoder import DEFAULT_JSON_DECODER, JSONDecoder
+from .errors import RequestError
+from .instrumentation import Instrumentation
+from .ratelimit import TokenBucket
+
+DEFAULT_KEEPALIVE_TIMEOUT = 30
+DEFAULT_LIMIT = 100
+
+# LOOK.in devices are ESP32-based and only service a single socket at a time well:
+DEFAULT_LIMIT_PER_HOST = 1
+
+
+class Transport:
+    """Define an HTTP transport built around a single, pooled ClientSession.
+
+    If an existing ClientSession is provided, it is used (but never closed) by the
+    transport, and requests fail once it is closed; otherwise, the transport lazily
+    creates (and owns) a session whose connector keeps sockets alive between calls,
+    which must be released with ``async_close()``.
+
+    If instrumentation is provided, every request made through the transport is
+    measured; only sessions created by the transport report per-phase timings.
+
+    Response bodies are decoded with ``json_decoder`` (by default, the fastest
+    decoder installed).
+
+    If a rate limiter is provided, it bounds the combined rate of requests made by
+    every device that uses the transport.
+    """
+
+    def __init__(
+        self,
+        *,
+        session: Optional[ClientSession] = None,
+        keepalive_timeout: float = DEFAULT_KEEPALIVE_TIMEOUT,
+        limit: int = DEFAULT_LIMIT,
+        limit_per_host: int = DEFAULT_LIMIT_PER_HOST,
+        timeout: float = DEFAULT_TIMEOUT,
+        instrumentation: Optional[Instrumentation] = None,
+        json_decoder: JSONDecoder = DEFAULT_JSON_DECODER,
+        rate_limiter: Optional[TokenBucket] = None,
+    ) -> None:
+        """Initialize."""
+        self._external_session = session
+        self.instrumentation = instrumentation
+        self.json_decoder = json_decoder
+        self.rate_limiter = rate_limiter
+        self._keepalive_timeout = keepalive_timeout
+        self._limit = limit
+        self._limit_per_host = limit_per_host
+        self._session: Optional[ClientSession] = None
+        self._timeout = timeout
+
+    async def __aenter__(self) -> "Transport":
+        """Enter the transport's context."""
+        return self
+
+    async def __aexit__(
+        self,
+        exc_type: Optional[Type[BaseException]],
+        exc_val: Optional[BaseException],
+        exc_tb: Optional[TracebackType],
+    ) -> None:
+        """Exit the transport's context."""
+        await self.async_close()
+
+    @property
+    def closed(self) -> bool:
+        """Return whether the transport has no open session."""
+        if self._external_session is not None:
+            return self._external_session.closed
+        return self._session is None or self._session.closed
+
+    @property
+    def limit(self) -> int:
+        """Return the most connections the transport opens at once (0 for no limit)."""
+        if self._external_session is not None:
+            connector = self._external_session.connector
+            return connector.limit if connector is not None else 0
+        return self._limit
+
+    @property
+    def session(self) -> ClientSession:
+        """Return the session to use for the next request (creating it if needed)."""
+        if self._external_session is not None:
+            if self._external_session.closed:
+                raise RequestError("The provided ClientSession is closed")
+            return self._external_session
+
+        if self._session is None or self._session.closed:
+            self._session = ClientSession(
+                connector=TCPConnector(
+                    keepalive_timeout=self._keepalive_timeout,
+                    limit=self._limit,
+                    limit_per_host=self._limit_per_host,
+                ),
+                timeout=ClientTimeout(total=self._timeout),
+                trace_configs=(
+                    [self.instrumentation.trace_config]
+                    if self.instrumentation
+                    else None
+                ),
+            )
+
+        return self._session
+
+    async def async_close(self) -> None:
+        """Close the session owned by the transport (if one exists)."""
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
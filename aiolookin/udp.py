@@ -0,0 +1,273 @@
+"""Define a listener for the UDP notifications that devices broadcast."""
+import asyncio
+import socket
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple, cast
+
+from .const import LOGGER
+from .device import Device
+from .errors import LookInError
+from .events import add_subscription
+
+UDP_PORT = 61201
+
+EVENT_TYPE_ALIVE = "alive"
+EVENT_TYPE_UPDATED = "updated"
+
+MESSAGE_PREFIX_MAP = {
+    "LOOK.in:Alive!": EVENT_TYPE_ALIVE,
+    "LOOK.in:Updated!": EVENT_TYPE_UPDATED,
+}
+
+SENSOR_ID_MAP = {
+    "87": "IR",
+    "FE": "Meteo",
+}
+
+
+class UDPEvent:
+    """Define a parsed UDP notification.
+
+    ``data`` is only populated when the listener refreshed the sensor over HTTP
+    in response to the notification.
+    """
+
+    __slots__ = (
+        "data",
+        "device_id",
+        "event_id",
+        "event_type",
+        "ip_address",
+        "sensor",
+        "value",
+    )
+
+    def __init__(
+        self,
+        event_type: str,
+        device_id: str,
+        ip_address: str,
+        *,
+        sensor: Optional[str] = None,
+        event_id: Optional[str] = None,
+        value: Optional[str] = None,
+        data: Optional[Dict[str, Any]] = None,
+    ) -> None:
+        """Initialize."""
+        self.data = data
+        self.device_id = device_id
+        self.event_id = event_id
+        self.event_type = event_type
+        self.ip_address = ip_address
+        self.sensor = sensor
+        self.value = value
+
+    def __repr__(self) -> str:
+        """Return a string representation of the event."""
+        return (
+            f"<UDPEvent type={self.event_type} id={self.device_id} "
+            f"sensor={self.sensor} value={self.value}>"
+        )
+
+
+def parse_datagram(data: bytes, addr: Tuple[str, int]) -> Optional[UDPEvent]:
+    """Parse a raw datagram into an event (returning None if it isn't one).
+
+    Notifications look like ``LOOK.in:Updated!<ID>:<sensor ID>:<event ID>:<value>``
+    or ``LOOK.in:Alive!<ID>:<...>``.
+    """
+    try:
+        content = data.decode("ascii").strip()
+    except UnicodeDecodeError:
+        return None
+
+    for prefix, event_type in MESSAGE_PREFIX_MAP.items():
+        if content.startswith(prefix):
+            break
+    else:
+        return None
+
+    fields = content[len(prefix) :].split(":")
+    device_id = fields[0]
+    if not device_id:
+        return None
+
+    if event_type == EVENT_TYPE_ALIVE:
+        return UDPEvent(event_type, device_id, addr[0])
+
+    if len(fields) < 3:
+        return None
+
+    sensor_id = fields[1].upper()
+    return UDPEvent(
+        event_type,
+        device_id,
+        addr[0],
+        sensor=SENSOR_ID_MAP.get(sensor_id, sensor_id),
+        event_id=fields[2],
+        value=fields[3] if len(fields) > 3 else None,
+    )
+
+
+class _UDPProtocol(asyncio.DatagramProtocol):
+    """Define the datagram protocol that feeds the listener."""
+
+    def __init__(self, listener: "UDPListener") -> None:
+        """Initialize."""
+        self._listener = listener
+
+    def datagram_received(self, data: bytes, addr: Tuple[str, int]) -> None:
+        """Handle a received datagram."""
+        event = parse_datagram(data, addr)
+        if event is None:
+            LOGGER.debug("Ignoring unknown datagram from %s: %s", addr[0], data)
+            return
+        self._listener.handle_event(event)
+
+
+class UDPListener:
+    """Define a listener that dispatches device notifications to subscribers.
+
+    When a device is registered, "updated" notifications for one of its sensors
+    trigger an HTTP refresh of that sensor, and subscribers receive the event once
+    the fresh data is attached.
+    """
+
+    def __init__(self, *, host: str = "0.0.0.0", port: int = UDP_PORT) -> None:
+        """Initialize."""
+        self._devices: Dict[str, Device] = {}
+        self._host = host
+        # Refreshes in flight, with the latest notification that arrived meanwhile:
+        self._pending_refreshes: Dict[Tuple[str, str], Optional[UDPEvent]] = {}
+        self._port = port
+        self._subscriptions: List[
+            Tuple[Optional[str], Optional[str], Callable[[UDPEvent], None]]
+        ] = []
+        self._tasks: Set["asyncio.Task[None]"] = set()
+        self._transport: Optional[asyncio.DatagramTransport] = None
+
+    async def __aenter__(self) -> "UDPListener":
+        """Start the listener upon entering its context."""
+        await self.async_start()
+        return self
+
+    async def __aexit__(self, *_: Any) -> None:
+        """Stop the listener upon exiting its context."""
+        await self.async_stop()
+
+    @property
+    def port(self) -> int:
+        """Return the port the listener is bound to."""
+        if self._transport is None:
+            return self._port
+        return cast(int, self._transport.get_extra_info("sockname")[1])
+
+    async def _async_refresh_and_dispatch(
+        self, device: Device, event: UDPEvent
+    ) -> None:
+        """Refresh a sensor over HTTP and dispatch the event with its data.
+
+        If more notifications arrive while the refresh is in flight, the sensor is
+        refreshed once more afterwards (for the latest of them).
+        """
+        key = (event.device_id, cast(str, event.sensor))
+        try:
+            while True:
+                try:
+                    event.data = await device.sensor.async_get_sensor_value(
+                        cast(str, event.sensor)
+                    )
+                except LookInError as err:
+                    LOGGER.warning(
+                        "Unable to refresh %s after a notification: %s", key, err
+                    )
+                self._dispatch(event)
+
+                next_event = self._pending_refreshes.get(key)
+                if next_event is None:
+                    break
+                self._pending_refreshes[key] = None
+                event = next_event
+        finally:
+            self._pending_refreshes.pop(key, None)
+
+    def _dispatch(self, event: UDPEvent) -> None:
+        """Dispatch an event to matching subscribers."""
+        for device_id, sensor, callback in list(self._subscriptions):
+            if device_id is not None and device_id != event.device_id:
+                continue
+            if sensor is not None and sensor != event.sensor:
+                continue
+            try:
+                callback(event)
+            except Exception:  # pylint: disable=broad-except
+                LOGGER.exception("Error in UDP event callback for %s", event)
+
+    def handle_event(self, event: UDPEvent) -> None:
+        """Handle a parsed event."""
+        device = self._devices.get(event.device_id)
+
+        if (
+            event.event_type != EVENT_TYPE_UPDATED
+            or device is None
+            or event.sensor not in SENSOR_ID_MAP.values()
+        ):
+            self._dispatch(event)
+            return
+
+        key = (event.device_id, cast(str, event.sensor))
+        if key in self._pending_refreshes:
+            # A refresh is already on its way, but it may predate this notification;
+            # mark the key dirty so that it is refreshed once more afterwards:
+            self._pending_refreshes[key] = event
+            return
+
+        self._pending_refreshes[key] = None
+        task = asyncio.ensure_future(self._async_refresh_and_dispatch(device, event))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    def register_device(self, device: Device) -> Callable[[], None]:
+        """Register an initialized device for notification-driven refreshes."""
+        device_id = device.device_id
+        self._devices[device_id] = device
+
+        def unregister() -> None:
+            """Unregister the device."""
+            self._devices.pop(device_id, None)
+
+        return unregister
+
+    def subscribe(
+        self,
+        callback: Callable[[UDPEvent], None],
+        *,
+        device_id: Optional[str] = None,
+        sensor: Optional[str] = None,
+    ) -> Callable[[], None]:
+        """Subscribe to events (optionally only for one device and/or sensor)."""
+        return add_subscription(self._subscriptions, (device_id, sensor, callback))
+
+    async def async_start(self) -> None:
+        """Start listening for datagrams."""
+        if self._transport is not None:
+            return
+
+        loop = asyncio.get_event_loop()
+        transport, _ = await loop.create_datagram_endpoint(
+            lambda: _UDPProtocol(self),
+            local_addr=(self._host, self._port),
+            reuse_port=hasattr(socket, "SO_REUSEPORT"),
+        )
+        self._transport = transport
+
+    async def async_stop(self) -> None:
+        """Stop listening and cancel any in-flight refreshes."""
+        if self._transport is not None:
+            self._transport.close()
+            self._transport = None
+
+        for task in list(self._tasks):
+            task.cancel()
+        if self._tasks:
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._pending_refreshes.clear()
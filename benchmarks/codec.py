@@ -0,0 +1,86 @@
+"""Benchmark bulk conversion of IR codes with the local codec engine."""
+
+import argparse
+import json
+import random
+import time
+from typing import Any, Callable, Dict, List
+
+from aiolookin.codec import (
+    DEFAULT_CACHE_SIZE,
+    IRCode,
+    decode_timings,
+    encode_operand,
+    encode_timings,
+    pronto_to_timings,
+)
+
+PROTOCOLS = ("nec1", "necx", "samsung36", "sony")
+
+
+def generate_codes(count: int, *, seed: int = 0) -> List[IRCode]:
+    """Generate random codes across every supported protocol."""
+    rng = random.Random(seed)
+    codes = []
+    for _ in range(count):
+        protocol = rng.choice(PROTOCOLS)
+        if protocol == "sony":
+            bits = rng.choice((12, 15, 20))
+            address = rng.randrange(1 << (bits - 7))
+            codes.append(IRCode(protocol, address, rng.randrange(128), bits))
+        else:
+            address = rng.randrange(0x100, 0x10000)
+            codes.append(IRCode(protocol, address, rng.randrange(256)))
+    return codes
+
+
+def measure(name: str, func: Callable[[Any], Any], items: List[Any]) -> Dict[str, Any]:
+    """Time a function applied to every item in a batch."""
+    start = time.perf_counter()
+    for item in items:
+        func(item)
+    elapsed = time.perf_counter() - start
+    return {
+        "name": name,
+        "count": len(items),
+        "seconds": elapsed,
+        "per_second": len(items) / elapsed if elapsed else None,
+    }
+
+
+def encode_pronto(code: IRCode) -> str:
+    """Encode a code as a ProntoHex operand."""
+    return encode_operand(code, "prontohex")
+
+
+def main() -> None:
+    """Run the benchmark and print machine-readable results."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--count", type=int, default=10000)
+    args = parser.parse_args()
+
+    codes = generate_codes(args.count)
+    # "Hot" buttons: a working set that fits in the operand cache, sent repeatedly:
+    hot_codes = codes[: DEFAULT_CACHE_SIZE // 2] * 4
+
+    encode_timings.cache_clear()
+    encode_operand.cache_clear()
+    results = [
+        measure("encode_timings_cold", encode_timings, codes),
+        measure("encode_prontohex_cold", encode_pronto, codes),
+        measure("encode_prontohex_hot", encode_pronto, hot_codes),
+        measure("encode_signal_hot", encode_operand, hot_codes),
+    ]
+
+    encode_timings.cache_clear()
+    encode_operand.cache_clear()
+    captures = [encode_timings.__wrapped__(code) for code in codes]
+    prontos = [encode_pronto(code) for code in codes]
+    results.append(measure("decode_timings", decode_timings, captures))
+    results.append(measure("decode_prontohex", pronto_to_timings, prontos))
+
+    print(json.dumps({"benchmark": "codec", "results": results}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+"""Benchmark decoding the fixture payloads with every available JSON decoder."""
+import argparse
+import asyncio
+import json
+import os
+import time
+from typing import Any, Dict, List
+
+from aiolookin import Device
+from aiolookin.decoder import JSONDecoder, get_json_decoder
+from aiolookin.emulator import DeviceEmulator
+
+DECODER_NAMES = ("json", "orjson", "ujson")
+
+FIXTURES_PATH = os.path.join(os.path.dirname(__file__), "..", "tests", "fixtures")
+
+
+def load_payloads() -> Dict[str, bytes]:
+    """Load the raw bytes of every fixture."""
+    payloads = {}
+    for filename in sorted(os.listdir(FIXTURES_PATH)):
+        with open(os.path.join(FIXTURES_PATH, filename), "rb") as fptr:
+            payloads[filename] = fptr.read()
+    return payloads
+
+
+def get_decoders() -> Dict[str, JSONDecoder]:
+    """Return every decoder that is installed."""
+    decoders = {}
+    for name in DECODER_NAMES:
+        try:
+            decoders[name] = get_json_decoder(name)
+        except ImportError:
+            continue
+    return decoders
+
+
+def measure_decode(
+    name: str, decoder: JSONDecoder, payloads: Dict[str, bytes], count: int
+) -> Dict[str, Any]:
+    """Time decoding every payload ``count`` times."""
+    bodies = list(payloads.values())
+    start = time.perf_counter()
+    for _ in range(count):
+        for body in bodies:
+            decoder(body)
+    elapsed = time.perf_counter() - start
+    total = count * len(bodies)
+    return {
+        "name": f"decode_{name}",
+        "count": total,
+        "seconds": elapsed,
+        "per_second": total / elapsed if elapsed else None,
+    }
+
+
+async def async_measure_requests(
+    name: str, decoder: JSONDecoder, count: int
+) -> Dict[str, Any]:
+    """Time sensor reads end to end (against an emulated device) with a decoder."""
+    async with DeviceEmulator(latency=0, jitter=0, update_interval=None) as emulator:
+        async with Device(
+            emulator.addresses[0], validate=False, json_decoder=decoder
+        ) as device:
+            start = time.perf_counter()
+            for _ in range(count):
+                await device.sensor.async_get_sensor_value("IR")
+            elapsed = time.perf_counter() - start
+    return {
+        "name": f"request_{name}",
+        "count": count,
+        "seconds": elapsed,
+        "per_second": count / elapsed if elapsed else None,
+    }
+
+
+def main() -> None:
+    """Run the benchmark and print machine-readable results."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--count", type=int, default=20000)
+    parser.add_argument("--requests", type=int, default=500)
+    args = parser.parse_args()
+
+    payloads = load_payloads()
+    decoders = get_decoders()
+    results: List[Dict[str, Any]] = [
+        measure_decode(name, decoder, payloads, args.count)
+        for name, decoder in decoders.items()
+    ]
+    for name, decoder in decoders.items():
+        results.append(
+            asyncio.run(async_measure_requests(name, decoder, args.requests))
+        )
+
+    print(json.dumps({"benchmark": "json_decode", "results": results}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,236 @@
+"""Run the benchmark suite against emulated devices (served by another process)."""
+import argparse
+import asyncio
+import json
+import multiprocessing
+from multiprocessing.connection import Connection
+import os
+import platform
+import statistics
+import sys
+import time
+import tracemalloc
+from types import TracebackType
+from typing import Any, Dict, List, Optional, Type
+
+from aiolookin import Device, Transport
+from aiolookin.emulator import DeviceEmulator
+from aiolookin.fleet import DeviceFleet
+
+FIXTURES_PATH = os.path.join(os.path.dirname(__file__), "..", "tests", "fixtures")
+
+
+def load_fixtures() -> Dict[str, Any]:
+    """Load every fixture payload (keyed by its name)."""
+    fixtures = {}
+    for filename in sorted(os.listdir(FIXTURES_PATH)):
+        with open(os.path.join(FIXTURES_PATH, filename), encoding="utf-8") as fptr:
+            fixtures[os.path.splitext(filename)[0]] = json.load(fptr)
+    return fixtures
+
+
+def apply_fixtures(emulator: DeviceEmulator, fixtures: Dict[str, Any]) -> None:
+    """Seed the state of every virtual device from the fixture payloads."""
+    device_info = fixtures["device_info"]
+    meteo_value = fixtures["meteo_sensor_value"]
+    for device in emulator.devices:
+        device.firmware = device_info["Firmware"]
+        device.voltage = int(device_info["CurrentVoltage"])
+        device.humidity = float(meteo_value["Humidity"])
+        device.temperature = float(meteo_value["Temperature"])
+        device.updated = int(meteo_value["Updated"])
+        device.ir_value = dict(fixtures["ir_sensor_value"])
+
+
+def serve_emulator(conn: Connection, options: Dict[str, Any]) -> None:
+    """Serve emulated devices until told to stop (in a separate process)."""
+
+    async def async_serve() -> None:
+        async with DeviceEmulator(**options) as emulator:
+            apply_fixtures(emulator, load_fixtures())
+            conn.send(emulator.addresses)
+            await asyncio.get_event_loop().run_in_executor(None, conn.recv)
+
+    asyncio.run(async_serve())
+    conn.close()
+
+
+class EmulatorProcess:
+    """Define emulated devices served by a separate process.
+
+    Keeping the emulator out of the benchmarked process means that its (server-side)
+    CPU time and allocations aren't counted against the client.
+    """
+
+    def __init__(self, **options: Any) -> None:
+        """Initialize."""
+        self._conn: Optional[Connection] = None
+        self._options = options
+        self._process: Optional[multiprocessing.process.BaseProcess] = None
+        self.addresses: List[str] = []
+
+    async def __aenter__(self) -> "EmulatorProcess":
+        """Start the emulator process (once it serves every device)."""
+        context = multiprocessing.get_context("spawn")
+        self._conn, child_conn = context.Pipe()
+        self._process = context.Process(
+            target=serve_emulator, args=(child_conn, self._options), daemon=True
+        )
+        self._process.start()
+        child_conn.close()
+        self.addresses = await asyncio.get_event_loop().run_in_executor(
+            None, self._conn.recv
+        )
+        return self
+
+    async def __aexit__(
+        self,
+        exc_type: Optional[Type[BaseException]],
+        exc_val: Optional[BaseException],
+        exc_tb: Optional[TracebackType],
+    ) -> None:
+        """Stop the emulator process."""
+        assert self._conn and self._process
+        self._conn.send(None)
+        await asyncio.get_event_loop().run_in_executor(None, self._process.join, 10)
+        if self._process.is_alive():
+            self._process.terminate()
+        self._conn.close()
+
+
+def percentiles(samples: List[float]) -> Dict[str, float]:
+    """Return latency percentiles (in milliseconds)."""
+    ordered = sorted(samples)
+
+    def pick(quantile: float) -> float:
+        return ordered[min(int(quantile * len(ordered)), len(ordered) - 1)] * 1000
+
+    return {
+        "p50_ms": pick(0.5),
+        "p90_ms": pick(0.9),
+        "p99_ms": pick(0.99),
+        "mean_ms": statistics.mean(ordered) * 1000,
+        "max_ms": ordered[-1] * 1000,
+    }
+
+
+async def async_bench_send_command(address: str, count: int) -> Dict[str, Any]:
+    """Measure command throughput, sequentially and through the command queue."""
+    results: Dict[str, Any] = {"count": count}
+
+    async with Device(address) as device:
+        start = time.perf_counter()
+        for index in range(count):
+            await device.command.async_send_command(
+                "IR", "nec1", operand=f"{index:08X}"
+            )
+        elapsed = time.perf_counter() - start
+        results["sequential_per_second"] = count / elapsed
+
+        start = time.perf_counter()
+        await asyncio.gather(
+            *(
+                device.command_queue.async_send("IR", "nec1", operand=f"{index:08X}")
+                for index in range(count)
+            )
+        )
+        elapsed = time.perf_counter() - start
+        results["queued_per_second"] = count / elapsed
+        results["cache_hits"] = device.cache.hits
+        results["cache_misses"] = device.cache.misses
+
+    return results
+
+
+async def async_bench_sensor_read(address: str, count: int) -> Dict[str, Any]:
+    """Measure sensor read latency."""
+    samples = []
+    async with Device(address) as device:
+        for _ in range(count):
+            start = time.perf_counter()
+            await device.sensor.async_get_sensor_value("Meteo")
+            samples.append(time.perf_counter() - start)
+    return {"count": count, **percentiles(samples)}
+
+
+async def async_bench_fleet(addresses: List[str], concurrency: int) -> Dict[str, Any]:
+    """Measure fleet initialization/refresh time and memory per device."""
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+
+    async with Transport(limit=concurrency) as transport:
+        fleet = DeviceFleet(addresses, transport=transport, max_concurrency=concurrency)
+
+        start = time.perf_counter()
+        initialized = [result async for result in fleet.async_initialize()]
+        initialize_seconds = time.perf_counter() - start
+
+        after = tracemalloc.take_snapshot()
+        tracemalloc.stop()
+
+        start = time.perf_counter()
+        refreshed = [result async for result in fleet.async_update_device_info()]
+        refresh_seconds = time.perf_counter() - start
+
+    allocated = sum(stat.size_diff for stat in after.compare_to(before, "filename"))
+    return {
+        "devices": len(addresses),
+        "concurrency": concurrency,
+        "initialize_seconds": initialize_seconds,
+        "initialize_failures": sum(not result.ok for result in initialized),
+        "refresh_seconds": refresh_seconds,
+        "refresh_failures": sum(not result.ok for result in refreshed),
+        "bytes_per_device": allocated / len(addresses),
+    }
+
+
+async def async_main(args: argparse.Namespace) -> Dict[str, Any]:
+    """Run every benchmark."""
+    emulator_kwargs = {
+        "latency": args.latency,
+        "jitter": args.jitter,
+        "failure_rate": args.failure_rate,
+        "update_interval": None,
+        "seed": 0,
+    }
+    results: Dict[str, Any] = {
+        "config": {**vars(args)},
+        "environment": {
+            "python": sys.version.split()[0],
+            "implementation": platform.python_implementation(),
+        },
+    }
+
+    async with EmulatorProcess(devices=1, **emulator_kwargs) as emulator:
+        address = emulator.addresses[0]
+        results["send_command"] = await async_bench_send_command(address, args.count)
+        results["sensor_read"] = await async_bench_sensor_read(address, args.count)
+
+    async with EmulatorProcess(devices=args.devices, **emulator_kwargs) as emulator:
+        results["fleet"] = await async_bench_fleet(emulator.addresses, args.concurrency)
+
+    return results
+
+
+def main() -> None:
+    """Run the suite and emit machine-readable results."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--count", type=int, default=200)
+    parser.add_argument("--devices", type=int, default=50)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--latency", type=float, default=0.005)
+    parser.add_argument("--jitter", type=float, default=0.002)
+    parser.add_argument("--failure-rate", type=float, default=0.0)
+    parser.add_argument("--output", help="write results to this file")
+    args = parser.parse_args()
+
+    results = asyncio.run(async_main(args))
+    output = json.dumps(results, indent=2, sort_keys=True)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as fptr:
+            fptr.write(output)
+    print(output)
+
+
+if __name__ == "__main__":
+    main()
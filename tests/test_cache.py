@@ -0,0 +1,117 @@
+"""Define tests for the capability cache."""
+from unittest.mock import patch
+
+import pytest
+
+from aiolookin.cache import CapabilityCache
+
+
+@pytest.mark.asyncio
+async def test_cache_hits_and_misses():
+    """Test that values are fetched once and then served from the cache."""
+    calls = []
+
+    async def async_fetch():
+        calls.append(1)
+        return ["IR", "Meteo"]
+
+    cache = CapabilityCache(ttl=60)
+    assert await cache.async_get("sensors", async_fetch) == ["IR", "Meteo"]
+    assert await cache.async_get("sensors", async_fetch) == ["IR", "Meteo"]
+    assert len(calls) == 1
+    assert cache.hits == 1
+    assert cache.misses == 1
+    assert "sensors" in cache
+
+    cache.reset_stats()
+    assert cache.hits == 0
+    assert cache.misses == 0
+
+
+@pytest.mark.asyncio
+async def test_cache_expiration():
+    """Test that entries expire after the TTL."""
+
+    async def async_fetch():
+        return ["IR"]
+
+    cache = CapabilityCache(ttl=60)
+    with patch("aiolookin.cache.time.monotonic", return_value=100.0):
+        await cache.async_get("commands", async_fetch)
+    with patch("aiolookin.cache.time.monotonic", return_value=159.0):
+        assert "commands" in cache
+    with patch("aiolookin.cache.time.monotonic", return_value=160.0):
+        assert "commands" not in cache
+
+
+@pytest.mark.asyncio
+async def test_cache_invalidation():
+    """Test invalidating single entries and the whole cache."""
+
+    async def async_fetch():
+        return ["IR"]
+
+    cache = CapabilityCache(ttl=None)
+    await cache.async_get("commands", async_fetch)
+    await cache.async_get("sensors", async_fetch)
+
+    cache.invalidate("commands")
+    assert "commands" not in cache
+    assert "sensors" in cache
+
+    cache.invalidate()
+    assert "sensors" not in cache
+
+
+@pytest.mark.asyncio
+async def test_cache_disabled():
+    """Test that a TTL of zero never stores anything."""
+
+    async def async_fetch():
+        return ["IR"]
+
+    cache = CapabilityCache(ttl=0)
+    await cache.async_get("commands", async_fetch)
+    await cache.async_get("commands", async_fetch)
+    assert cache.hits == 0
+    assert cache.misses == 2
+
+
+@pytest.mark.asyncio
+async def test_cache_returns_copies():
+    """Test that callers never get the cached list itself."""
+
+    async def async_fetch():
+        return ["IR"]
+
+    cache = CapabilityCache(ttl=None)
+    value = await cache.async_get("commands", async_fetch)
+    value.append("Fake")
+    assert await cache.async_get("commands", async_fetch) == ["IR"]
+
+
+@pytest.mark.asyncio
+async def test_cache_contains_refetches_once():
+    """Test that a cached list lacking an item is refetched once."""
+    calls = []
+    value = ["IR"]
+
+    async def async_fetch():
+        calls.append(1)
+        return value
+
+    cache = CapabilityCache(ttl=None)
+    assert await cache.async_contains("commands", "IR", async_fetch)
+    assert len(calls) == 1
+
+    # A command learned after the list was cached:
+    value = ["IR", "Learned"]
+    assert await cache.async_contains("commands", "Learned", async_fetch)
+    assert len(calls) == 2
+
+    # A refetched miss is only refetched once, and a fresh miss isn't refetched:
+    assert not await cache.async_contains("commands", "Fake", async_fetch)
+    assert len(calls) == 3
+    cache.invalidate()
+    assert not await cache.async_contains("commands", "Fake", async_fetch)
+    assert len(calls) == 4
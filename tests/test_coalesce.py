@@ -0,0 +1,101 @@
+"""Define tests for single-flight request coalescing."""
+import asyncio
+import json
+from unittest.mock import patch
+
+import aiohttp
+import pytest
+
+from aiolookin import Device
+from aiolookin.coalesce import RequestCoalescer
+
+from .common import TEST_IP_ADDRESS
+
+
+@pytest.mark.asyncio
+async def test_concurrent_calls_share_a_result():
+    """Test that concurrent calls for the same key share a single call."""
+    calls = []
+
+    async def async_fetch():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return {"ok": True}
+
+    coalescer = RequestCoalescer()
+    results = await asyncio.gather(
+        *(coalescer.async_run("device", async_fetch) for _ in range(5)),
+        coalescer.async_run("sensors", async_fetch),
+    )
+    assert results == [{"ok": True}] * 6
+    assert len(calls) == 2
+    assert coalescer.requests == 6
+    assert coalescer.collapsed == 4
+    assert coalescer.in_flight == 0
+
+    # Without a freshness window, later calls go through again:
+    await coalescer.async_run("device", async_fetch)
+    assert len(calls) == 3
+
+
+@pytest.mark.asyncio
+async def test_freshness_window():
+    """Test that results are reused within the freshness window."""
+    calls = []
+
+    async def async_fetch():
+        calls.append(1)
+        return len(calls)
+
+    coalescer = RequestCoalescer(freshness_window=5)
+    with patch("aiolookin.coalesce.time.monotonic", return_value=100.0):
+        assert await coalescer.async_run("device", async_fetch) == 1
+    with patch("aiolookin.coalesce.time.monotonic", return_value=104.0):
+        assert await coalescer.async_run("device", async_fetch) == 1
+        assert coalescer.reused == 1
+    with patch("aiolookin.coalesce.time.monotonic", return_value=105.0):
+        assert await coalescer.async_run("device", async_fetch) == 2
+
+    coalescer.invalidate()
+    assert await coalescer.async_run("device", async_fetch) == 3
+
+
+@pytest.mark.asyncio
+async def test_cancelled_caller_does_not_cancel_others():
+    """Test that cancelling one caller leaves the shared call running."""
+
+    async def async_fetch():
+        await asyncio.sleep(0.01)
+        return "done"
+
+    coalescer = RequestCoalescer()
+    first = asyncio.ensure_future(coalescer.async_run("device", async_fetch))
+    second = asyncio.ensure_future(coalescer.async_run("device", async_fetch))
+    await asyncio.sleep(0)
+    first.cancel()
+
+    assert await second == "done"
+    assert first.cancelled()
+
+
+@pytest.mark.asyncio
+async def test_device_coalesces_gets(aresponses, device_info):
+    """Test that a device sends concurrent identical GETs only once."""
+    aresponses.add(
+        TEST_IP_ADDRESS,
+        "/device",
+        "get",
+        aresponses.Response(
+            text=json.dumps(device_info),
+            status=200,
+            headers={"Content-Type": "application/json; charset=utf-8"},
+        ),
+    )
+
+    async with aiohttp.ClientSession() as session:
+        device = Device(TEST_IP_ADDRESS, session=session)
+        await asyncio.gather(*(device.async_update_device_info() for _ in range(3)))
+        assert device.device_id == "ABCD1234"
+        assert device.coalescer.collapsed == 2
+
+    aresponses.assert_plan_strictly_followed()
@@ -0,0 +1,81 @@
+"""Define tests for the IR codec engine."""
+import pytest
+
+from aiolookin.codec import (
+    IRCode,
+    decode_timings,
+    encode_operand,
+    encode_timings,
+    pronto_to_timings,
+    timings_to_pronto,
+)
+from aiolookin.errors import CommandError
+from aiolookin.ir import IRCapture
+
+
+def test_decode_captured_nec(ir_sensor_value):
+    """Test decoding the IR sensor's raw capture into its protocol code."""
+    capture = IRCapture.from_sensor_value(ir_sensor_value)
+    code = decode_timings(capture)
+    assert code == IRCode("nec1", 0xA0BA, 0x03)
+    assert code.signal == ir_sensor_value["Signal"]
+
+
+@pytest.mark.parametrize(
+    "code",
+    [
+        IRCode("nec1", 0xA0BA, 0x03),
+        IRCode("necx", 0x0707, 0x02),
+        IRCode("samsung36", 0x0E0E, 0x12),
+        IRCode("sony", 0x01, 0x15, 12),
+        IRCode("sony", 0x1A, 0x3D, 15),
+        IRCode("sony", 0x1234, 0x05, 20),
+    ],
+)
+def test_round_trip(code):
+    """Test that encoded codes decode back to themselves (directly and via Pronto)."""
+    assert decode_timings(encode_timings(code)) == code
+
+    timings, frequency = pronto_to_timings(encode_operand(code, "prontohex"))
+    assert decode_timings(timings) == code
+    assert abs(frequency - 38000) < 3000
+
+
+def test_operands():
+    """Test encoding operands for the various device actions."""
+    code = IRCode("nec1", 0xA0BA, 0x03)
+    assert encode_operand(code) == "00A0BA03"
+    assert encode_operand(code, "raw") == encode_timings(code).to_raw()
+    assert encode_operand(code, "prontohex").startswith("0000 006C 0022 0000")
+
+    # Operands are memoized:
+    hits = encode_operand.cache_info().hits
+    encode_operand(code)
+    assert encode_operand.cache_info().hits == hits + 1
+
+    with pytest.raises(CommandError):
+        encode_operand(code, "sony")
+    with pytest.raises(CommandError):
+        encode_operand(IRCode("aiwa", 0, 0))
+
+
+def test_pronto_conversion():
+    """Test converting between raw timings and ProntoHex."""
+    capture = IRCapture([9000, -4500, 560, -560, 560])
+    pronto = timings_to_pronto(capture)
+    timings, frequency = pronto_to_timings(pronto)
+    assert frequency == 38029
+    assert len(timings) == 6
+    assert all(
+        abs(decoded - original) < 30 for decoded, original in zip(timings, capture)
+    )
+
+    for invalid in ("", "0000 006D 0001", "0100 006D 0000 0000", "zzzz"):
+        with pytest.raises(CommandError):
+            pronto_to_timings(invalid)
+
+
+def test_unrecognized_timings():
+    """Test that unrecognized timings decode to None."""
+    assert decode_timings(IRCapture([])) is None
+    assert decode_timings(IRCapture([100, -100, 100, -100])) is None
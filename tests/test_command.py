@@ -164,3 +164,76 @@ async def test_send_command(
         device = await async_get_device(TEST_IP_ADDRESS, session=session)
         data = await device.command.async_send_command("IR", "nec1", operand="123abc")
         assert data == {"success": "true"}
+
+
+@pytest.mark.asyncio
+async def test_send_command_cached_validation(
+    aresponses, command_list, command_response, device_server, ir_command_action_list
+):
+    """Test that repeated sends only validate against the device once."""
+    device_server.add(
+        TEST_IP_ADDRESS,
+        "/commands",
+        "get",
+        aresponses.Response(
+            text=json.dumps(command_list),
+            status=200,
+            headers={"Content-Type": "application/json; charset=utf-8"},
+        ),
+    )
+    device_server.add(
+        TEST_IP_ADDRESS,
+        "/commands/IR",
+        "get",
+        aresponses.Response(
+            text=json.dumps(ir_command_action_list),
+            status=200,
+            headers={"Content-Type": "application/json; charset=utf-8"},
+        ),
+    )
+    device_server.add(
+        TEST_IP_ADDRESS,
+        "/commands",
+        "post",
+        aresponses.Response(
+            text=json.dumps(command_response),
+            status=200,
+            headers={"Content-Type": "application/json; charset=utf-8"},
+        ),
+        repeat=2,
+    )
+
+    async with aiohttp.ClientSession() as session:
+        device = await async_get_device(TEST_IP_ADDRESS, session=session)
+        await device.command.async_send_command("IR", "nec1", operand="123abc")
+        data = await device.command.async_send_command("IR", "nec1", operand="123abc")
+        assert data == {"success": "true"}
+        assert device.cache.hits == 2
+        assert device.cache.misses == 2
+
+    aresponses.assert_plan_strictly_followed()
+
+
+@pytest.mark.asyncio
+async def test_send_command_no_validation(aresponses, command_response, device_server):
+    """Test that validation can be skipped entirely."""
+    device_server.add(
+        TEST_IP_ADDRESS,
+        "/commands",
+        "post",
+        aresponses.Response(
+            text=json.dumps(command_response),
+            status=200,
+            headers={"Content-Type": "application/json; charset=utf-8"},
+        ),
+    )
+
+    async with aiohttp.ClientSession() as session:
+        device = await async_get_device(
+            TEST_IP_ADDRESS, session=session, validate=False
+        )
+        data = await device.command.async_send_command("IR", "nec1", operand="123abc")
+        assert data == {"success": "true"}
+        assert device.cache.misses == 0
+
+    aresponses.assert_plan_strictly_followed()
@@ -0,0 +1,84 @@
+"""Define tests for pluggable JSON decoding."""
+import json
+
+import pytest
+
+from aiolookin import Device
+from aiolookin.decoder import DEFAULT_JSON_DECODER, get_json_decoder
+from aiolookin.errors import RequestError
+
+from .common import TEST_IP_ADDRESS
+
+
+def test_get_json_decoder():
+    """Test selecting decoders by name."""
+    assert get_json_decoder("json") is json.loads
+    assert get_json_decoder() is DEFAULT_JSON_DECODER
+    assert DEFAULT_JSON_DECODER(b'{"success": "true"}') == {"success": "true"}
+
+    with pytest.raises(ValueError):
+        get_json_decoder("yaml")
+
+
+@pytest.mark.asyncio
+async def test_custom_decoder(aresponses, device_info):
+    """Test that responses are decoded once, with the configured decoder."""
+    aresponses.add(
+        TEST_IP_ADDRESS,
+        "/device",
+        "get",
+        # Devices don't always send a JSON content type; that's fine:
+        aresponses.Response(text=json.dumps(device_info), status=200),
+    )
+    aresponses.add(
+        TEST_IP_ADDRESS,
+        "/device",
+        "get",
+        aresponses.Response(
+            text="not JSON",
+            status=200,
+            headers={"Content-Type": "application/json; charset=utf-8"},
+        ),
+    )
+    aresponses.add(
+        TEST_IP_ADDRESS,
+        "/device",
+        "get",
+        aresponses.Response(text="Internal Server Error", status=500),
+    )
+
+    bodies = []
+
+    def decode(body):
+        """Record every body that gets decoded."""
+        bodies.append(body)
+        return json.loads(body)
+
+    async with Device(TEST_IP_ADDRESS, json_decoder=decode) as device:
+        assert device.transport.json_decoder is decode
+        await device.async_update_device_info()
+        assert device.device_id == "ABCD1234"
+
+        with pytest.raises(RequestError):
+            await device.async_update_device_info()
+
+        # Error bodies aren't decoded at all:
+        with pytest.raises(RequestError):
+            await device.async_update_device_info()
+
+    assert bodies == [json.dumps(device_info).encode(), b"not JSON"]
+
+
+@pytest.mark.asyncio
+async def test_empty_response(aresponses):
+    """Test that an empty body raises a RequestError instead of returning None."""
+    aresponses.add(
+        TEST_IP_ADDRESS,
+        "/device",
+        "get",
+        aresponses.Response(text="", status=200),
+    )
+
+    async with Device(TEST_IP_ADDRESS) as device:
+        with pytest.raises(RequestError, match="Empty response"):
+            await device.async_update_device_info()
@@ -1,12 +1,14 @@
 """Define tests for the device."""
+import asyncio
 import json
 import logging
 
 import aiohttp
 import pytest
 
-from aiolookin import async_get_device
-from aiolookin.errors import RequestError
+from aiolookin import Device, async_get_device
+from aiolookin.errors import DeviceInfoError, LookInError, RequestError
+from aiolookin.models import DeviceInfo
 
 from .common import TEST_IP_ADDRESS
 
@@ -88,6 +90,9 @@ async def test_device_properties_new_session(aresponses, device_info):
     assert device.type == "Remote"
     assert device.voltage == 5889
 
+    await device.async_close()
+    assert device.transport.closed
+
 
 @pytest.mark.asyncio
 async def test_device_representation(aresponses, device_info):
@@ -130,3 +135,88 @@ async def test_unknown_device_mode(aresponses, caplog, device_info):
         device = await async_get_device(TEST_IP_ADDRESS, session=session)
         assert device.device_mode == "Unknown"
         assert any("Unknown device mode" in e.message for e in caplog.records)
+
+
+@pytest.mark.asyncio
+async def test_device_info_change_detection(aresponses, device_info):
+    """Test that refreshes report whether the device info changed."""
+    updated_device_info = {**device_info, "Time": "1629114800"}
+    changed_device_info = {**device_info, "CurrentVoltage": "5100"}
+
+    for info in (device_info, updated_device_info, changed_device_info):
+        aresponses.add(
+            TEST_IP_ADDRESS,
+            "/device",
+            "get",
+            aresponses.Response(
+                text=json.dumps(info),
+                status=200,
+                headers={"Content-Type": "application/json; charset=utf-8"},
+            ),
+        )
+
+    async with aiohttp.ClientSession() as session:
+        device = Device(TEST_IP_ADDRESS, session=session)
+        with pytest.raises(LookInError):
+            device.info
+
+        assert await device.async_update_device_info() == DeviceInfo._fields
+        snapshot = device.info
+
+        # Only the device's clock moved, which isn't a meaningful change:
+        assert await device.async_update_device_info() == ()
+        assert device.info == snapshot
+
+        assert await device.async_update_device_info() == ("voltage",)
+        assert device.voltage == 5100
+        assert snapshot.voltage == 5889
+
+
+@pytest.mark.asyncio
+async def test_concurrent_refreshes_share_changes(aresponses, device_info):
+    """Test that concurrent refreshes all hear about the changes they fetched."""
+    aresponses.add(
+        TEST_IP_ADDRESS,
+        "/device",
+        "get",
+        aresponses.Response(
+            text=json.dumps(device_info),
+            status=200,
+            headers={"Content-Type": "application/json; charset=utf-8"},
+        ),
+    )
+
+    async with aiohttp.ClientSession() as session:
+        device = Device(TEST_IP_ADDRESS, session=session)
+        results = await asyncio.gather(
+            device.async_update_device_info(), device.async_update_device_info()
+        )
+        assert results == [DeviceInfo._fields, DeviceInfo._fields]
+
+    aresponses.assert_plan_strictly_followed()
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    "info_override",
+    [{"ID": None}, {"CurrentVoltage": "n/a"}],
+)
+async def test_malformed_device_info(aresponses, device_info, info_override):
+    """Test that missing or malformed device info raises a LookInError."""
+    # A None override drops the field altogether:
+    info = {**device_info, **info_override}
+    info = {key: value for key, value in info.items() if value is not None}
+    aresponses.add(
+        TEST_IP_ADDRESS,
+        "/device",
+        "get",
+        aresponses.Response(
+            text=json.dumps(info),
+            status=200,
+            headers={"Content-Type": "application/json; charset=utf-8"},
+        ),
+    )
+
+    async with aiohttp.ClientSession() as session:
+        with pytest.raises(DeviceInfoError):
+            await async_get_device(TEST_IP_ADDRESS, session=session)
@@ -0,0 +1,133 @@
+"""Define tests for device discovery."""
+import socket
+import time
+
+import pytest
+
+from aiolookin import Device, Transport
+from aiolookin.discovery import DeviceScanner, async_discover
+from aiolookin.emulator import DeviceEmulator
+
+
+def get_free_port(kind=socket.SOCK_STREAM):
+    """Return a port that is free on every loopback address."""
+    with socket.socket(socket.AF_INET, kind) as sock:
+        sock.bind(("0.0.0.0", 0))
+        return sock.getsockname()[1]
+
+
+@pytest.mark.asyncio
+async def test_scan():
+    """Test scanning a network for devices."""
+    port = get_free_port()
+    async with DeviceEmulator(
+        devices=3,
+        hosts=("127.0.0.2", "127.0.0.3", "127.0.0.5"),
+        port=port,
+        latency=0,
+        jitter=0,
+        update_interval=None,
+    ) as emulator, Transport() as transport:
+        start = time.perf_counter()
+        devices = [
+            device
+            async for device in async_discover(
+                ["127.0.0.0/29"], transport=transport, port=port
+            )
+        ]
+        assert time.perf_counter() - start < 1
+
+        assert sorted(device.ip_address for device in devices) == sorted(
+            emulator.addresses
+        )
+        assert sorted(device.device_id for device in devices) == sorted(
+            virtual_device.device_id for virtual_device in emulator.devices
+        )
+
+
+@pytest.mark.asyncio
+async def test_scan_early_exit():
+    """Test that devices found but never handed out are closed."""
+    port = get_free_port()
+    async with DeviceEmulator(
+        devices=2,
+        hosts=("127.0.0.2", "127.0.0.3"),
+        port=port,
+        latency=0,
+        jitter=0,
+        update_interval=None,
+    ):
+        scanner = DeviceScanner(["127.0.0.2/31"], port=port)
+        async for device in scanner.async_scan():
+            await device.async_close()
+            break
+
+    assert scanner.probed == {"127.0.0.2", "127.0.0.3"}
+
+
+@pytest.mark.asyncio
+async def test_scan_announcements():
+    """Test probing hosts that announce themselves over UDP."""
+    port = get_free_port()
+    udp_port = get_free_port(socket.SOCK_DGRAM)
+    async with DeviceEmulator(
+        port=port,
+        latency=0,
+        jitter=0,
+        notify_port=udp_port,
+        update_interval=0.01,
+    ) as emulator:
+        async for device in async_discover(
+            port=port, listen=True, listen_port=udp_port, listen_duration=1
+        ):
+            assert device.device_id == emulator.devices[0].device_id
+            await device.async_close()
+            break
+        else:
+            pytest.fail("No device was discovered")
+
+
+@pytest.mark.asyncio
+async def test_scan_concurrency():
+    """Test that probes never outnumber the transport's connections."""
+    async with Transport(limit=4) as transport:
+        assert DeviceScanner(transport=transport)._get_concurrency() == 4
+        assert (
+            DeviceScanner(transport=transport, max_concurrency=2)._get_concurrency()
+            == 2
+        )
+    async with Transport(limit=0) as transport:
+        assert DeviceScanner(transport=transport)._get_concurrency() == 128
+
+
+@pytest.mark.asyncio
+async def test_scan_probe_errors(monkeypatch):
+    """Test that an unexpected probe error doesn't stall the scan."""
+    port = get_free_port()
+    async with DeviceEmulator(
+        devices=2,
+        hosts=("127.0.0.2", "127.0.0.3"),
+        port=port,
+        latency=0,
+        jitter=0,
+        update_interval=None,
+    ) as emulator:
+        original = Device.async_update_device_info
+
+        async def async_update_device_info(device):
+            if device.ip_address.startswith("127.0.0.2:"):
+                raise KeyError("Unexpected")
+            return await original(device)
+
+        monkeypatch.setattr(
+            Device, "async_update_device_info", async_update_device_info
+        )
+
+        scanner = DeviceScanner(["127.0.0.2/31"], port=port)
+        devices = [device async for device in scanner.async_scan()]
+        assert [device.ip_address for device in devices] == [emulator.addresses[1]]
+        assert scanner._scan_transport is None
+        for device in devices:
+            # Found devices outlive the scan's transport:
+            assert await device.sensor.async_get_sensor_list()
+            await device.async_close()
@@ -0,0 +1,148 @@
+"""Define tests for the device emulator."""
+import asyncio
+
+import pytest
+
+from aiolookin import Device
+from aiolookin.emulator import DeviceEmulator
+from aiolookin.errors import RequestError
+from aiolookin.udp import EVENT_TYPE_ALIVE, EVENT_TYPE_UPDATED, UDPListener
+
+
+@pytest.mark.asyncio
+async def test_devices():
+    """Test that every virtual device serves its own state."""
+    async with DeviceEmulator(
+        devices=3, hosts=("127.0.0.1", "127.0.0.2"), latency=0, jitter=0, seed=0
+    ) as emulator:
+        assert [address.split(":")[0] for address in emulator.addresses] == [
+            "127.0.0.1",
+            "127.0.0.2",
+            "127.0.0.1",
+        ]
+
+        for virtual_device, address in zip(emulator.devices, emulator.addresses):
+            async with Device(address) as device:
+                await device.async_update_device_info()
+                assert device.device_id == virtual_device.device_id
+                assert device.name == virtual_device.name
+
+                assert await device.command.async_get_command_list() == ["IR"]
+                assert "nec1" in await device.command.async_get_command_action_list(
+                    "IR"
+                )
+                assert await device.sensor.async_get_sensor_list() == ["IR", "Meteo"]
+
+                await device.command.async_send_command(
+                    "IR", "nec1", operand="00A0BA03"
+                )
+                assert virtual_device.commands_received == 1
+                value = await device.sensor.async_get_sensor_value("IR")
+                assert value["Signal"] == "00A0BA03"
+
+        assert emulator.requests == 18
+
+
+@pytest.mark.asyncio
+async def test_failures():
+    """Test that the emulator can fail requests."""
+    async with DeviceEmulator(failure_rate=1, latency=0, jitter=0) as emulator:
+        async with Device(emulator.addresses[0]) as device:
+            with pytest.raises(RequestError):
+                await device.async_update_device_info()
+
+
+@pytest.mark.asyncio
+async def test_sensor_evolution():
+    """Test that sensor values evolve (and are announced over UDP)."""
+    events = []
+    updates = asyncio.Queue()
+
+    def on_event(event):
+        """Collect events."""
+        events.append(event)
+        if event.event_type == EVENT_TYPE_UPDATED:
+            updates.put_nowait(event)
+
+    async with UDPListener(host="127.0.0.1", port=0) as listener:
+        listener.subscribe(on_event)
+
+        async with DeviceEmulator(
+            latency=0,
+            jitter=0,
+            notify_port=listener.port,
+            update_interval=0.01,
+            seed=0,
+        ) as emulator:
+            virtual_device = emulator.devices[0]
+            async with Device(emulator.addresses[0]) as device:
+                first = await device.sensor.async_get_sensor_reading("Meteo")
+                signal = (
+                    f"{round(first.temperature * 10):04X}"
+                    f"{round(first.humidity * 10):04X}"
+                )
+                event = await asyncio.wait_for(updates.get(), 1)
+                while event.value == signal:
+                    event = await asyncio.wait_for(updates.get(), 1)
+                second = await device.sensor.async_get_sensor_reading("Meteo")
+
+    assert events[0].event_type == EVENT_TYPE_ALIVE
+    assert events[0].device_id == virtual_device.device_id
+    assert event.device_id == virtual_device.device_id
+    assert event.sensor == "Meteo"
+    assert (first.temperature, first.humidity) != (
+        second.temperature,
+        second.humidity,
+    )
+    assert 15 <= second.temperature <= 30
+    assert 30 <= second.humidity <= 70
+
+
+def test_fixed_port_requires_hosts():
+    """Test that a fixed port can't be shared by devices on the same host."""
+    with pytest.raises(ValueError):
+        DeviceEmulator(devices=2, port=8080)
+
+
+def test_emulator_outside_of_a_loop():
+    """Test that an emulator built outside of the loop that runs it works."""
+    emulator = DeviceEmulator(hosts=("localhost",), latency=0, jitter=0)
+
+    async def async_run():
+        async with emulator:
+            async with Device(emulator.addresses[0]) as device:
+                await device.async_update_device_info()
+                return device.device_id
+
+    loop = asyncio.new_event_loop()
+    try:
+        assert loop.run_until_complete(async_run()) == emulator.devices[0].device_id
+    finally:
+        loop.close()
+
+
+@pytest.mark.asyncio
+async def test_ir_notifications():
+    """Test that IR signals echoed by commands are announced over UDP."""
+    updates = asyncio.Queue()
+
+    def on_event(event):
+        """Collect updates."""
+        if event.event_type == EVENT_TYPE_UPDATED:
+            updates.put_nowait(event)
+
+    async with UDPListener(host="127.0.0.1", port=0) as listener:
+        listener.subscribe(on_event)
+
+        async with DeviceEmulator(
+            latency=0, jitter=0, notify_port=listener.port, update_interval=None
+        ) as emulator:
+            async with Device(emulator.addresses[0]) as device:
+                await device.command.async_send_command(
+                    "IR", "nec1", operand="00A0BA03"
+                )
+                event = await asyncio.wait_for(updates.get(), 1)
+
+    assert event.device_id == emulator.devices[0].device_id
+    assert event.sensor == "IR"
+    assert event.value == "00A0BA03"
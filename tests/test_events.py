@@ -0,0 +1,100 @@
+"""Define tests for device info change events."""
+import pytest
+
+from aiolookin import Device
+from aiolookin.events import FieldChange
+
+from .common import TEST_IP_ADDRESS
+
+
+def test_field_changes(device_info):
+    """Test that subscribers only hear about the fields that changed."""
+    device = Device(TEST_IP_ADDRESS)
+    events = []
+    unsubscribe = device.info_events.subscribe(
+        lambda device, changes: events.append(changes)
+    )
+
+    device.load_device_info(device_info)
+    assert len(events) == 1
+    assert FieldChange("firmware", None, "2.36") in events[0]
+
+    device.load_device_info({**device_info, "Time": "1629114800"})
+    assert len(events) == 1
+
+    device.load_device_info({**device_info, "Firmware": "2.40", "Status": "Updating"})
+    assert events[1] == (
+        FieldChange("firmware", "2.36", "2.40"),
+        FieldChange("status", "Running", "Updating"),
+    )
+
+    unsubscribe()
+    device.load_device_info(device_info)
+    assert len(events) == 2
+
+
+def test_deadbands(device_info):
+    """Test that numeric fields only count once they move past a threshold."""
+    device = Device(TEST_IP_ADDRESS)
+    device.load_device_info(device_info)
+
+    events = []
+    device.info_events.subscribe(
+        lambda device, changes: events.extend(changes),
+        fields=("voltage", "status"),
+        thresholds={"voltage": 100},
+    )
+
+    # Small steps are suppressed until they add up to the threshold:
+    for voltage in ("5920", "5950", "5980"):
+        device.load_device_info({**device_info, "CurrentVoltage": voltage})
+    assert events == []
+    device.load_device_info({**device_info, "CurrentVoltage": "5990"})
+    assert events == [FieldChange("voltage", 5889, 5990)]
+
+    # Fields outside of the subscription are ignored:
+    device.load_device_info(
+        {**device_info, "CurrentVoltage": "5990", "Temperature": "70"}
+    )
+    assert len(events) == 1
+
+
+def test_raw_field_names(device_info):
+    """Test that fields can be named by their raw device info keys."""
+    device = Device(TEST_IP_ADDRESS)
+    device.load_device_info({**device_info, "SensorMode": "0"})
+
+    events = []
+    device.info_events.subscribe(
+        lambda device, changes: events.extend(changes),
+        fields=("CurrentVoltage", "SensorMode"),
+        thresholds={"CurrentVoltage": 100},
+    )
+    device.load_device_info(
+        {**device_info, "CurrentVoltage": "5950", "SensorMode": "1"}
+    )
+    assert events == [FieldChange("device_mode", "Executor", "Sensor")]
+
+
+def test_invalid_subscriptions():
+    """Test subscribing to unknown or non-numeric fields."""
+    device = Device(TEST_IP_ADDRESS)
+    with pytest.raises(ValueError, match="expected one of device_id"):
+        device.info_events.subscribe(lambda *_: None, fields=("Time",))
+    with pytest.raises(ValueError):
+        device.info_events.subscribe(lambda *_: None, thresholds={"firmware": 1})
+
+
+def test_callback_errors(caplog, device_info):
+    """Test that a failing callback doesn't stop the others."""
+    device = Device(TEST_IP_ADDRESS)
+    events = []
+
+    def callback(device, changes):
+        raise ValueError("Oops")
+
+    device.info_events.subscribe(callback)
+    device.info_events.subscribe(lambda device, changes: events.append(changes))
+    device.load_device_info(device_info)
+    assert len(events) == 1
+    assert "Error in device info callback" in caplog.text
@@ -0,0 +1,94 @@
+"""Define tests for the metrics exporter."""
+import aiohttp
+import pytest
+
+from aiolookin.exporter import CONTENT_TYPE, MetricsExporter
+from aiolookin.models import DeviceInfo, parse_sensor_value
+
+
+def test_render(device_info, ir_sensor_value, meteo_sensor_value):
+    """Test rendering device and sensor state."""
+    exporter = MetricsExporter()
+    assert exporter.render() == ""
+
+    assert (
+        exporter.update_device_info(
+            DeviceInfo.from_dict({**device_info, "SensorMode": "0"})
+        )
+        is True
+    )
+    assert exporter.update_sensor(
+        "ABCD1234", parse_sensor_value("Meteo", meteo_sensor_value)
+    )
+    assert exporter.update_sensor("ABCD1234", parse_sensor_value("IR", ir_sensor_value))
+
+    output = exporter.render()
+    assert (
+        "# TYPE lookin_device_voltage_millivolts gauge\n"
+        'lookin_device_voltage_millivolts{device_id="ABCD1234",name="Test Device"} '
+        "5889\n"
+    ) in output
+    assert (
+        'lookin_device_info{device_id="ABCD1234",name="Test Device",'
+        'firmware="2.36",mode="Executor",status="Running",type="Remote"} 1\n'
+    ) in output
+    assert (
+        'lookin_meteo_temperature_celsius{device_id="ABCD1234",name="Test Device"} '
+        "18.9\n"
+    ) in output
+    assert (
+        "lookin_sensor_updated_timestamp_seconds"
+        '{device_id="ABCD1234",name="Test Device",sensor="IR"} 1636625415\n'
+    ) in output
+    assert output.count("# HELP lookin_sensor_updated_timestamp_seconds") == 1
+
+
+def test_incremental_rendering(device_info, meteo_sensor_value):
+    """Test that only changed devices are re-rendered."""
+    exporter = MetricsExporter()
+    for device_id in ("ABCD1234", "EFGH5678"):
+        exporter.update_device_info(
+            DeviceInfo.from_dict({**device_info, "ID": device_id})
+        )
+
+    first = exporter.render()
+    assert exporter.renders == 2
+
+    # Unchanged state doesn't trigger any work:
+    assert exporter.update_device_info(DeviceInfo.from_dict(device_info)) is False
+    assert exporter.render() is first
+    assert exporter.renders == 2
+
+    exporter.update_device_info(
+        DeviceInfo.from_dict({**device_info, "CurrentVoltage": "5000"})
+    )
+    second = exporter.render()
+    assert exporter.renders == 3
+    assert 'device_id="ABCD1234",name="Test Device"} 5000' in second
+    assert 'device_id="EFGH5678",name="Test Device"} 5889' in second
+
+    # Devices are rendered in order, however they were added:
+    exporter.update_device_info(DeviceInfo.from_dict({**device_info, "ID": "0000"}))
+    third = exporter.render()
+    assert exporter.renders == 4
+    assert third.index('"0000"') < third.index('"ABCD1234"') < third.index('"EFGH5678"')
+
+    exporter.remove_device("EFGH5678")
+    assert "EFGH5678" not in exporter.render()
+
+
+@pytest.mark.asyncio
+async def test_http_endpoint(device_info):
+    """Test serving the metrics over HTTP."""
+    exporter = MetricsExporter(host="127.0.0.1", port=0)
+    exporter.update_device_info(DeviceInfo.from_dict(device_info))
+
+    await exporter.async_start()
+    try:
+        async with aiohttp.ClientSession() as session:
+            async with session.get(f"http://127.0.0.1:{exporter.port}/metrics") as resp:
+                assert resp.status == 200
+                assert resp.headers["Content-Type"] == CONTENT_TYPE
+                assert await resp.text() == exporter.render()
+    finally:
+        await exporter.async_stop()
@@ -0,0 +1,147 @@
+"""Define tests for managing fleets of devices."""
+import asyncio
+import json
+
+import pytest
+
+from aiolookin.errors import CommandError, RequestError
+from aiolookin.fleet import DeviceFleet
+
+from .common import TEST_IP_ADDRESS
+
+TEST_IP_ADDRESS_2 = "192.168.1.102"
+
+
+@pytest.mark.asyncio
+async def test_fleet_initialize_isolates_errors(aresponses, device_info):
+    """Test that a dead device doesn't fail the rest of the fleet."""
+    aresponses.add(
+        TEST_IP_ADDRESS,
+        "/device",
+        "get",
+        aresponses.Response(
+            text=json.dumps(device_info),
+            status=200,
+            headers={"Content-Type": "application/json; charset=utf-8"},
+        ),
+    )
+    aresponses.add(
+        TEST_IP_ADDRESS_2,
+        "/device",
+        "get",
+        aresponses.Response(
+            text="Internal Server Error",
+            status=500,
+            headers={"Content-Type": "application/json; charset=utf-8"},
+        ),
+    )
+
+    async with DeviceFleet([TEST_IP_ADDRESS, TEST_IP_ADDRESS_2]) as fleet:
+        results = {r.ip_address: r async for r in fleet.async_initialize()}
+
+        assert results[TEST_IP_ADDRESS].ok
+        assert not results[TEST_IP_ADDRESS_2].ok
+        assert isinstance(results[TEST_IP_ADDRESS_2].error, RequestError)
+        assert list(fleet.initialized_devices) == [TEST_IP_ADDRESS]
+        assert fleet.get(TEST_IP_ADDRESS).device_id == "ABCD1234"
+
+    assert fleet.transport.closed
+
+
+@pytest.mark.asyncio
+async def test_fleet_query(aresponses, device_info, meteo_sensor_value):
+    """Test querying every initialized device in a fleet."""
+    for ip_address in (TEST_IP_ADDRESS, TEST_IP_ADDRESS_2):
+        aresponses.add(
+            ip_address,
+            "/device",
+            "get",
+            aresponses.Response(
+                text=json.dumps(device_info),
+                status=200,
+                headers={"Content-Type": "application/json; charset=utf-8"},
+            ),
+        )
+        aresponses.add(
+            ip_address,
+            "/sensors/Meteo",
+            "get",
+            aresponses.Response(
+                text=json.dumps(meteo_sensor_value),
+                status=200,
+                headers={"Content-Type": "application/json; charset=utf-8"},
+            ),
+        )
+
+    async with DeviceFleet(
+        [TEST_IP_ADDRESS, TEST_IP_ADDRESS_2], max_concurrency=1, validate=False
+    ) as fleet:
+        assert len(fleet) == 2
+        async for _ in fleet.async_initialize():
+            pass
+
+        # Every device is initialized, so there is nothing left to do:
+        assert [r async for r in fleet.async_initialize()] == []
+
+        results = [
+            r
+            async for r in fleet.async_query(
+                lambda device: device.sensor.async_get_sensor_value("Meteo")
+            )
+        ]
+        assert len(results) == 2
+        assert all(r.data["Humidity"] == "62" for r in results)
+
+    aresponses.assert_all_requests_matched()
+    aresponses.assert_no_unused_routes()
+
+
+@pytest.mark.asyncio
+async def test_fleet_query_isolates_unexpected_errors():
+    """Test that any exception is captured on its device's result."""
+    cancelled = []
+
+    async def async_query(device):
+        if device.ip_address == TEST_IP_ADDRESS:
+            raise KeyError("ID")
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            cancelled.append(device.ip_address)
+            raise
+
+    async with DeviceFleet([TEST_IP_ADDRESS, TEST_IP_ADDRESS_2]) as fleet:
+        results = fleet.async_query(async_query, initialized_only=False)
+        result = await results.__anext__()
+        assert result.ip_address == TEST_IP_ADDRESS
+        assert isinstance(result.error, KeyError)
+        await results.aclose()
+
+    # Abandoning the results cancels (and awaits) the remaining tasks:
+    assert cancelled == [TEST_IP_ADDRESS_2]
+
+
+@pytest.mark.asyncio
+async def test_fleet_closes_devices():
+    """Test that removed devices and the fleet's devices get closed."""
+
+    async def async_send_command(command, action, *, operand=None):
+        await asyncio.sleep(10)
+
+    fleet = DeviceFleet([TEST_IP_ADDRESS, TEST_IP_ADDRESS_2], validate=False)
+    futures = []
+    for device in fleet:
+        device.command_queue._async_send_command = async_send_command
+        futures.append(await device.command_queue.async_enqueue("IR", "nec1"))
+        futures.append(await device.command_queue.async_enqueue("IR", "nec1"))
+
+    await fleet.async_remove(TEST_IP_ADDRESS)
+    assert TEST_IP_ADDRESS not in fleet
+    assert all(future.done() for future in futures[:2])
+
+    await fleet.async_close()
+    assert all(future.done() for future in futures[2:])
+    for future in futures:
+        with pytest.raises(CommandError):
+            future.result()
+    assert fleet.transport.closed
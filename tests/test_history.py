@@ -0,0 +1,116 @@
+"""Define tests for the sensor history store."""
+import math
+
+import pytest
+
+from aiolookin import history
+from aiolookin.errors import SensorError
+from aiolookin.history import HistoryStore, SensorHistory
+
+
+@pytest.fixture(name="numpy", params=[True, False], ids=["numpy", "python"])
+def numpy_fixture(monkeypatch, request):
+    """Run a test with and without NumPy."""
+    if request.param:
+        pytest.importorskip("numpy")
+    monkeypatch.setattr(history, "HAS_NUMPY", request.param and history.HAS_NUMPY)
+    return request.param
+
+
+def build_history(capacity=5):
+    """Build a history that has wrapped around its buffer."""
+    sensor_history = SensorHistory(("temperature", "humidity"), capacity=capacity)
+    for minute in range(8):
+        sensor_history.append(minute * 60, [20.0 + minute, None if minute == 6 else 50])
+    return sensor_history
+
+
+def test_aggregate(numpy):
+    """Test windowed aggregates."""
+    sensor_history = build_history()
+    assert len(sensor_history) == 5
+    assert sensor_history.latest_timestamp == 420
+
+    assert sensor_history.aggregate("temperature") == (5, 23.0, 27.0, 25.0)
+    assert sensor_history.aggregate("temperature", seconds=120, now=420) == (
+        3,
+        25.0,
+        27.0,
+        26.0,
+    )
+    # Gaps are skipped:
+    assert sensor_history.aggregate("humidity", seconds=120, now=420) == (
+        2,
+        50.0,
+        50.0,
+        50.0,
+    )
+    assert sensor_history.aggregate("temperature", seconds=10, now=1000) is None
+
+
+def test_append_order():
+    """Test that only newer readings are recorded."""
+    sensor_history = build_history()
+    assert not sensor_history.append(420, [0, 0])
+    assert not sensor_history.append(0, [0, 0])
+    assert sensor_history.append(421, [0, 0])
+
+
+def test_downsample(numpy):
+    """Test downsampling into aligned buckets."""
+    sensor_history = build_history(capacity=10)
+    assert sensor_history.downsample("temperature", 180) == [
+        (0.0, 21.0),
+        (180.0, 24.0),
+        (360.0, 26.5),
+    ]
+    assert sensor_history.downsample("humidity", 180, since=360) == [(360.0, 50.0)]
+
+    with pytest.raises(ValueError):
+        sensor_history.downsample("humidity", 0)
+
+
+def test_store():
+    """Test a store of histories built from raw sensor values."""
+    store = HistoryStore(capacity=100)
+    assert store.add("ABCD1234", "Meteo", {"Temperature": "18.9", "Updated": "100"})
+    assert not store.add("ABCD1234", "Meteo", {"Temperature": "19", "Updated": "100"})
+    assert store.add("ABCD1234", "Meteo", {"Temperature": "19.5", "Updated": "160"})
+    assert ("ABCD1234", "Meteo") in store
+    assert len(store) == 1
+
+    sensor_history = store.get("ABCD1234", "Meteo")
+    assert sensor_history.fields == ("temperature", "humidity", "pressure")
+    readings = list(sensor_history.iter_readings())
+    assert [timestamp for timestamp, _ in readings] == [100, 160]
+    assert math.isclose(readings[0][1]["temperature"], 18.9, rel_tol=1e-6)
+    assert math.isnan(readings[0][1]["humidity"])
+
+    # 100 readings of 8 + 3 * 4 bytes each:
+    assert store.nbytes == 2000
+
+    with pytest.raises(SensorError):
+        store.add("ABCD1234", "IR", {"Updated": "100"})
+
+    store.remove("ABCD1234")
+    assert len(store) == 0
+
+
+def test_views():
+    """Test that views share memory with the underlying buffers."""
+    sensor_history = build_history()
+
+    views = sensor_history.views()
+    assert [list(view) for view in views] == [[180, 240], [300, 360, 420]]
+    assert [list(view) for view in sensor_history.views(since=300)] == [[300, 360, 420]]
+
+    pytest.importorskip("numpy")
+    timestamps = sensor_history.as_numpy(since=300)
+    assert timestamps.tolist() == [300, 360, 420]
+    # Once the buffer wraps around again, the view sees the overwritten reading:
+    for timestamp in (480, 540, 600):
+        sensor_history.append(timestamp, [0, 0])
+    assert timestamps.tolist() == [600, 360, 420]
+    # A window that wraps around is copied into a single array:
+    assert sensor_history.as_numpy().tolist() == [360, 420, 480, 540, 600]
+    assert sensor_history.as_numpy("temperature", since=1000).size == 0
@@ -0,0 +1,106 @@
+"""Define tests for request instrumentation."""
+import json
+
+import aiohttp
+import pytest
+
+from aiolookin import Device, Transport
+from aiolookin.errors import RequestError
+from aiolookin.instrumentation import (
+    PHASE_BODY,
+    PHASE_FIRST_BYTE,
+    PHASE_TOTAL,
+    Histogram,
+    Instrumentation,
+)
+
+from .common import TEST_IP_ADDRESS
+
+
+def test_histogram():
+    """Test recording durations in a histogram."""
+    histogram = Histogram((0.1, 0.5, 1.0))
+    for value in (0.05, 0.2, 0.3, 0.7, 5.0):
+        histogram.observe(value)
+
+    assert histogram.count == 5
+    assert histogram.counts == [1, 2, 1, 1]
+    assert histogram.mean == pytest.approx(1.25)
+    assert histogram.quantile(0.5) == 0.5
+    assert histogram.quantile(1.0) == float("inf")
+    assert Histogram().quantile(0.5) == 0.0
+
+
+@pytest.mark.asyncio
+async def test_instrumented_requests(aresponses, device_info):
+    """Test that requests record per-phase latencies, errors and samples."""
+    aresponses.add(
+        TEST_IP_ADDRESS,
+        "/device",
+        "get",
+        aresponses.Response(
+            text=json.dumps(device_info),
+            status=200,
+            headers={"Content-Type": "application/json; charset=utf-8"},
+        ),
+    )
+    aresponses.add(
+        TEST_IP_ADDRESS,
+        "/device",
+        "get",
+        aresponses.Response(text="Internal Server Error", status=500),
+    )
+
+    instrumentation = Instrumentation()
+    samples = []
+    remove_listener = instrumentation.add_listener(samples.append)
+
+    async with Device(TEST_IP_ADDRESS, instrumentation=instrumentation) as device:
+        await device.async_update_device_info()
+        with pytest.raises(RequestError):
+            await device.async_update_device_info()
+
+    histograms = instrumentation.histograms[(TEST_IP_ADDRESS, "device", "GET")]
+    assert histograms[PHASE_TOTAL].count == 2
+    assert histograms[PHASE_FIRST_BYTE].count == 2
+    assert histograms[PHASE_BODY].count == 2
+    assert (
+        instrumentation.get_histogram(TEST_IP_ADDRESS, "device", "get")
+        is histograms[PHASE_TOTAL]
+    )
+    assert instrumentation.errors == {
+        (TEST_IP_ADDRESS, "device", "GET", "ClientResponseError"): 1
+    }
+
+    assert [sample.status for sample in samples] == [200, 500]
+    assert samples[1].error == "ClientResponseError"
+    assert len(instrumentation.summary()) == len(histograms)
+
+    remove_listener()
+    instrumentation.reset()
+    assert not instrumentation.histograms
+
+
+def test_instrumentation_belongs_to_the_transport():
+    """Test that instrumentation isn't silently dropped next to a transport."""
+    with pytest.raises(ValueError):
+        Device(
+            TEST_IP_ADDRESS, transport=Transport(), instrumentation=Instrumentation()
+        )
+
+
+@pytest.mark.asyncio
+async def test_requests_that_cannot_be_made():
+    """Test that a request over a closed external session isn't traced."""
+    instrumentation = Instrumentation()
+    samples = []
+    instrumentation.add_listener(samples.append)
+
+    session = aiohttp.ClientSession()
+    await session.close()
+    device = Device(TEST_IP_ADDRESS, session=session, instrumentation=instrumentation)
+    with pytest.raises(RequestError):
+        await device.async_update_device_info()
+
+    assert samples == []
+    assert not instrumentation.histograms
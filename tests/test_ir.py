@@ -0,0 +1,48 @@
+"""Define tests for IR captures."""
+from array import array
+
+import pytest
+
+from aiolookin.ir import IRCapture
+
+
+def test_parse_raw(ir_sensor_value):
+    """Test parsing the IR sensor's raw timings."""
+    capture = IRCapture.from_sensor_value(ir_sensor_value)
+    assert isinstance(capture.timings, array)
+    assert len(capture) == 68
+    assert capture.timings[:4].tolist() == [9030, -4490, 560, -560]
+    assert len(capture.pulses) == 34
+    assert len(capture.spaces) == 34
+    assert capture.pulses[0] == 9030
+    assert capture.spaces[0] == 4490
+    assert capture.duration == sum(capture.pulses) + sum(capture.spaces)
+    assert str(capture) == f"<IRCapture timings=68 duration={capture.duration}>"
+
+
+def test_round_trip(ir_sensor_value):
+    """Test that serializing a capture reproduces the device's format."""
+    capture = IRCapture.from_raw(ir_sensor_value["Raw"])
+    assert capture.to_raw() == ir_sensor_value["Raw"]
+    assert IRCapture.from_raw(capture.to_raw()) == capture
+    assert hash(IRCapture(list(capture))) == hash(capture)
+
+
+def test_empty_capture():
+    """Test an empty capture."""
+    capture = IRCapture.from_sensor_value({})
+    assert len(capture) == 0
+    assert capture.duration == 0
+    assert capture.to_raw() == ""
+
+
+def test_numpy_view(ir_sensor_value):
+    """Test that the NumPy view shares memory with the capture."""
+    pytest.importorskip("numpy")
+
+    capture = IRCapture.from_raw(ir_sensor_value["Raw"])
+    view = capture.as_numpy()
+    assert view.tolist() == capture.timings.tolist()
+
+    capture.timings[0] = 1
+    assert view[0] == 1
@@ -0,0 +1,132 @@
+"""Define tests for the IR code index."""
+import random
+
+import pytest
+
+from aiolookin.ir import IRCapture
+from aiolookin.irindex import IRCodeIndex, fingerprint, normalize_timings
+
+
+def jitter(capture, amount, seed=0):
+    """Return a copy of a capture with every timing randomly jittered."""
+    rand = random.Random(seed)
+    return IRCapture(
+        int(timing * rand.uniform(1 - amount, 1 + amount)) for timing in capture
+    )
+
+
+def make_library(ir_sensor_value, count=50):
+    """Return a library of distinct codes derived from the fixture capture."""
+    capture = IRCapture.from_sensor_value(ir_sensor_value)
+    library = []
+    for number in range(count):
+        timings = list(capture)
+        # Flip the spaces of the data bits according to the code's number:
+        for bit in range(8):
+            index = 3 + 2 * bit
+            timings[index] = -1690 if number >> bit & 1 else -560
+        library.append((f"code_{number}", IRCapture(timings)))
+    return library
+
+
+def test_normalization(ir_sensor_value):
+    """Test that leading and trailing gaps are dropped."""
+    capture = IRCapture.from_sensor_value(ir_sensor_value)
+    timings = normalize_timings(IRCapture([-100, *capture]))
+    assert len(timings) == len(capture) - 1
+    assert timings[0] == 9030
+    assert all(timing > 0 for timing in timings)
+    assert fingerprint(timings) == fingerprint(normalize_timings(jitter(capture, 0.05)))
+
+
+@pytest.mark.parametrize("use_numpy", [False, True])
+def test_matching(ir_sensor_value, monkeypatch, use_numpy):
+    """Test matching jittered captures against a library."""
+    if use_numpy:
+        pytest.importorskip("numpy")
+    monkeypatch.setattr("aiolookin.irindex.HAS_NUMPY", use_numpy)
+
+    library = make_library(ir_sensor_value)
+    index = IRCodeIndex()
+    index.add_many(library)
+    assert len(index) == 50
+    assert "code_7" in index
+
+    for seed, (key, capture) in enumerate(library):
+        match = index.match(jitter(capture, 0.1, seed))
+        assert match is not None
+        assert match.key == key
+        assert match.error < 0.1
+
+    # A capture whose fingerprint is off still matches by scanning its length:
+    timings = list(library[3][1])
+    timings[3] = -1300
+    capture = IRCapture(timings)
+    assert fingerprint(normalize_timings(capture)) != fingerprint(
+        normalize_timings(library[3][1])
+    )
+    assert index.match(capture).key == "code_3"
+
+    assert index.match(jitter(library[0][1], 0.6)) is None
+    assert index.match(IRCapture([560, -560])) is None
+
+
+@pytest.mark.parametrize("use_numpy", [False, True])
+def test_nearest_match_in_another_bucket(monkeypatch, use_numpy):
+    """Test that a closer code wins even if its fingerprint differs."""
+    if use_numpy:
+        pytest.importorskip("numpy")
+    monkeypatch.setattr("aiolookin.irindex.HAS_NUMPY", use_numpy)
+
+    def make_capture(last):
+        return IRCapture([1000, -1000] * 4 + [1000, -last])
+
+    index = IRCodeIndex()
+    index.add_many(
+        [("same_bucket", make_capture(1300)), ("nearest", make_capture(1520))]
+    )
+    capture = make_capture(1480)
+    assert fingerprint(normalize_timings(capture)) == fingerprint(
+        normalize_timings(make_capture(1300))
+    )
+    assert fingerprint(normalize_timings(capture)) != fingerprint(
+        normalize_timings(make_capture(1520))
+    )
+
+    match = index.match(capture)
+    assert match.key == "nearest"
+    assert match.error == pytest.approx(40 / 1520 / 10)
+
+    # The index can still grow after matching:
+    index.add("later", make_capture(1480))
+    assert index.match(capture) == ("later", 0)
+
+
+def test_incremental_insertion(ir_sensor_value):
+    """Test that codes can be added after matching."""
+    library = make_library(ir_sensor_value, count=2)
+    index = IRCodeIndex()
+    index.add(*library[0])
+    assert index.match_sensor_value(ir_sensor_value) is None
+
+    index.add("learned", IRCapture.from_sensor_value(ir_sensor_value))
+    assert index.match_sensor_value(ir_sensor_value).key == "learned"
+    assert index.keys == ["code_0", "learned"]
+
+    with pytest.raises(ValueError):
+        index.add("empty", IRCapture([]))
+
+
+def test_persistence(ir_sensor_value, tmp_path):
+    """Test saving an index and loading it back."""
+    path = str(tmp_path / "codes.json")
+    library = make_library(ir_sensor_value, count=10)
+    index = IRCodeIndex(tolerance=0.2)
+    index.add_many(library)
+    index.save(path)
+
+    loaded = IRCodeIndex.load(path)
+    assert loaded.tolerance == 0.2
+    assert len(loaded) == 10
+    for key, capture in library:
+        assert loaded.match(capture).key == key
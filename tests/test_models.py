@@ -0,0 +1,46 @@
+"""Define tests for typed sensor values."""
+from datetime import datetime, timezone
+
+from aiolookin.ir import IRCapture
+from aiolookin.models import (
+    GenericSensorValue,
+    IRSensorValue,
+    MeteoSensorValue,
+    parse_sensor_value,
+)
+
+
+def test_meteo_value(meteo_sensor_value):
+    """Test parsing a Meteo sensor value."""
+    value = parse_sensor_value("Meteo", meteo_sensor_value)
+    assert isinstance(value, MeteoSensorValue)
+    assert value.humidity == 62.0
+    assert value.pressure == 0.0
+    assert value.temperature == 18.9
+    assert value.timestamp == 1629128277
+    assert value.updated == datetime(2021, 8, 16, 15, 37, 57, tzinfo=timezone.utc)
+    assert not hasattr(value, "__dict__")
+    assert value == parse_sensor_value("Meteo", meteo_sensor_value)
+
+
+def test_ir_value(ir_sensor_value):
+    """Test parsing an IR sensor value."""
+    value = parse_sensor_value("IR", ir_sensor_value)
+    assert isinstance(value, IRSensorValue)
+    assert value.capture == IRCapture.from_raw(ir_sensor_value["Raw"])
+    assert value.is_repeated is True
+    assert value.protocol == 1
+    assert value.repeat_pause == 41345
+    assert value.repeat_signal is None
+    assert value.signal == "00A0BA03"
+    assert value.timestamp == 1636625415
+
+
+def test_generic_value():
+    """Test that unknown sensors fall back to a generic model."""
+    value = parse_sensor_value("Mystery", {"Level": "3", "Updated": "garbage"})
+    assert isinstance(value, GenericSensorValue)
+    assert value.values == {"Level": "3"}
+    assert value.timestamp is None
+    assert value.updated is None
+    assert str(value) == "<GenericSensorValue sensor=Mystery updated=None>"
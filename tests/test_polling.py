@@ -0,0 +1,105 @@
+"""Define tests for the adaptive sensor poller."""
+import asyncio
+
+import pytest
+
+from aiolookin import Device
+from aiolookin.emulator import DeviceEmulator
+from aiolookin.polling import SensorPoller
+
+
+@pytest.mark.asyncio
+async def test_interval_adaptation():
+    """Test that intervals back off on stable sensors and speed up on active ones."""
+    readings = []
+
+    async with DeviceEmulator(latency=0, jitter=0, update_interval=None) as emulator:
+        virtual_device = emulator.devices[0]
+        async with Device(emulator.addresses[0]) as device:
+            poller = SensorPoller(
+                initial_interval=40, min_interval=5, max_interval=100, backoff=2
+            )
+            poller.subscribe(lambda device, value: readings.append(value))
+            poller.add(device, "Meteo")
+            [target] = poller.targets
+
+            # The first reading is always delivered:
+            await poller.async_poll(target)
+            assert len(readings) == 1
+            assert poller.get_interval(device, "Meteo") == 40
+
+            # Unchanged readings aren't, and the interval backs off (up to its max):
+            await poller.async_poll(target)
+            assert poller.get_interval(device, "Meteo") == 80
+            await poller.async_poll(target)
+            assert poller.get_interval(device, "Meteo") == 100
+            assert len(readings) == 1
+
+            # A change speeds polling up, but not beyond twice per observed change:
+            virtual_device.updated += 120
+            virtual_device.temperature = 10.0
+            await poller.async_poll(target)
+            assert poller.get_interval(device, "Meteo") == 60
+            assert len(readings) == 2
+            assert readings[1].temperature == 10.0
+
+            virtual_device.updated += 4
+            await poller.async_poll(target)
+            assert poller.get_interval(device, "Meteo") == 30
+            for _ in range(3):
+                virtual_device.updated += 4
+                await poller.async_poll(target)
+            assert poller.get_interval(device, "Meteo") == 5
+            assert len(readings) == 6
+            assert target.changes == 5
+            assert target.polls == 8
+
+
+@pytest.mark.asyncio
+async def test_request_budget(monkeypatch):
+    """Test that polls across every target respect the global request budget."""
+    async with DeviceEmulator(
+        devices=5, latency=0, jitter=0, update_interval=None
+    ) as emulator:
+        devices = [Device(address) for address in emulator.addresses]
+        readings = []
+
+        async with SensorPoller(
+            initial_interval=0.01,
+            min_interval=0.01,
+            max_interval=0.01,
+            max_requests_per_second=50,
+        ) as poller:
+            # Record the budget slot each poll was scheduled in (rather than when it
+            # happened to run, which depends on how busy the machine is):
+            slots = []
+            polled = asyncio.Event()
+            async_poll = poller.async_poll
+
+            async def async_record_poll(target):
+                slots.append(poller._next_slot)
+                await async_poll(target)
+                if all(target.polls >= 2 for target in poller.targets):
+                    polled.set()
+
+            monkeypatch.setattr(poller, "async_poll", async_record_poll)
+            poller.subscribe(lambda device, value: readings.append(value))
+            removers = [poller.add(device, "Meteo") for device in devices]
+            await asyncio.wait_for(polled.wait(), 10)
+
+            # Only the first (changed) reading of every sensor is delivered:
+            assert len(readings) == 5
+            # ...and polls are never scheduled closer than 50 per second allows:
+            assert len(slots) >= 10
+            assert all(b - a >= 0.02 - 1e-9 for a, b in zip(slots, slots[1:]))
+
+            for remove in removers:
+                remove()
+            assert poller.targets == []
+            await asyncio.sleep(0)
+            requests = poller.requests
+            await asyncio.sleep(0.05)
+            assert poller.requests == requests
+
+        for device in devices:
+            await device.async_close()
@@ -0,0 +1,98 @@
+"""Define tests for the per-device command queue."""
+import asyncio
+
+import pytest
+
+from aiolookin.errors import CommandError
+from aiolookin.queue import CommandQueue
+
+
+class FakeSender:
+    """Define a fake command sender that records concurrency."""
+
+    def __init__(self, *, delay=0.01):
+        """Initialize."""
+        self.active = 0
+        self.calls = []
+        self.delay = delay
+        self.max_active = 0
+
+    async def async_send_command(self, command, action, *, operand=None):
+        """Pretend to send a command."""
+        self.active += 1
+        self.max_active = max(self.max_active, self.active)
+        self.calls.append((command, action, operand))
+        await asyncio.sleep(self.delay)
+        self.active -= 1
+        if action == "bad":
+            raise CommandError("Unknown action")
+        return {"success": "true"}
+
+
+@pytest.mark.asyncio
+async def test_commands_are_serialized():
+    """Test that queued commands never run concurrently (and none are dropped)."""
+    sender = FakeSender()
+    queue = CommandQueue(sender.async_send_command)
+
+    results = await asyncio.gather(
+        *(queue.async_send("IR", "nec1", operand=str(i % 3)) for i in range(5))
+    )
+    assert results == [{"success": "true"}] * 5
+    assert sender.max_active == 1
+    assert [call[2] for call in sender.calls] == ["0", "1", "2", "0", "1"]
+    assert queue.coalesced == 0
+
+    await queue.async_close()
+
+
+@pytest.mark.asyncio
+async def test_duplicate_commands_are_coalesced():
+    """Test that identical pending commands share a single send (when opted in)."""
+    sender = FakeSender()
+    queue = CommandQueue(sender.async_send_command, coalesce=True)
+
+    first = await queue.async_enqueue("IR", "nec1", operand="1")
+    second = await queue.async_enqueue("IR", "nec1", operand="2")
+    duplicate = await queue.async_enqueue("IR", "nec1", operand="2")
+    assert duplicate is second
+    assert queue.coalesced == 1
+
+    await asyncio.gather(first, second)
+    assert len(sender.calls) == 2
+
+    await queue.async_close()
+
+
+@pytest.mark.asyncio
+async def test_errors_and_backpressure():
+    """Test error propagation and that a full queue makes callers wait."""
+    sender = FakeSender(delay=0.05)
+    queue = CommandQueue(sender.async_send_command, maxsize=1)
+
+    with pytest.raises(CommandError):
+        await queue.async_send("IR", "bad")
+
+    await queue.async_enqueue("IR", "nec1", operand="1")
+    await queue.async_enqueue("IR", "nec1", operand="2")
+    with pytest.raises(asyncio.TimeoutError):
+        await asyncio.wait_for(queue.async_enqueue("IR", "nec1", operand="3"), 0.01)
+
+    await queue.async_close()
+
+
+@pytest.mark.asyncio
+async def test_close_fails_pending_commands():
+    """Test that closing the queue fails commands that were never sent."""
+    sender = FakeSender(delay=0.05)
+    queue = CommandQueue(sender.async_send_command)
+
+    in_flight = await queue.async_enqueue("IR", "nec1", operand="1")
+    pending = await queue.async_enqueue("IR", "nec1", operand="2")
+    await asyncio.sleep(0)
+    assert queue.pending == 1
+
+    await queue.async_close()
+    for future in (in_flight, pending):
+        with pytest.raises(CommandError):
+            await future
@@ -0,0 +1,175 @@
+"""Define tests for rate limiting."""
+import asyncio
+import time
+
+import pytest
+
+from aiolookin import Device, Transport
+from aiolookin.emulator import DeviceEmulator
+from aiolookin.errors import RequestError
+from aiolookin.ratelimit import TokenBucket
+from aiolookin.scheduler import PRIORITY_BACKGROUND, request_priority
+
+from .common import TEST_IP_ADDRESS
+
+
+@pytest.mark.asyncio
+async def test_token_bucket():
+    """Test that a bucket allows a burst, then spaces out callers."""
+    bucket = TokenBucket(100, burst=2)
+    assert bucket.try_acquire()
+    assert bucket.try_acquire()
+    assert not bucket.try_acquire()
+
+    start = time.perf_counter()
+    await asyncio.gather(*(bucket.async_acquire() for _ in range(3)))
+    assert time.perf_counter() - start >= 0.025
+
+    state = bucket.state
+    assert state.acquired == 5
+    assert state.throttled == 3
+    assert state.waiting == 0
+    assert state.total_wait > 0
+
+    bucket.reset_stats()
+    assert bucket.acquired == 0
+
+
+@pytest.mark.asyncio
+async def test_token_bucket_max_wait():
+    """Test that callers fail instead of waiting longer than the max wait."""
+    bucket = TokenBucket(1, max_wait=0.1)
+    await bucket.async_acquire()
+    with pytest.raises(RequestError):
+        await bucket.async_acquire()
+
+
+@pytest.mark.asyncio
+async def test_token_bucket_cancellation():
+    """Test that a cancelled caller leaves the next token to the next caller."""
+    bucket = TokenBucket(20, burst=1)
+    await bucket.async_acquire()
+
+    task = asyncio.ensure_future(bucket.async_acquire())
+    await asyncio.sleep(0)
+    assert bucket.waiting == 1
+    task.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await task
+    assert bucket.waiting == 0
+
+    await asyncio.wait_for(bucket.async_acquire(), 0.1)
+    assert bucket.acquired == 2
+
+
+@pytest.mark.asyncio
+async def test_token_bucket_priorities():
+    """Test that waiting callers get tokens by priority, then arrival."""
+    bucket = TokenBucket(100, burst=1)
+    await bucket.async_acquire()
+    order = []
+
+    async def async_acquire(name, priority):
+        await bucket.async_acquire(priority=priority)
+        order.append(name)
+
+    await asyncio.gather(
+        async_acquire("background 1", 2),
+        async_acquire("background 2", 2),
+        async_acquire("command", 0),
+        async_acquire("refresh", 1),
+    )
+    assert order == ["command", "refresh", "background 1", "background 2"]
+
+    bucket.release()
+    assert bucket.try_acquire()
+    assert bucket.acquired == 5
+
+
+@pytest.mark.asyncio
+async def test_device_rate_limits():
+    """Test that devices wait for their own limit and the transport's."""
+    async with DeviceEmulator(devices=2, latency=0, jitter=0) as emulator:
+        transport_limiter = TokenBucket(1000, burst=3)
+        async with Transport(rate_limiter=transport_limiter) as transport:
+            device_limiter = TokenBucket(50, burst=1)
+            device = Device(
+                emulator.addresses[0],
+                transport=transport,
+                rate_limiter=device_limiter,
+                validate=False,
+            )
+            other = Device(emulator.addresses[1], transport=transport)
+
+            start = time.perf_counter()
+            for _ in range(3):
+                await device.sensor.async_get_sensor_value("Meteo")
+            assert time.perf_counter() - start >= 0.035
+            await other.async_update_device_info()
+
+            assert device_limiter.state.acquired == 3
+            assert device_limiter.state.throttled == 2
+            assert transport_limiter.state.acquired == 4
+
+
+@pytest.mark.asyncio
+async def test_device_rate_limit_priorities(monkeypatch):
+    """Test that commands don't wait behind rate-limited background polling."""
+    limiter = TokenBucket(20, burst=1)
+    device = Device(TEST_IP_ADDRESS, validate=False, rate_limiter=limiter)
+
+    async def async_send_request(method, endpoint, **kwargs):
+        return {"success": "true"}
+
+    monkeypatch.setattr(device, "_async_send_request", async_send_request)
+
+    async def async_poll():
+        with request_priority(PRIORITY_BACKGROUND):
+            return await device._async_request("post", "sensors/Meteo")
+
+    polls = [asyncio.ensure_future(async_poll()) for _ in range(10)]
+    await asyncio.sleep(0)
+    start = time.perf_counter()
+    await device.command.async_send_command("IR", "nec1", operand="00A0BA03")
+    assert time.perf_counter() - start < 0.2
+    assert sum(poll.done() for poll in polls) < 5
+
+    await asyncio.gather(*polls)
+    await device.async_close()
+
+
+@pytest.mark.asyncio
+async def test_unsent_requests_return_tokens(monkeypatch):
+    """Test that requests that are never sent don't use up tokens."""
+    limiter = TokenBucket(0.1, burst=3)
+    device = Device(TEST_IP_ADDRESS, validate=False, rate_limiter=limiter)
+
+    async def async_send_request(method, endpoint, **kwargs):
+        await asyncio.sleep(0.05)
+        return {"success": "true"}
+
+    monkeypatch.setattr(device, "_async_send_request", async_send_request)
+    device.scheduler.deadlines[PRIORITY_BACKGROUND] = 0.01
+
+    async def async_poll():
+        with request_priority(PRIORITY_BACKGROUND):
+            return await device._async_request("post", "sensors/Meteo")
+
+    first = asyncio.ensure_future(async_poll())
+    await asyncio.sleep(0)
+    dropped = asyncio.ensure_future(async_poll())
+    await asyncio.sleep(0.02)
+    await device._async_request("post", "commands")
+
+    assert await first == {"success": "true"}
+    with pytest.raises(RequestError):
+        await dropped
+    assert limiter.acquired == 2
+
+    # An open circuit breaker fails fast without taking a token:
+    for _ in range(device.circuit_breaker.failure_threshold):
+        device.circuit_breaker.record_failure()
+    with pytest.raises(RequestError):
+        await device._async_request("post", "commands")
+    assert limiter.acquired == 2
+    await device.async_close()
@@ -0,0 +1,134 @@
+"""Define tests for the device registry."""
+import json
+
+import pytest
+
+from aiolookin import Device
+from aiolookin.emulator import DeviceEmulator
+from aiolookin.errors import LookInError
+from aiolookin.registry import DeviceRegistry
+
+
+@pytest.mark.asyncio
+async def test_warm_startup(tmp_path):
+    """Test that recorded devices are restored without making any requests."""
+    path = str(tmp_path / "registry.json")
+
+    async with DeviceEmulator(devices=2, latency=0, jitter=0) as emulator:
+        registry = DeviceRegistry(path)
+        for address in emulator.addresses:
+            async with Device(address) as device:
+                await device.async_update_device_info()
+                await device.command.async_get_command_list()
+                await device.command.async_get_command_action_list("IR")
+                await device.sensor.async_get_sensor_list()
+                registry.record(device)
+        await registry.async_save()
+        requests = emulator.requests
+
+        registry = DeviceRegistry(path)
+        await registry.async_load()
+        assert len(registry) == 2
+
+        devices = registry.restore_all()
+        for device, virtual_device in zip(devices, emulator.devices):
+            assert device.device_id == virtual_device.device_id
+            assert device.raw_device_info == registry.get(device.device_id).info
+            assert device.ip_address == virtual_device.address
+            assert await device.command.async_get_command_list() == ["IR"]
+            assert await device.sensor.async_get_sensor_list() == ["IR", "Meteo"]
+            await device.async_close()
+        assert emulator.requests == requests
+
+
+@pytest.mark.asyncio
+async def test_revalidation(tmp_path):
+    """Test that a firmware change marks a device stale and drops its capabilities."""
+    path = str(tmp_path / "registry.json")
+
+    async with DeviceEmulator(latency=0, jitter=0) as emulator:
+        registry = DeviceRegistry(path)
+        async with Device(emulator.addresses[0]) as device:
+            await device.async_update_device_info()
+            await device.command.async_get_command_list()
+            registry.record(device)
+
+        device_id = emulator.devices[0].device_id
+        device = registry.restore(device_id)
+        results = [result async for result in registry.async_revalidate_all([device])]
+        assert [result.data for result in results] == [False]
+        assert "commands" in device.cache
+
+        emulator.devices[0].firmware = "9.99"
+        assert await registry.async_revalidate(device) is True
+        assert "commands" not in device.cache
+        assert registry.get(device_id).firmware == "9.99"
+        await device.async_close()
+
+
+def test_stale_entries(tmp_path, device_info):
+    """Test staleness by age and ignoring files from other versions."""
+    path = tmp_path / "registry.json"
+    path.write_text(
+        json.dumps(
+            {
+                "devices": {
+                    "ABCD1234": {
+                        "ip_address": "192.168.1.101",
+                        "info": device_info,
+                        "updated": 0,
+                    }
+                },
+                "version": 1,
+            }
+        )
+    )
+
+    registry = DeviceRegistry(str(path), max_age=60)
+    registry.load()
+    assert registry.get_by_ip_address("192.168.1.101").device_id == "ABCD1234"
+    assert registry.is_stale("ABCD1234")
+    assert registry.is_stale("EFGH5678")
+
+    path.write_text(json.dumps({"devices": {}, "version": 0}))
+    registry = DeviceRegistry(str(path))
+    registry.load()
+    assert len(registry) == 0
+
+
+@pytest.mark.parametrize(
+    "data",
+    [
+        {"version": 1},
+        {"devices": {"ABCD1234": {"info": {}}}, "version": 1},
+        {"devices": [], "version": 1},
+        [],
+    ],
+)
+def test_invalid_files(tmp_path, data):
+    """Test that malformed registry files raise a LookInError."""
+    path = tmp_path / "registry.json"
+    path.write_text(json.dumps(data))
+
+    with pytest.raises(LookInError):
+        DeviceRegistry(str(path)).load()
+
+
+@pytest.mark.asyncio
+async def test_replaced_devices(tmp_path):
+    """Test that a different device answering at an IP address replaces its entry."""
+    async with DeviceEmulator(latency=0, jitter=0) as emulator:
+        registry = DeviceRegistry(str(tmp_path / "registry.json"))
+        async with Device(emulator.addresses[0]) as device:
+            await device.async_update_device_info()
+            registry.record(device)
+            old_id = device.device_id
+
+            emulator.devices[0].device_id = "0000FFFF"
+            assert await registry.async_revalidate(device) is True
+
+        assert old_id not in registry
+        assert registry.get_by_ip_address(emulator.addresses[0]).device_id == (
+            "0000FFFF"
+        )
+        await registry.async_save()
@@ -0,0 +1,121 @@
+"""Define tests for retries and circuit breaking."""
+import json
+from unittest.mock import patch
+
+import aiohttp
+import pytest
+
+from aiolookin import Device
+from aiolookin.errors import RequestError
+from aiolookin.resilience import (
+    BREAKER_STATE_CLOSED,
+    BREAKER_STATE_HALF_OPEN,
+    BREAKER_STATE_OPEN,
+    CircuitBreaker,
+    RetryPolicy,
+)
+
+from .common import TEST_IP_ADDRESS
+
+
+def test_retry_delays():
+    """Test that retry delays grow exponentially up to a cap."""
+    policy = RetryPolicy(base_delay=0.1, max_delay=0.3, jitter=False)
+    assert [policy.get_delay(attempt) for attempt in range(4)] == [
+        0.1,
+        0.2,
+        0.3,
+        0.3,
+    ]
+
+    policy = RetryPolicy(base_delay=0.1, max_delay=0.3)
+    assert all(0 <= policy.get_delay(attempt) <= 0.3 for attempt in range(10))
+
+
+def test_breaker_states():
+    """Test the circuit breaker's state transitions."""
+    breaker = CircuitBreaker(failure_threshold=2, recovery_timeout=10)
+
+    with patch("aiolookin.resilience.time.monotonic", return_value=100.0):
+        breaker.record_failure()
+        assert breaker.state == BREAKER_STATE_CLOSED
+        breaker.record_failure()
+        assert breaker.state == BREAKER_STATE_OPEN
+        assert breaker.allow_request() is False
+
+    with patch("aiolookin.resilience.time.monotonic", return_value=110.0):
+        assert breaker.state == BREAKER_STATE_HALF_OPEN
+        # Only a single probe is let through:
+        assert breaker.allow_request() is True
+        assert breaker.allow_request() is False
+        breaker.record_failure()
+        assert breaker.state == BREAKER_STATE_OPEN
+
+    with patch("aiolookin.resilience.time.monotonic", return_value=120.0):
+        assert breaker.allow_request() is True
+        breaker.record_success()
+        assert breaker.state == BREAKER_STATE_CLOSED
+
+
+@pytest.mark.asyncio
+async def test_get_retried(aresponses, device_info):
+    """Test that failing GET requests are retried."""
+    aresponses.add(
+        TEST_IP_ADDRESS,
+        "/device",
+        "get",
+        aresponses.Response(text="Internal Server Error", status=500),
+        repeat=2,
+    )
+    aresponses.add(
+        TEST_IP_ADDRESS,
+        "/device",
+        "get",
+        aresponses.Response(
+            text=json.dumps(device_info),
+            status=200,
+            headers={"Content-Type": "application/json; charset=utf-8"},
+        ),
+    )
+
+    async with aiohttp.ClientSession() as session:
+        device = Device(
+            TEST_IP_ADDRESS,
+            session=session,
+            retry_policy=RetryPolicy(attempts=3, base_delay=0),
+        )
+        await device.async_update_device_info()
+        assert device.device_id == "ABCD1234"
+        assert device.breaker_state == BREAKER_STATE_CLOSED
+        assert device.circuit_breaker.failure_count == 0
+
+    aresponses.assert_plan_strictly_followed()
+
+
+@pytest.mark.asyncio
+async def test_breaker_fails_fast(aresponses):
+    """Test that an open breaker fails requests without contacting the device."""
+    aresponses.add(
+        TEST_IP_ADDRESS,
+        "/device",
+        "get",
+        aresponses.Response(text="Internal Server Error", status=500),
+        repeat=2,
+    )
+
+    async with aiohttp.ClientSession() as session:
+        device = Device(
+            TEST_IP_ADDRESS,
+            session=session,
+            circuit_breaker=CircuitBreaker(failure_threshold=2),
+        )
+        for _ in range(2):
+            with pytest.raises(RequestError):
+                await device.async_update_device_info()
+        assert device.breaker_state == BREAKER_STATE_OPEN
+
+        with pytest.raises(RequestError) as err:
+            await device.async_update_device_info()
+        assert "circuit breaker is open" in str(err.value)
+
+    aresponses.assert_plan_strictly_followed()
@@ -0,0 +1,223 @@
+"""Define tests for the request scheduler."""
+import asyncio
+
+from aiohttp.client_exceptions import ClientError
+import pytest
+
+from aiolookin import Device
+from aiolookin.emulator import DeviceEmulator
+from aiolookin.errors import RequestError
+from aiolookin.resilience import RetryPolicy
+from aiolookin.scheduler import (
+    PRIORITY_BACKGROUND,
+    PRIORITY_INTERACTIVE,
+    PRIORITY_REFRESH,
+    RequestScheduler,
+    get_request_priority,
+    request_priority,
+)
+
+from .common import TEST_IP_ADDRESS
+
+
+def make_request(order, name, delay=0.01):
+    """Return a coroutine function that records when it ran."""
+
+    async def async_request():
+        await asyncio.sleep(delay)
+        order.append(name)
+        return name
+
+    return async_request
+
+
+@pytest.mark.asyncio
+async def test_priority_order():
+    """Test that waiting requests run by priority, then deadline."""
+    order = []
+    scheduler = RequestScheduler()
+
+    results = await asyncio.gather(
+        scheduler.async_run(PRIORITY_REFRESH, make_request(order, "first")),
+        scheduler.async_run(PRIORITY_BACKGROUND, make_request(order, "background")),
+        scheduler.async_run(PRIORITY_REFRESH, make_request(order, "late"), deadline=60),
+        scheduler.async_run(PRIORITY_REFRESH, make_request(order, "early"), deadline=1),
+        scheduler.async_run(PRIORITY_INTERACTIVE, make_request(order, "command")),
+    )
+
+    assert results == ["first", "background", "late", "early", "command"]
+    assert order == ["first", "command", "early", "late", "background"]
+
+
+@pytest.mark.asyncio
+async def test_running_requests_are_not_interrupted():
+    """Test that a command overtakes waiting requests, but not a running one."""
+    order = []
+    runs = []
+    scheduler = RequestScheduler()
+
+    async def async_poll():
+        runs.append(1)
+        await asyncio.sleep(0.05)
+        order.append("poll")
+        return "poll"
+
+    poll = asyncio.ensure_future(scheduler.async_run(PRIORITY_BACKGROUND, async_poll))
+    await asyncio.sleep(0.01)
+    queued = asyncio.ensure_future(
+        scheduler.async_run(PRIORITY_BACKGROUND, make_request(order, "queued"))
+    )
+    command = await scheduler.async_run(
+        PRIORITY_INTERACTIVE, make_request(order, "command")
+    )
+
+    assert command == "command"
+    assert await poll == "poll"
+    assert await queued == "queued"
+    assert order == ["poll", "command", "queued"]
+    assert len(runs) == 1
+
+
+@pytest.mark.asyncio
+async def test_overdue_background_requests():
+    """Test that overdue background requests are dropped when a command arrives."""
+    order = []
+    scheduler = RequestScheduler()
+
+    first = asyncio.ensure_future(
+        scheduler.async_run(PRIORITY_REFRESH, make_request(order, "refresh", 0.05))
+    )
+    await asyncio.sleep(0)
+    poll = asyncio.ensure_future(
+        scheduler.async_run(
+            PRIORITY_BACKGROUND, make_request(order, "poll"), deadline=0.01
+        )
+    )
+    await asyncio.sleep(0.02)
+    await scheduler.async_run(PRIORITY_INTERACTIVE, make_request(order, "command"))
+
+    await first
+    with pytest.raises(RequestError):
+        await poll
+    assert order == ["refresh", "command"]
+    assert scheduler.dropped == 1
+
+
+@pytest.mark.asyncio
+async def test_cancellation():
+    """Test that cancelling a caller cancels its request."""
+    scheduler = RequestScheduler()
+    started = asyncio.Event()
+    cancelled = asyncio.Event()
+
+    async def async_request():
+        started.set()
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            cancelled.set()
+            raise
+
+    task = asyncio.ensure_future(scheduler.async_run(PRIORITY_REFRESH, async_request))
+    await started.wait()
+    task.cancel()
+    await asyncio.wait_for(cancelled.wait(), 1)
+    await asyncio.sleep(0)
+    assert scheduler.running == 0
+    assert scheduler.pending == 0
+
+
+@pytest.mark.asyncio
+async def test_device_priorities():
+    """Test that a device's commands go ahead of queued background polling."""
+    async with DeviceEmulator(latency=0.02, jitter=0) as emulator:
+        async with Device(emulator.addresses[0], validate=False) as device:
+
+            async def async_poll(sensor):
+                with request_priority(PRIORITY_BACKGROUND):
+                    return await device.sensor.async_get_sensor_value(sensor)
+
+            in_flight = asyncio.ensure_future(async_poll("Meteo"))
+            await asyncio.sleep(0.005)
+            queued = asyncio.ensure_future(async_poll("IR"))
+            await asyncio.sleep(0)
+            await device.command.async_send_command("IR", "nec1", operand="00A0BA03")
+            assert in_flight.done()
+            assert not queued.done()
+            assert emulator.devices[0].commands_received == 1
+
+            assert "Temperature" in await in_flight
+            assert (await queued)["Signal"] == "00A0BA03"
+
+
+@pytest.mark.asyncio
+async def test_device_priorities_are_not_shared(monkeypatch):
+    """Test that a refresh doesn't join (and inherit) an in-flight background GET."""
+    scheduler = RequestScheduler()
+    device = Device(TEST_IP_ADDRESS, validate=False, scheduler=scheduler)
+    priorities = []
+
+    async def async_send_request(method, endpoint, **kwargs):
+        await asyncio.sleep(0.02)
+        return {"Temperature": "18.9"}
+
+    async def async_run(priority, async_func, **kwargs):
+        priorities.append(priority)
+        return await RequestScheduler.async_run(scheduler, priority, async_func)
+
+    monkeypatch.setattr(device, "_async_send_request", async_send_request)
+    monkeypatch.setattr(scheduler, "async_run", async_run)
+
+    async def async_poll():
+        with request_priority(PRIORITY_BACKGROUND):
+            return await device.sensor.async_get_sensor_value("Meteo")
+
+    results = await asyncio.gather(
+        async_poll(), device.sensor.async_get_sensor_value("Meteo")
+    )
+    assert results == [{"Temperature": "18.9"}] * 2
+    assert sorted(priorities) == [PRIORITY_REFRESH, PRIORITY_BACKGROUND]
+    await device.async_close()
+
+
+@pytest.mark.asyncio
+async def test_retry_backoff_releases_the_slot(monkeypatch):
+    """Test that a request waiting to be retried doesn't hold up commands."""
+    device = Device(
+        TEST_IP_ADDRESS,
+        validate=False,
+        retry_policy=RetryPolicy(attempts=2, base_delay=0.05, jitter=False),
+    )
+    order = []
+    failures = [ClientError("Connection reset")]
+
+    async def async_send_request(method, endpoint, **kwargs):
+        order.append(endpoint)
+        if method == "get" and failures:
+            raise RequestError("Error while requesting") from failures.pop()
+        return {"success": "true"}
+
+    monkeypatch.setattr(device, "_async_send_request", async_send_request)
+
+    refresh = asyncio.ensure_future(device.sensor.async_get_sensor_value("Meteo"))
+    await asyncio.sleep(0.01)
+    await asyncio.wait_for(
+        device.command.async_send_command("IR", "nec1", operand="00A0BA03"), 0.03
+    )
+    assert await refresh == {"success": "true"}
+    assert order == ["sensors/Meteo", "commands", "sensors/Meteo"]
+    await device.async_close()
+
+
+@pytest.mark.asyncio
+async def test_priority_without_contextvars(monkeypatch):
+    """Test the per-task fallback used where contextvars is unavailable."""
+    monkeypatch.setattr("aiolookin.scheduler._REQUEST_PRIORITY", None)
+
+    assert get_request_priority() is None
+    with request_priority(PRIORITY_BACKGROUND):
+        assert get_request_priority() == PRIORITY_BACKGROUND
+        with request_priority(PRIORITY_INTERACTIVE):
+            assert get_request_priority() == PRIORITY_INTERACTIVE
+        assert get_request_priority() == PRIORITY_BACKGROUND
+    assert get_request_priority() is None
@@ -106,3 +106,24 @@ async def test_sensor_list(aresponses, device_server, sensor_list):
         device = await async_get_device(TEST_IP_ADDRESS, session=session)
         sensors = await device.sensor.async_get_sensor_list()
         assert sensors == ["IR", "Meteo"]
+
+
+@pytest.mark.asyncio
+async def test_sensor_reading(aresponses, device_server, meteo_sensor_value):
+    """Test getting the latest value of a sensor as a typed model."""
+    device_server.add(
+        TEST_IP_ADDRESS,
+        "/sensors/Meteo",
+        "get",
+        aresponses.Response(
+            text=json.dumps(meteo_sensor_value),
+            status=200,
+            headers={"Content-Type": "application/json; charset=utf-8"},
+        ),
+    )
+
+    async with aiohttp.ClientSession() as session:
+        device = await async_get_device(TEST_IP_ADDRESS, session=session)
+        reading = await device.sensor.async_get_sensor_reading("Meteo", validate=False)
+        assert reading.temperature == 18.9
+        assert reading.humidity == 62.0
@@ -0,0 +1,220 @@
+"""Define tests for the sharded fleet."""
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+import multiprocessing
+
+import pytest
+
+from aiolookin.emulator import DeviceEmulator
+from aiolookin.errors import CommandError, LookInError, RequestError
+from aiolookin.models import MeteoSensorValue
+from aiolookin.sharding import (
+    MESSAGE_INFOS,
+    MESSAGE_REFRESH,
+    MESSAGE_RESULT,
+    ShardedFleet,
+    ShardWorker,
+    get_shard,
+)
+
+
+def test_get_shard():
+    """Test that keys are spread over shards in a stable way."""
+    shards = [get_shard(f"192.168.1.{host}", 4) for host in range(1, 255)]
+    assert shards == [get_shard(f"192.168.1.{host}", 4) for host in range(1, 255)]
+    assert set(shards) == {0, 1, 2, 3}
+
+
+@pytest.mark.asyncio
+async def test_routing():
+    """Test that calls run in the shard that owns each device."""
+    async with DeviceEmulator(devices=4, latency=0, jitter=0) as emulator:
+        async with ShardedFleet(emulator.addresses, processes=2) as fleet:
+            results = [result async for result in fleet.async_update_device_info()]
+            assert sorted(result.ip_address for result in results) == sorted(
+                emulator.addresses
+            )
+            assert all(result.ok for result in results)
+            assert {device.shard for device in fleet} <= {0, 1}
+            assert sorted(device.device_id for device in fleet) == sorted(
+                virtual_device.device_id for virtual_device in emulator.devices
+            )
+
+            device = fleet.get(emulator.addresses[0])
+            assert await device.command.async_get_command_list() == ["IR"]
+            await device.command.async_send_command("IR", "nec1", operand="00A0BA03")
+            assert emulator.devices[0].commands_received == 1
+            with pytest.raises(CommandError):
+                await device.command.async_send_command("IR", "bogus")
+
+            reading = await device.sensor.async_get_sensor_reading("Meteo")
+            assert isinstance(reading, MeteoSensorValue)
+            assert await device.async_update_device_info() == ()
+            assert device.voltage == emulator.devices[0].voltage
+            assert device.type == "Remote"
+
+            missing = fleet.add("127.0.0.1:1")
+            with pytest.raises(RequestError):
+                await missing.async_update_device_info()
+
+    assert not fleet.started
+    with pytest.raises(LookInError):
+        await device.command.async_get_command_list()
+
+
+@pytest.mark.asyncio
+async def test_streamed_updates():
+    """Test that shards stream back info that changed."""
+    async with DeviceEmulator(devices=2, latency=0, jitter=0) as emulator:
+        updates = asyncio.Queue()
+        fleet = ShardedFleet(emulator.addresses, processes=2, update_interval=0.05)
+        fleet.subscribe(lambda device, fields: updates.put_nowait((device, fields)))
+
+        async with fleet:
+            device, fields = await asyncio.wait_for(updates.get(), 10)
+            assert "device_id" in fields
+            await asyncio.wait_for(updates.get(), 10)
+
+            emulator.devices[0].firmware = "9.99"
+            while True:
+                device, fields = await asyncio.wait_for(updates.get(), 10)
+                if device.ip_address == emulator.addresses[0]:
+                    break
+            assert "firmware" in fields
+            assert device.firmware == "9.99"
+
+
+@pytest.mark.asyncio
+async def test_failing_devices_and_shards():
+    """Test that a failing device or shard doesn't fail the whole refresh."""
+    async with DeviceEmulator(devices=4, latency=0, jitter=0) as emulator:
+        async with ShardedFleet(emulator.addresses, processes=2) as fleet:
+            fleet.add("127.0.0.1:1")
+            results = {
+                result.ip_address: result
+                async for result in fleet.async_update_device_info()
+            }
+            assert isinstance(results.pop("127.0.0.1:1").error, RequestError)
+            assert all(result.ok for result in results.values())
+
+            fleet.remove("127.0.0.1:1")
+            fleet._processes[0].terminate()
+            results = {
+                result.ip_address: result
+                async for result in fleet.async_update_device_info()
+            }
+            assert sorted(results) == sorted(emulator.addresses)
+            for result in results.values():
+                if result.device.shard == 0:
+                    assert isinstance(result.error, RequestError)
+                else:
+                    assert result.ok
+
+
+@pytest.mark.asyncio
+async def test_info_events():
+    """Test that a sharded device dispatches its info changes to subscribers."""
+    async with DeviceEmulator(latency=0, jitter=0) as emulator:
+        async with ShardedFleet(emulator.addresses, processes=1) as fleet:
+            device = fleet.get(emulator.addresses[0])
+            changes = []
+            device.info_events.subscribe(
+                lambda device, fields: changes.append(fields), fields=("firmware",)
+            )
+            await device.async_update_device_info()
+            emulator.devices[0].firmware = "9.99"
+            await device.async_update_device_info()
+
+            assert [change.new for change in changes[-1]] == ["9.99"]
+
+
+@pytest.mark.asyncio
+async def test_worker_unpicklable_result():
+    """Test that a result that can't be sent back fails with a RequestError."""
+    conn, child_conn = multiprocessing.Pipe()
+    worker = ShardWorker(child_conn, [], {"update_interval": None})
+
+    await worker._async_send_result(1, lambda: None, None)
+    _, request_id, data, error = conn.recv()
+    assert request_id == 1
+    assert data is None
+    assert isinstance(error, RequestError)
+
+
+@pytest.mark.asyncio
+async def test_worker_errors(monkeypatch):
+    """Test that unexpected errors are sent back without killing the shard."""
+    conn, child_conn = multiprocessing.Pipe()
+    worker = ShardWorker(child_conn, [], {"update_interval": None})
+    calls = []
+
+    async def async_refresh(fleet):
+        calls.append(fleet)
+        if len(calls) == 1:
+            raise KeyError("Bad update")
+        return [("192.168.1.100", None, ("firmware",), None)]
+
+    monkeypatch.setattr("aiolookin.sharding._async_refresh", async_refresh)
+
+    await worker._async_handle_refresh(1)
+    kind, request_id, data, error = conn.recv()
+    assert (kind, request_id, data) == (MESSAGE_RESULT, 1, None)
+    assert isinstance(error, KeyError)
+
+    calls.clear()
+    task = asyncio.ensure_future(worker._async_update(0.01))
+    try:
+        kind, updates = await asyncio.get_event_loop().run_in_executor(None, conn.recv)
+    finally:
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+    assert kind == MESSAGE_INFOS
+    assert updates == [("192.168.1.100", None, ("firmware",), None)]
+    assert len(calls) >= 2
+
+
+class Unreadable:
+    """Define an object that can be pickled, but not unpickled."""
+
+    def __reduce__(self):
+        """Reconstruct the object with a call that fails."""
+        return (int, ("not a number",))
+
+
+class FakeProcess:
+    """Define a stand-in for a shard's process."""
+
+    terminated = False
+
+    def terminate(self):
+        """Terminate the process."""
+        self.terminated = True
+
+
+@pytest.mark.asyncio
+async def test_unreadable_messages():
+    """Test that a message the parent can't read fails the shard's requests."""
+    conn, child_conn = multiprocessing.Pipe()
+    fleet = ShardedFleet(["192.168.1.100"], processes=1)
+    process = FakeProcess()
+    fleet._conns = [conn]
+    fleet._executor = ThreadPoolExecutor(1)
+    fleet._processes = [process]
+    fleet._send_executors = [ThreadPoolExecutor(1)]
+
+    reader = asyncio.ensure_future(fleet._async_read(0))
+    request = asyncio.ensure_future(fleet._async_request(0, (MESSAGE_REFRESH,)))
+    await asyncio.get_event_loop().run_in_executor(None, child_conn.recv)
+    child_conn.send(Unreadable())
+
+    with pytest.raises(RequestError):
+        await asyncio.wait_for(request, 5)
+    await asyncio.wait_for(reader, 5)
+    assert process.terminated
+    with pytest.raises(RequestError):
+        await fleet.get("192.168.1.100").async_update_device_info()
+
+    fleet._executor.shutdown()
+    fleet._send_executors[0].shutdown()
+    conn.close()
+    child_conn.close()
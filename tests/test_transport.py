@@ -0,0 +1,148 @@
+"""Define tests for the HTTP transport."""
+import json
+
+import aiohttp
+import pytest
+
+from aiolookin import Device, async_get_device
+from aiolookin.errors import RequestError
+from aiolookin.instrumentation import Instrumentation
+from aiolookin.ratelimit import TokenBucket
+from aiolookin.scheduler import RequestScheduler
+from aiolookin.transport import Transport
+
+from .common import TEST_IP_ADDRESS
+
+
+@pytest.mark.asyncio
+async def test_device_context_manager(aresponses, device_info):
+    """Test that a device closes the transport it owns."""
+    aresponses.add(
+        TEST_IP_ADDRESS,
+        "/device",
+        "get",
+        aresponses.Response(
+            text=json.dumps(device_info),
+            status=200,
+            headers={"Content-Type": "application/json; charset=utf-8"},
+        ),
+        repeat=2,
+    )
+
+    async with Device(TEST_IP_ADDRESS) as device:
+        await device.async_update_device_info()
+        session = device.transport.session
+        await device.async_update_device_info()
+        assert device.transport.session is session
+        assert device.device_id == "ABCD1234"
+
+    assert session.closed
+    assert device.transport.closed
+
+
+@pytest.mark.asyncio
+async def test_external_session_not_closed(aresponses, device_info):
+    """Test that a transport never closes a session it was given."""
+    aresponses.add(
+        TEST_IP_ADDRESS,
+        "/device",
+        "get",
+        aresponses.Response(
+            text=json.dumps(device_info),
+            status=200,
+            headers={"Content-Type": "application/json; charset=utf-8"},
+        ),
+    )
+
+    async with aiohttp.ClientSession() as session:
+        async with Device(TEST_IP_ADDRESS, session=session) as device:
+            await device.async_update_device_info()
+            assert device.transport.session is session
+        assert not session.closed
+
+    # A closed session is never silently replaced by one the transport owns:
+    assert device.transport.closed
+    with pytest.raises(RequestError):
+        await device.async_update_device_info()
+    assert device.transport._session is None
+
+
+@pytest.mark.asyncio
+async def test_shared_transport(aresponses, device_info):
+    """Test that devices sharing a transport share its session."""
+    aresponses.add(
+        TEST_IP_ADDRESS,
+        "/device",
+        "get",
+        aresponses.Response(
+            text=json.dumps(device_info),
+            status=200,
+            headers={"Content-Type": "application/json; charset=utf-8"},
+        ),
+        repeat=2,
+    )
+
+    async with Transport() as transport:
+        device1 = await async_get_device(TEST_IP_ADDRESS, transport=transport)
+        device2 = await async_get_device(TEST_IP_ADDRESS, transport=transport)
+        assert device1.transport is device2.transport
+
+        # Closing a device must not close a transport it doesn't own:
+        await device1.async_close()
+        assert not transport.closed
+
+        connector = transport.session.connector
+        assert connector is not None
+        assert connector.limit_per_host == 1
+
+    assert transport.closed
+
+
+@pytest.mark.parametrize("option", ["session", "instrumentation", "json_decoder"])
+def test_transport_options_require_no_transport(option):
+    """Test that transport options aren't silently dropped next to a transport."""
+    values = {
+        "instrumentation": Instrumentation(),
+        "json_decoder": json.loads,
+        "session": aiohttp.ClientSession,
+    }
+    with pytest.raises(ValueError, match=option):
+        Device(TEST_IP_ADDRESS, transport=Transport(), **{option: values[option]})
+
+
+@pytest.mark.asyncio
+async def test_async_get_device_options(aresponses, device_info):
+    """Test that async_get_device passes every option on to the device."""
+    aresponses.add(
+        TEST_IP_ADDRESS,
+        "/device",
+        "get",
+        aresponses.Response(
+            text=json.dumps(device_info),
+            status=200,
+            headers={"Content-Type": "application/json; charset=utf-8"},
+        ),
+    )
+
+    decoded = []
+
+    def json_decoder(body):
+        decoded.append(body)
+        return json.loads(body)
+
+    rate_limiter = TokenBucket(10)
+    scheduler = RequestScheduler()
+    device = await async_get_device(
+        TEST_IP_ADDRESS,
+        queue_size=2,
+        instrumentation=Instrumentation(),
+        json_decoder=json_decoder,
+        scheduler=scheduler,
+        rate_limiter=rate_limiter,
+    )
+    assert len(decoded) == 1
+    assert device.transport.instrumentation.histograms
+    assert device.rate_limiter is rate_limiter
+    assert rate_limiter.acquired == 1
+    assert device.scheduler is scheduler
+    await device.async_close()
@@ -0,0 +1,150 @@
+"""Define tests for the UDP notification listener."""
+import asyncio
+import json
+from types import SimpleNamespace
+
+import pytest
+
+from aiolookin import async_get_device
+from aiolookin.udp import (
+    EVENT_TYPE_ALIVE,
+    EVENT_TYPE_UPDATED,
+    UDPListener,
+    parse_datagram,
+)
+
+from .common import TEST_IP_ADDRESS
+
+
+async def async_send_datagram(port, payload):
+    """Send a datagram to a local listener."""
+    loop = asyncio.get_event_loop()
+    transport, _ = await loop.create_datagram_endpoint(
+        asyncio.DatagramProtocol, remote_addr=("127.0.0.1", port)
+    )
+    transport.sendto(payload)
+    transport.close()
+
+
+@pytest.mark.asyncio
+async def test_dispatch_to_subscribers():
+    """Test that parsed events reach (only) matching subscribers."""
+    loop = asyncio.get_event_loop()
+    meteo_events = loop.create_future()
+    other_events = []
+
+    async with UDPListener(host="127.0.0.1", port=0) as listener:
+        listener.subscribe(
+            meteo_events.set_result, device_id="ABCD1234", sensor="Meteo"
+        )
+        unsubscribe = listener.subscribe(other_events.append, device_id="FFFF0000")
+
+        await async_send_datagram(listener.port, b"not a LOOK.in message")
+        await async_send_datagram(listener.port, b"LOOK.in:Alive!FFFF0000:1:2.36")
+        await async_send_datagram(
+            listener.port, b"LOOK.in:Updated!ABCD1234:FE:00:00BD026C"
+        )
+
+        event = await asyncio.wait_for(meteo_events, 1)
+        assert event.event_type == EVENT_TYPE_UPDATED
+        assert event.device_id == "ABCD1234"
+        assert event.ip_address == "127.0.0.1"
+        assert event.sensor == "Meteo"
+        assert event.event_id == "00"
+        assert event.value == "00BD026C"
+        assert event.data is None
+
+        assert len(other_events) == 1
+        assert other_events[0].event_type == EVENT_TYPE_ALIVE
+
+        unsubscribe()
+        await async_send_datagram(listener.port, b"LOOK.in:Alive!FFFF0000:1:2.36")
+        await asyncio.sleep(0.05)
+        assert len(other_events) == 1
+
+
+@pytest.mark.asyncio
+async def test_targeted_refresh(
+    aresponses, device_server, meteo_sensor_value, sensor_list
+):
+    """Test that an update for a registered device refreshes that sensor."""
+    device_server.add(
+        TEST_IP_ADDRESS,
+        "/sensors",
+        "get",
+        aresponses.Response(
+            text=json.dumps(sensor_list),
+            status=200,
+            headers={"Content-Type": "application/json; charset=utf-8"},
+        ),
+    )
+    device_server.add(
+        TEST_IP_ADDRESS,
+        "/sensors/Meteo",
+        "get",
+        aresponses.Response(
+            text=json.dumps(meteo_sensor_value),
+            status=200,
+            headers={"Content-Type": "application/json; charset=utf-8"},
+        ),
+    )
+
+    loop = asyncio.get_event_loop()
+    events = loop.create_future()
+
+    async with await async_get_device(TEST_IP_ADDRESS) as device:
+        async with UDPListener(host="127.0.0.1", port=0) as listener:
+            listener.register_device(device)
+            listener.subscribe(events.set_result)
+            await async_send_datagram(
+                listener.port, b"LOOK.in:Updated!ABCD1234:FE:00:00BD026C"
+            )
+            event = await asyncio.wait_for(events, 1)
+
+    assert event.sensor == "Meteo"
+    assert event.data == meteo_sensor_value
+    aresponses.assert_plan_strictly_followed()
+
+
+@pytest.mark.asyncio
+async def test_notification_during_refresh():
+    """Test that notifications arriving mid-refresh trigger one more refresh."""
+    loop = asyncio.get_event_loop()
+    requests = []
+
+    async def async_get_sensor_value(sensor):
+        """Return the sensor's value once the test releases the request."""
+        release = loop.create_future()
+        requests.append(release)
+        return await release
+
+    device = SimpleNamespace(
+        device_id="ABCD1234",
+        sensor=SimpleNamespace(async_get_sensor_value=async_get_sensor_value),
+    )
+    events = []
+
+    listener = UDPListener(host="127.0.0.1", port=0)
+    listener.register_device(device)
+    listener.subscribe(events.append)
+
+    for value in (b"00BD026C", b"00BE026C", b"00BF026C"):
+        listener.handle_event(
+            parse_datagram(
+                b"LOOK.in:Updated!ABCD1234:FE:00:" + value, ("127.0.0.1", 61201)
+            )
+        )
+    await asyncio.sleep(0)
+    assert len(requests) == 1
+
+    requests[0].set_result({"Temperature": "18.9"})
+    await asyncio.sleep(0)
+    assert [event.value for event in events] == ["00BD026C"]
+    assert len(requests) == 2
+
+    # The follow-up refresh covers the latest of the notifications it absorbed:
+    requests[1].set_result({"Temperature": "19.1"})
+    await asyncio.sleep(0)
+    assert [event.value for event in events] == ["00BD026C", "00BF026C"]
+    assert events[1].data == {"Temperature": "19.1"}
+    assert len(requests) == 2